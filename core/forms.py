@@ -240,6 +240,16 @@ class ClienteForm(forms.ModelForm):
             elif tipo_documento == 'cnpj' and len(cpf_cnpj_numerico) != 14:
                 self.add_error('cpf_cnpj', "CNPJ deve ter 14 dígitos numéricos.")
         
+        # CPF/CNPJ novo não pode repetir o de outro cliente (busca exata no documento
+        # normalizado); cadastros antigos já repetidos continuam editáveis
+        cpf_cnpj_numerico = Cliente.normalizar_documento(cpf_cnpj)
+        if cpf_cnpj_numerico and cpf_cnpj_numerico != self.instance.cpf_cnpj_numerico:
+            duplicado = Cliente.objects.filter(
+                cpf_cnpj_numerico=cpf_cnpj_numerico
+            ).exclude(pk=self.instance.pk).values_list('codigo', flat=True).first()
+            if duplicado:
+                self.add_error('cpf_cnpj', f"CPF/CNPJ já cadastrado para o cliente {duplicado}.")
+        
         # Validação do código master
         codigo_master = cleaned_data.get('codigo_master')
         if codigo_master:
@@ -426,6 +436,31 @@ class ImportarVendasForm(forms.Form):
         help_text="Selecione o arquivo CSV com os dados de vendas para importação",
         widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv'})
     )
+    
+    modo_carga = forms.ChoiceField(
+        label="Modo de carga",
+        choices=LogSincronizacao.MODO_CARGA_CHOICES,
+        initial='orm',
+        required=False,
+        help_text="COPY grava as vendas direto no PostgreSQL via tabela de staging (recomendado para arquivos grandes)",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    
+    substituicao = forms.ChoiceField(
+        label="Vendas já existentes",
+        choices=LogSincronizacao.SUBSTITUICAO_CHOICES,
+        initial='periodos',
+        required=False,
+        help_text="Substituir os meses do arquivo atualiza só os períodos importados (remoção e inserção na mesma transação)",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    
+    forcar = forms.BooleanField(
+        label="Forçar reimportação",
+        required=False,
+        help_text="Reimporta mesmo que o arquivo (ou o mês) seja idêntico ao já carregado",
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
 
 # Formulário para processo de sincronização com o BI
 class SincronizarBIForm(forms.Form):
@@ -0,0 +1,52 @@
+# core/management/commands/atualizar_metricas_clientes.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+
+from core.models import Cliente
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula as métricas de vendas desnormalizadas dos clientes (última compra, faturamento '
+        '30/90/365 dias e total). Importações e vendas alteradas já atualizam as métricas e o celery '
+        'beat roda a mesma atualização todo dia (janelas de 30/90/365 dias); rode após o migrate inicial.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clientes',
+            type=str,
+            nargs='+',
+            help='Códigos dos clientes a recalcular; sem esta opção recalcula todos'
+        )
+
+    def handle(self, *args, **options):
+        clientes = None
+        if options['clientes']:
+            clientes = list(Cliente.objects.filter(codigo__in=options['clientes']).values_list('id', flat=True))
+            if not clientes:
+                raise CommandError('❌ Nenhum cliente encontrado com os códigos informados')
+
+        self.stdout.write(self.style.HTTP_INFO(
+            f'🔄 Recalculando métricas de {len(clientes) if clientes else "todos os"} cliente(s)...'
+        ))
+        inicio = time.perf_counter()
+        atualizados = Cliente.atualizar_metricas(clientes=clientes)
+        duracao = time.perf_counter() - inicio
+
+        # ===== RESULTADO =====
+        resumo = Cliente.objects.filter(quantidade_vendas__gt=0).aggregate(
+            clientes=Count('id'), total=Sum('faturamento_total'), ultimo_ano=Sum('faturamento_365d')
+        )
+        self.stdout.write(self.style.SUCCESS('\n' + '=' * 50))
+        self.stdout.write(self.style.SUCCESS('📊 RELATÓRIO FINAL'))
+        self.stdout.write(self.style.SUCCESS('=' * 50))
+        self.stdout.write(f'⏱️ Métricas recalculadas em {duracao:.1f}s')
+        self.stdout.write(f'👥 Clientes atualizados: {atualizados:,}')
+        self.stdout.write(f'🛒 Clientes com vendas: {resumo["clientes"]:,}')
+        self.stdout.write(f'💰 Faturamento total: {resumo["total"] or 0:,.2f} | últimos 365 dias: {resumo["ultimo_ano"] or 0:,.2f}')
+        self.stdout.write(self.style.SUCCESS('✅ Métricas atualizadas'))
+        self.stdout.write('=' * 50)
@@ -0,0 +1,77 @@
+# core/management/commands/atualizar_resumo_vendas.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+
+from core.models import Cliente, ResumoVendasMensal, Vendas, VersaoDados
+
+
+class Command(BaseCommand):
+    help = 'Recalcula o resumo mensal de vendas (tabela usada pelos relatórios) a partir da tabela de vendas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--periodos',
+            type=str,
+            nargs='+',
+            help='ANOMES (YYYYMM) a recalcular; sem esta opção recalcula o resumo inteiro'
+        )
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Apenas compara os totais do resumo com os da tabela de vendas (não altera nada)'
+        )
+
+    def handle(self, *args, **options):
+        periodos = options['periodos']
+        if periodos and any(len(periodo) != 6 or not periodo.isdigit() for periodo in periodos):
+            raise CommandError('❌ Use períodos no formato YYYYMM (ex: --periodos 202401 202402)')
+
+        vendas = Vendas.objects.all()
+        resumo = ResumoVendasMensal.objects.all()
+        if periodos:
+            vendas = vendas.filter(anomes__in=periodos)
+            resumo = resumo.filter(anomes__in=periodos)
+
+        linhas_gravadas = None
+        inicio = time.perf_counter()
+        if not options['verificar']:
+            self.stdout.write(self.style.HTTP_INFO(
+                f'🔄 Recalculando resumo {"dos períodos " + ", ".join(periodos) if periodos else "completo"}...'
+            ))
+            linhas_gravadas = ResumoVendasMensal.recalcular(periodos=periodos)
+            Cliente.atualizar_metricas()
+            VersaoDados.incrementar()
+        duracao = time.perf_counter() - inicio
+
+        # ===== CONFERÊNCIA =====
+        totais_vendas = vendas.aggregate(valor=Sum('valor_total'), quantidade=Sum('quantidade'))
+        totais_resumo = resumo.aggregate(
+            valor=Sum('valor_total'), quantidade=Sum('quantidade'), linhas=Sum('quantidade_linhas')
+        )
+        total_vendas = vendas.count()
+        # Arredondado em centavos (o SQLite soma decimais em ponto flutuante)
+        confere = (
+            round(totais_vendas['valor'] or 0, 2) == round(totais_resumo['valor'] or 0, 2)
+            and round(totais_vendas['quantidade'] or 0, 2) == round(totais_resumo['quantidade'] or 0, 2)
+            and total_vendas == (totais_resumo['linhas'] or 0)
+        )
+
+        # ===== RESULTADO =====
+        self.stdout.write(self.style.SUCCESS('\n' + '=' * 50))
+        self.stdout.write(self.style.SUCCESS('📊 RELATÓRIO FINAL'))
+        self.stdout.write(self.style.SUCCESS('=' * 50))
+        if linhas_gravadas is not None:
+            self.stdout.write(f'⏱️ Resumo recalculado em {duracao:.1f}s')
+        self.stdout.write(f'📋 Vendas: {total_vendas:,} linhas')
+        self.stdout.write(f'📈 Resumo: {resumo.count():,} linhas')
+        self.stdout.write(f'💰 Valor nas vendas: {totais_vendas["valor"] or 0:,.2f} | no resumo: {totais_resumo["valor"] or 0:,.2f}')
+        if confere:
+            self.stdout.write(self.style.SUCCESS('✅ Resumo confere com a tabela de vendas'))
+        else:
+            self.stdout.write(self.style.ERROR(
+                '❌ Resumo diferente da tabela de vendas - rode sem --verificar para recalcular'
+            ))
+        self.stdout.write('=' * 50)
@@ -6,7 +6,7 @@ import logging
 from datetime import datetime
 from django.db import transaction
 from django.core.management.base import BaseCommand, CommandError
-from core.models import Cliente, Vendedor, LogSincronizacao
+from core.models import Cliente, Vendedor, LogSincronizacao, VersaoDados
 
 logger = logging.getLogger(__name__)
 
@@ -285,4 +285,5 @@ class Command(BaseCommand):
             # Limpar cache geral
             self.stdout.write('🧹 Limpando cache de vendedores...')
             cache_limpos = Cliente.limpar_cache_vendedores()
-            self.stdout.write(f'✅ Cache limpo para {cache_limpos} códigos de vendedores')
\ No newline at end of file
+            self.stdout.write(f'✅ Cache limpo para {cache_limpos} códigos de vendedores')
+            VersaoDados.incrementar()  # relatórios em cache mostram o vendedor do cliente
\ No newline at end of file
@@ -0,0 +1,99 @@
+# core/management/commands/benchmark_auxiliares.py
+
+import random
+import time
+
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from core.services.importacao_bi import TabelasAuxiliares, texto_celula
+
+
+def _buscar_por_varredura(planilhas_aux, codigo_produto):
+    """Busca antiga: refaz a coluna de códigos do DataFrame inteiro a cada produto"""
+    codigo_grupo = '0001'
+    codigo_fabricante = '001'
+
+    df_produtos = planilhas_aux['produtos']
+    produto_planilha = df_produtos[df_produtos['CODPRO'].astype(str).str.strip().str.zfill(6) == codigo_produto]
+    if not produto_planilha.empty:
+        codigo_grupo = texto_celula(produto_planilha.iloc[0].get('CODCLA'), '0001').zfill(4)
+        codigo_fabricante = texto_celula(produto_planilha.iloc[0].get('CODFAB'), '001').zfill(3)
+
+    df_classes = planilhas_aux['classes']
+    df_classes[df_classes['CODCLA'].astype(str).str.strip().str.zfill(4) == codigo_grupo]
+
+    df_fabricantes = planilhas_aux['fabricantes']
+    df_fabricantes[df_fabricantes['CODFAB'].astype(str).str.strip().str.zfill(3) == codigo_fabricante]
+
+    return codigo_grupo, codigo_fabricante
+
+
+class Command(BaseCommand):
+    help = 'Compara a busca nas planilhas auxiliares (varredura x dicionários indexados)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--produtos',
+            type=int,
+            default=50000,
+            help='Tamanho do catálogo sintético de produtos (padrão: 50000)'
+        )
+        parser.add_argument(
+            '--consultas',
+            type=int,
+            default=2000,
+            help='Quantidade de produtos novos consultados (padrão: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        total_produtos = options['produtos']
+        total_consultas = options['consultas']
+        aleatorio = random.Random(42)
+
+        # Catálogo sintético no formato lido da planilha (tudo texto, códigos sem zeros à esquerda)
+        planilhas_aux = {
+            'produtos': pd.DataFrame({
+                'CODPRO': [str(i) for i in range(1, total_produtos + 1)],
+                'CODCLA': [str(aleatorio.randint(1, 800)) for _ in range(total_produtos)],
+                'CODFAB': [str(aleatorio.randint(1, 400)) for _ in range(total_produtos)],
+                'DESCR': [f'PRODUTO {i}' for i in range(1, total_produtos + 1)],
+            }),
+            'classes': pd.DataFrame({
+                'CODCLA': [str(i) for i in range(1, 801)],
+                'DESCR': [f'CLASSE {i}' for i in range(1, 801)],
+            }),
+            'fabricantes': pd.DataFrame({
+                'CODFAB': [str(i) for i in range(1, 401)],
+                'DESCR': [f'FABRICANTE {i}' for i in range(1, 401)],
+            }),
+        }
+        codigos = [str(aleatorio.randint(1, total_produtos)).zfill(6) for _ in range(total_consultas)]
+
+        self.stdout.write(self.style.HTTP_INFO(
+            f'🧪 Catálogo de {total_produtos:,} produtos, {total_consultas:,} produtos novos consultados'
+        ))
+
+        inicio = time.perf_counter()
+        resultado_varredura = [_buscar_por_varredura(planilhas_aux, codigo) for codigo in codigos]
+        tempo_varredura = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        auxiliares = TabelasAuxiliares(planilhas_aux)
+        tempo_indice = time.perf_counter() - inicio
+        resultado_indice = [
+            (info['codigo_grupo'], info['codigo_fabricante'])
+            for info in (auxiliares.dados_produto(codigo, '') for codigo in codigos)
+        ]
+        tempo_indexado = time.perf_counter() - inicio
+
+        if resultado_varredura != resultado_indice:
+            self.stdout.write(self.style.ERROR('❌ Resultados diferentes entre as duas buscas'))
+            return
+
+        self.stdout.write(f'🐢 Varredura:  {tempo_varredura:8.3f}s ({tempo_varredura / total_consultas * 1000:.2f} ms/produto)')
+        self.stdout.write(
+            f'⚡ Indexado:   {tempo_indexado:8.3f}s (índice {tempo_indice:.3f}s + '
+            f'{(tempo_indexado - tempo_indice) / total_consultas * 1000000:.1f} µs/produto)'
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ {tempo_varredura / tempo_indexado:,.0f}x mais rápido'))
@@ -0,0 +1,254 @@
+# core/management/commands/benchmark_importacao.py
+
+import json
+import os
+import resource
+import shutil
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.services.bi_sintetico import gerar_arquivo_bi, interpretar_tamanho
+from core.services.importacao_bi import executar_importacao_bi, MODOS_CARGA, SUBSTITUICOES
+from core.services.leitor_bi import LeitorBI, TAMANHO_LOTE_LEITURA
+
+
+class Desfazer(Exception):
+    """Interrompe a transação do benchmark para desfazer a importação"""
+
+
+class ContadorConsultas:
+    """execute_wrapper que conta as consultas SQL (COPY não passa por aqui)"""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+
+class MonitorMemoria:
+    """Amostra o RSS do processo em uma thread e guarda o pico (MB)"""
+
+    INTERVALO = 0.05
+
+    def __init__(self):
+        self.pico = 0.0
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._amostrar, daemon=True)
+
+    @staticmethod
+    def rss_atual():
+        """RSS atual via /proc; sem /proc usa o pico do processo (ru_maxrss)"""
+        try:
+            with open('/proc/self/statm') as statm:
+                return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+        except (OSError, ValueError):
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def _amostrar(self):
+        while not self._parar.is_set():
+            self.pico = max(self.pico, self.rss_atual())
+            self._parar.wait(self.INTERVALO)
+
+    def __enter__(self):
+        self.pico = self.rss_atual()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._parar.set()
+        self._thread.join()
+        self.pico = max(self.pico, self.rss_atual())
+
+
+class Command(BaseCommand):
+    help = 'Mede a importação BI (registros/s, consultas SQL e pico de memória) com arquivos sintéticos ou reais'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--linhas',
+            type=str,
+            nargs='+',
+            default=['10k'],
+            help='Tamanhos dos arquivos sintéticos: 10k, 100k, 1m ou um número (padrão: 10k)'
+        )
+        parser.add_argument(
+            '--arquivo',
+            type=str,
+            help='Usar um arquivo BI existente em vez de gerar arquivos sintéticos'
+        )
+        parser.add_argument(
+            '--formato',
+            type=str,
+            choices=['xlsx', 'csv'],
+            default='xlsx',
+            help='Formato dos arquivos sintéticos (padrão: xlsx)'
+        )
+        parser.add_argument(
+            '--modo',
+            type=str,
+            nargs='+',
+            choices=[modo for modo, _ in MODOS_CARGA],
+            default=['orm'],
+            help='Modos de carga medidos (ex: --modo orm copy)'
+        )
+        parser.add_argument(
+            '--substituicao',
+            type=str,
+            choices=[opcao for opcao, _ in SUBSTITUICOES],
+            default='periodos',
+            help='Modo de substituição usado na importação (padrão: periodos)'
+        )
+        parser.add_argument(
+            '--tamanho-lote',
+            type=int,
+            default=TAMANHO_LOTE_LEITURA,
+            help=f'Linhas lidas por lote (padrão: {TAMANHO_LOTE_LEITURA})'
+        )
+        parser.add_argument(
+            '--manter-dados',
+            action='store_true',
+            help='Manter as vendas importadas (por padrão cada execução é desfeita com rollback)'
+        )
+        parser.add_argument(
+            '--saida-json',
+            type=str,
+            help='Gravar os resultados em JSON (para comparar entre versões)'
+        )
+        parser.add_argument(
+            '--min-registros-por-segundo',
+            type=float,
+            help='Falhar se alguma execução ficar abaixo desta taxa'
+        )
+        parser.add_argument(
+            '--max-consultas-por-mil',
+            type=float,
+            help='Falhar se alguma execução fizer mais consultas SQL por 1.000 linhas'
+        )
+
+    def handle(self, *args, **options):
+        if options['arquivo'] and not os.path.exists(options['arquivo']):
+            raise CommandError(f'❌ Arquivo não encontrado: {options["arquivo"]}')
+
+        if options['manter_dados']:
+            self.stdout.write(self.style.WARNING('⚠️ As vendas importadas serão mantidas no banco'))
+        self.stdout.write(self.style.HTTP_INFO(f'🗄️ Banco: {connection.vendor} ({connection.settings_dict["NAME"]})'))
+
+        diretorio_temporario = tempfile.mkdtemp(prefix='benchmark_bi_')
+        resultados = []
+
+        try:
+            for arquivo in self._arquivos(options, diretorio_temporario):
+                for modo in options['modo']:
+                    resultados.append(self._medir(arquivo, modo, options))
+        finally:
+            shutil.rmtree(diretorio_temporario, ignore_errors=True)
+
+        self._relatorio(resultados)
+
+        if options['saida_json']:
+            with open(options['saida_json'], 'w', encoding='utf-8') as saida:
+                json.dump(resultados, saida, indent=2, ensure_ascii=False)
+            self.stdout.write(f'💾 Resultados gravados em {options["saida_json"]}')
+
+        self._verificar_limites(resultados, options)
+
+    # ===== ARQUIVOS =====
+
+    def _arquivos(self, options, diretorio):
+        if options['arquivo']:
+            yield options['arquivo']
+            return
+
+        for tamanho in options['linhas']:
+            try:
+                linhas = interpretar_tamanho(tamanho)
+            except ValueError:
+                raise CommandError(f'❌ Quantidade de linhas inválida: {tamanho}')
+
+            caminho = os.path.join(diretorio, f'bi_sintetico_{tamanho.lower()}.{options["formato"]}')
+            self.stdout.write(f'🧪 Gerando {linhas:,} linhas sintéticas...')
+            gerar_arquivo_bi(caminho, linhas)
+            yield caminho
+
+    # ===== MEDIÇÃO =====
+
+    def _medir(self, arquivo, modo, options):
+        self.stdout.write(self.style.HTTP_INFO(f'🚀 Importando {os.path.basename(arquivo)} (modo {modo})...'))
+        contador = ContadorConsultas()
+        resultado = {}
+
+        with MonitorMemoria() as memoria, connection.execute_wrapper(contador):
+            inicio = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    with LeitorBI(arquivo, tamanho_lote=options['tamanho_lote']) as leitor:
+                        resultado = executar_importacao_bi(
+                            leitor.lotes(), leitor.planilhas_aux, modo_carga=modo,
+                            total_estimado=leitor.total_linhas, substituicao=options['substituicao'],
+                        )
+                    if not options['manter_dados']:
+                        raise Desfazer()
+            except Desfazer:
+                pass
+            duracao = time.perf_counter() - inicio
+
+        total = resultado.get('total_registros', 0)
+        medicao = {
+            'arquivo': os.path.basename(arquivo),
+            'banco': connection.vendor,
+            'modo': resultado.get('modo_carga', modo),
+            'linhas': total,
+            'vendas_criadas': resultado.get('vendas_criadas', 0),
+            'erros': len(resultado.get('erros', [])),
+            'duracao_segundos': round(duracao, 2),
+            'registros_por_segundo': round(total / max(duracao, 0.001), 1),
+            'consultas': contador.total,
+            'consultas_por_mil': round(contador.total * 1000 / max(total, 1), 2),
+            'pico_rss_mb': round(memoria.pico, 1),
+        }
+
+        self.stdout.write(
+            f'   ⏱️ {medicao["duracao_segundos"]:.1f}s · {medicao["registros_por_segundo"]:,.0f} registros/s · '
+            f'{medicao["consultas"]:,} consultas · pico {medicao["pico_rss_mb"]:,.0f} MB'
+        )
+        return medicao
+
+    # ===== RESULTADO =====
+
+    def _relatorio(self, resultados):
+        self.stdout.write(self.style.SUCCESS('\n' + '=' * 90))
+        self.stdout.write(self.style.SUCCESS('📊 RELATÓRIO FINAL'))
+        self.stdout.write(self.style.SUCCESS('=' * 90))
+        self.stdout.write(
+            f'{"Arquivo":<28}{"Modo":<6}{"Linhas":>10}{"Erros":>7}{"Tempo (s)":>11}'
+            f'{"Reg/s":>10}{"Consultas":>11}{"Pico RSS":>11}'
+        )
+        for medicao in resultados:
+            self.stdout.write(
+                f'{medicao["arquivo"]:<28}{medicao["modo"]:<6}{medicao["linhas"]:>10,}{medicao["erros"]:>7,}'
+                f'{medicao["duracao_segundos"]:>11.1f}{medicao["registros_por_segundo"]:>10,.0f}'
+                f'{medicao["consultas"]:>11,}{medicao["pico_rss_mb"]:>8,.0f} MB'
+            )
+        self.stdout.write('=' * 90)
+
+    def _verificar_limites(self, resultados, options):
+        falhas = []
+        for medicao in resultados:
+            descricao = f'{medicao["arquivo"]} ({medicao["modo"]})'
+            minimo = options['min_registros_por_segundo']
+            if minimo and medicao['registros_por_segundo'] < minimo:
+                falhas.append(f'{descricao}: {medicao["registros_por_segundo"]:,.0f} registros/s < {minimo:,.0f}')
+            maximo = options['max_consultas_por_mil']
+            if maximo and medicao['consultas_por_mil'] > maximo:
+                falhas.append(f'{descricao}: {medicao["consultas_por_mil"]} consultas/1000 linhas > {maximo}')
+
+        if falhas:
+            raise CommandError('❌ Regressão de desempenho:\n   ' + '\n   '.join(falhas))
+        if options['min_registros_por_segundo'] or options['max_consultas_por_mil']:
+            self.stdout.write(self.style.SUCCESS('✅ Dentro dos limites configurados'))
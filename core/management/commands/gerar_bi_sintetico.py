@@ -0,0 +1,88 @@
+# core/management/commands/gerar_bi_sintetico.py
+
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.bi_sintetico import gerar_arquivo_bi, interpretar_tamanho
+
+
+class Command(BaseCommand):
+    help = 'Gera planilhas BI sintéticas (10k/100k/1M linhas) para testar e medir a importação'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--linhas',
+            type=str,
+            nargs='+',
+            default=['10k'],
+            help='Quantidade de linhas: 10k, 100k, 1m ou um número (aceita vários)'
+        )
+        parser.add_argument(
+            '--formato',
+            type=str,
+            choices=['xlsx', 'csv'],
+            default='xlsx',
+            help='xlsx (com planilhas PRODUTOS/CLASSE/FABR) ou csv (só a planilha BI)'
+        )
+        parser.add_argument(
+            '--destino',
+            type=str,
+            default='.',
+            help='Diretório onde os arquivos serão gravados (padrão: diretório atual)'
+        )
+        parser.add_argument(
+            '--meses',
+            type=int,
+            default=12,
+            help='Quantidade de meses (ANOMES) distribuídos no arquivo (padrão: 12)'
+        )
+        parser.add_argument(
+            '--ano-inicial',
+            type=int,
+            default=2024,
+            help='Ano do primeiro ANOMES (padrão: 2024)'
+        )
+        parser.add_argument(
+            '--percentual-invalidas',
+            type=float,
+            default=0.0,
+            help='Fração de linhas inválidas para exercitar o tratamento de erros (ex: 0.001)'
+        )
+        parser.add_argument(
+            '--semente',
+            type=int,
+            default=42,
+            help='Semente do gerador (mesma semente → mesmo arquivo)'
+        )
+
+    def handle(self, *args, **options):
+        destino = options['destino']
+        if not os.path.isdir(destino):
+            raise CommandError(f'❌ Diretório não encontrado: {destino}')
+
+        for tamanho in options['linhas']:
+            try:
+                linhas = interpretar_tamanho(tamanho)
+            except ValueError:
+                raise CommandError(f'❌ Quantidade de linhas inválida: {tamanho}')
+
+            caminho = os.path.join(destino, f'bi_sintetico_{tamanho.lower()}.{options["formato"]}')
+            self.stdout.write(self.style.HTTP_INFO(f'🧪 Gerando {linhas:,} linhas em {caminho}...'))
+
+            inicio = time.perf_counter()
+            gerador = gerar_arquivo_bi(
+                caminho, linhas,
+                meses=options['meses'],
+                ano_inicial=options['ano_inicial'],
+                percentual_invalidas=options['percentual_invalidas'],
+                semente=options['semente'],
+            )
+            duracao = time.perf_counter() - inicio
+
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ {caminho}: {os.path.getsize(caminho) / 1024 / 1024:.1f} MB em {duracao:.1f}s '
+                f'({gerador.clientes:,} clientes, {gerador.produtos:,} produtos, '
+                f'ANOMES {gerador.periodos[0]}–{gerador.periodos[-1]})'
+            ))
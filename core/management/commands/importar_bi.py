@@ -0,0 +1,119 @@
+# core/management/commands/importar_bi.py
+
+import os
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from core.services.importacao_bi import importar_arquivo_bi, MODOS_CARGA, SUBSTITUICOES
+from core.services.leitor_bi import LeitorBI, TAMANHO_LOTE_LEITURA
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Importa a planilha BI (SysFat) de vendas pela linha de comando'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--arquivo',
+            type=str,
+            required=True,
+            help='Caminho para o arquivo BI (.xlsx ou .csv)'
+        )
+        parser.add_argument(
+            '--modo',
+            type=str,
+            choices=[modo for modo, _ in MODOS_CARGA],
+            default='orm',
+            help='Modo de gravação das vendas: orm (bulk_create) ou copy (PostgreSQL COPY)'
+        )
+        parser.add_argument(
+            '--tamanho-lote',
+            type=int,
+            default=TAMANHO_LOTE_LEITURA,
+            help=f'Linhas lidas por lote (padrão: {TAMANHO_LOTE_LEITURA})'
+        )
+        parser.add_argument(
+            '--substituicao',
+            type=str,
+            choices=[opcao for opcao, _ in SUBSTITUICOES],
+            default='acrescentar',
+            help='periodos: substitui só os ANOMES do arquivo; tudo: zera a base; acrescentar: não remove nada'
+        )
+        parser.add_argument(
+            '--limpar',
+            action='store_true',
+            help='Atalho para --substituicao tudo'
+        )
+        parser.add_argument(
+            '--forcar',
+            action='store_true',
+            help='Reimportar mesmo que o arquivo (ou o mês) seja idêntico ao já carregado'
+        )
+
+    def handle(self, *args, **options):
+        arquivo = options['arquivo']
+        modo = options['modo']
+
+        if not os.path.exists(arquivo):
+            raise CommandError(f'❌ Arquivo não encontrado: {arquivo}')
+
+        self.stdout.write(self.style.HTTP_INFO(f'🚀 Importando {arquivo} (modo {modo})...'))
+
+        # Conferir o arquivo antes de importar (a importação reabre em streaming)
+        try:
+            with LeitorBI(arquivo, tamanho_lote=options['tamanho_lote']) as leitor:
+                if leitor.total_linhas is not None:
+                    self.stdout.write(f'📊 ~{leitor.total_linhas:,} registros no arquivo')
+                for nome_planilha, df_aux in leitor.planilhas_aux.items():
+                    self.stdout.write(f'✅ {nome_planilha.upper()}: {len(df_aux)} registros')
+        except ValueError as e:
+            raise CommandError(f'❌ {str(e)}')
+
+        substituicao = 'tudo' if options['limpar'] else options['substituicao']
+
+        try:
+            resultado = importar_arquivo_bi(
+                arquivo, modo_carga=modo, substituicao=substituicao, forcar=options['forcar'],
+                tamanho_lote=options['tamanho_lote'],
+            )
+        except Exception as e:
+            raise CommandError(f'❌ Erro durante importação: {str(e)}')
+
+        if resultado.get('arquivo_identico'):
+            self.stdout.write(self.style.WARNING(
+                f'⏭️ Arquivo idêntico à importação #{resultado["importacao_anterior"]} e sem alterações '
+                f'desde então - nada foi importado (use --forcar para reimportar)'
+            ))
+            return
+
+        # ===== RESULTADO =====
+        self.stdout.write(self.style.SUCCESS('\n' + '=' * 50))
+        self.stdout.write(self.style.SUCCESS('📊 RELATÓRIO FINAL'))
+        self.stdout.write(self.style.SUCCESS('=' * 50))
+        self.stdout.write(f'⚙️ Modo de carga: {resultado["modo_carga"]} (substituição: {substituicao})')
+        self.stdout.write(f'📋 Registros processados: {resultado["total_registros"]:,}')
+        self.stdout.write(self.style.SUCCESS(f'✅ Vendas importadas: {resultado["vendas_criadas"]:,}'))
+        if resultado['vendas_removidas']:
+            self.stdout.write(self.style.WARNING(
+                f'🗑️ Vendas substituídas: {resultado["vendas_removidas"]:,} '
+                f'(períodos: {", ".join(resultado["periodos"])})'
+            ))
+        if resultado['periodos_ignorados']:
+            self.stdout.write(
+                f'⏭️ Períodos sem alteração: {", ".join(resultado["periodos_ignorados"])} '
+                f'({resultado["registros_ignorados"]:,} linhas ignoradas)'
+            )
+        self.stdout.write(
+            f'📈 Novos: {resultado["clientes_criados"]} clientes, {resultado["produtos_criados"]} produtos, '
+            f'{resultado["grupos_criados"]} grupos, {resultado["fabricantes_criados"]} fabricantes, '
+            f'{resultado["lojas_criadas"]} lojas, {resultado["vendedores_criados"]} vendedores'
+        )
+        self.stdout.write(
+            f'⏱️ {resultado["duracao_segundos"]:.1f}s ({resultado["registros_por_segundo"]:,.0f} registros/s)'
+        )
+
+        if resultado['erros']:
+            self.stdout.write(self.style.WARNING(f'⚠️ {len(resultado["erros"])} linhas com erro'))
+            for erro in resultado['erros'][:10]:
+                self.stdout.write(self.style.ERROR(f'   {erro}'))
+
+        self.stdout.write('=' * 50)
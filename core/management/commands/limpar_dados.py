@@ -1,7 +1,7 @@
 # ===== ARQUIVO: gestor/management/commands/limpar_dados.py =====
 
 from django.core.management.base import BaseCommand
-from core.models import Vendas, GrupoProduto, Fabricante, Produto
+from core.models import Cliente, Vendas, GrupoProduto, Fabricante, Produto, ResumoVendasMensal, PeriodoImportado, VersaoDados
 
 class Command(BaseCommand):
     help = 'Limpa dados de vendas, grupos, fabricantes e produtos'
@@ -48,6 +48,10 @@ class Command(BaseCommand):
             # Excluir apenas vendas
             self.stdout.write('\n🗑️ Excluindo apenas VENDAS...')
             Vendas.objects.all().delete()
+            ResumoVendasMensal.objects.all().delete()
+            PeriodoImportado.objects.all().delete()
+            Cliente.atualizar_metricas()
+            VersaoDados.incrementar()
             self.stdout.write(self.style.SUCCESS(f'✅ {vendas_count} vendas excluídas'))
             self.stdout.write(self.style.SUCCESS('🎉 Vendas limpas! Produtos mantidos.'))
         else:
@@ -57,6 +61,10 @@ class Command(BaseCommand):
             if vendas_count > 0:
                 Vendas.objects.all().delete()
                 self.stdout.write(self.style.SUCCESS(f'✅ {vendas_count} vendas excluídas'))
+            ResumoVendasMensal.objects.all().delete()
+            PeriodoImportado.objects.all().delete()
+            Cliente.atualizar_metricas()
+            VersaoDados.incrementar()
             
             if produtos_count > 0:
                 Produto.objects.all().delete()
@@ -0,0 +1,79 @@
+# core/management/commands/normalizar_documentos.py
+
+import logging
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Cliente
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 5000
+
+
+class Command(BaseCommand):
+    help = 'Preenche o CPF/CNPJ normalizado (somente números) dos clientes e lista documentos repetidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Executar em modo teste (não faz alterações)'
+        )
+        parser.add_argument(
+            '--mostrar-detalhes',
+            action='store_true',
+            help='Listar todos os clientes com documento repetido'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('🧪 MODO TESTE - Nenhuma alteração será feita'))
+
+        # ===== CALCULAR ALTERAÇÕES =====
+        por_documento = defaultdict(list)
+        sem_documento = 0
+        atualizar = []   # clientes cujo documento normalizado está desatualizado
+        clientes = Cliente.objects.only('id', 'codigo', 'cpf_cnpj', 'cpf_cnpj_numerico').order_by('id')
+
+        for cliente in clientes.iterator(chunk_size=TAMANHO_LOTE):
+            documento = Cliente.normalizar_documento(cliente.cpf_cnpj)
+            if not documento:
+                sem_documento += 1
+            else:
+                por_documento[documento].append(cliente.codigo)
+
+            if cliente.cpf_cnpj_numerico != documento:
+                cliente.cpf_cnpj_numerico = documento
+                atualizar.append(cliente)
+
+        repetidos = {documento: codigos for documento, codigos in por_documento.items() if len(codigos) > 1}
+
+        # ===== GRAVAR =====
+        if not dry_run:
+            with transaction.atomic():
+                Cliente.objects.bulk_update(atualizar, ['cpf_cnpj_numerico'], batch_size=TAMANHO_LOTE)
+
+        # ===== RESULTADO =====
+        self.stdout.write(self.style.SUCCESS('\n' + '=' * 50))
+        self.stdout.write(self.style.SUCCESS('📊 RELATÓRIO FINAL'))
+        self.stdout.write(self.style.SUCCESS('=' * 50))
+        self.stdout.write(f'📋 Documentos distintos: {len(por_documento):,}')
+        self.stdout.write(f'⚪ Clientes sem documento: {sem_documento:,}')
+        self.stdout.write(self.style.SUCCESS(f'✅ Clientes atualizados: {len(atualizar):,}'))
+
+        if repetidos:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ {len(repetidos)} documentos repetidos (buscas exatas usam o cliente mais antigo):'
+            ))
+            itens = list(repetidos.items())
+            for documento, codigos in (itens if options['mostrar_detalhes'] else itens[:10]):
+                self.stdout.write(self.style.ERROR(f'   {documento}: {", ".join(codigos)}'))
+            if not options['mostrar_detalhes'] and len(itens) > 10:
+                self.stdout.write(f'   ... e mais {len(itens) - 10} (use --mostrar-detalhes)')
+
+        self.stdout.write('=' * 50)
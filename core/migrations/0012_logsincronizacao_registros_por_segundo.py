@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_alter_cliente_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logsincronizacao',
+            name='registros_por_segundo',
+            field=models.FloatField(blank=True, null=True, verbose_name='Registros por segundo'),
+        ),
+    ]
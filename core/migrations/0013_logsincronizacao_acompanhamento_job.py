@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_logsincronizacao_registros_por_segundo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logsincronizacao',
+            name='arquivo',
+            field=models.CharField(blank=True, max_length=500, null=True, verbose_name='Arquivo em processamento'),
+        ),
+        migrations.AddField(
+            model_name='logsincronizacao',
+            name='previsao_termino',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Previsão de término'),
+        ),
+        migrations.AddField(
+            model_name='logsincronizacao',
+            name='registros_total',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Total estimado de registros'),
+        ),
+        migrations.AddField(
+            model_name='logsincronizacao',
+            name='resultado',
+            field=models.JSONField(blank=True, null=True, verbose_name='Resultado detalhado'),
+        ),
+    ]
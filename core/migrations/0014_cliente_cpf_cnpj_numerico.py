@@ -0,0 +1,58 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:48
+
+import logging
+from collections import defaultdict
+
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+
+def preencher_cpf_cnpj_numerico(apps, schema_editor):
+    """
+    Preenche o documento normalizado dos clientes existentes.
+    O índice não é único (filiais e cadastros antigos repetem documento): todos os
+    clientes recebem o documento e os que repetem o de outro cliente são listados no log.
+    """
+    Cliente = apps.get_model('core', 'Cliente')
+
+    por_documento = defaultdict(list)
+    atualizar = []
+    for cliente in Cliente.objects.only('id', 'codigo', 'cpf_cnpj').order_by('id').iterator(chunk_size=5000):
+        documento = ''.join(filter(str.isdigit, cliente.cpf_cnpj or '')) or None
+        if not documento:
+            continue
+        por_documento[documento].append(cliente.codigo)
+        cliente.cpf_cnpj_numerico = documento
+        atualizar.append(cliente)
+
+        if len(atualizar) >= 5000:
+            Cliente.objects.bulk_update(atualizar, ['cpf_cnpj_numerico'])
+            atualizar = []
+
+    if atualizar:
+        Cliente.objects.bulk_update(atualizar, ['cpf_cnpj_numerico'])
+
+    repetidos = [codigo for codigos in por_documento.values() if len(codigos) > 1 for codigo in codigos]
+    if repetidos:
+        logger.warning(
+            f"⚠️ {len(repetidos)} cliente(s) com CPF/CNPJ repetido (buscas exatas usam o mais antigo): "
+            f"{', '.join(repetidos[:50])}{' ...' if len(repetidos) > 50 else ''} "
+            f"(ver normalizar_documentos --mostrar-detalhes)"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_logsincronizacao_acompanhamento_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='cpf_cnpj_numerico',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Preenchido automaticamente a partir do CPF/CNPJ; usado nas buscas exatas e por prefixo', max_length=20, null=True, verbose_name='CPF/CNPJ (somente números)'),
+        ),
+        migrations.RunPython(preencher_cpf_cnpj_numerico, migrations.RunPython.noop),
+    ]
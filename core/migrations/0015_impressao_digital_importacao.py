@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_cliente_cpf_cnpj_numerico'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logsincronizacao',
+            name='md5_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=32, null=True, verbose_name='MD5 do arquivo importado'),
+        ),
+        migrations.CreateModel(
+            name='PeriodoImportado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anomes', models.CharField(help_text='Formato: YYYYMM', max_length=6, unique=True, verbose_name='Ano/Mês')),
+                ('md5_hash', models.CharField(max_length=32, verbose_name='MD5 das linhas do período')),
+                ('registros', models.IntegerField(default=0, verbose_name='Linhas no arquivo')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Data de Atualização')),
+                ('log_sincronizacao', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.logsincronizacao', verbose_name='Importação')),
+            ],
+            options={
+                'verbose_name': 'Período Importado',
+                'verbose_name_plural': 'Períodos Importados',
+                'db_table': 'periodos_importados',
+                'ordering': ['-anomes'],
+            },
+        ),
+    ]
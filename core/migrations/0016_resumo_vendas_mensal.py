@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def preencher_resumo(apps, schema_editor):
+    """Monta o resumo mensal a partir das vendas já existentes"""
+    schema_editor.execute("""
+        INSERT INTO resumo_vendas_mensal (cliente_id, anomes, loja_id, vendedor_nf, grupo_produto_id,
+                                          fabricante_id, produto_id, quantidade, valor_total, quantidade_linhas)
+        SELECT cliente_id, anomes, loja_id, vendedor_nf, grupo_produto_id, fabricante_id, produto_id,
+               SUM(quantidade), SUM(valor_total), COUNT(*)
+        FROM vendas
+        GROUP BY cliente_id, anomes, loja_id, vendedor_nf, grupo_produto_id, fabricante_id, produto_id
+    """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_impressao_digital_importacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoVendasMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anomes', models.CharField(help_text='Formato: YYYYMM', max_length=6, verbose_name='Ano/Mês')),
+                ('vendedor_nf', models.CharField(blank=True, max_length=3, null=True, verbose_name='Vendedor da NF')),
+                ('quantidade', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Quantidade')),
+                ('valor_total', models.DecimalField(decimal_places=2, max_digits=16, verbose_name='Valor Total')),
+                ('quantidade_linhas', models.IntegerField(verbose_name='Linhas de venda')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_vendas', to='core.cliente', verbose_name='Cliente')),
+                ('fabricante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.fabricante', verbose_name='Fabricante')),
+                ('grupo_produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.grupoproduto', verbose_name='Grupo de Produto')),
+                ('loja', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.loja', verbose_name='Loja')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.produto', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Resumo Mensal de Vendas',
+                'verbose_name_plural': 'Resumos Mensais de Vendas',
+                'db_table': 'resumo_vendas_mensal',
+                'indexes': [models.Index(fields=['anomes', 'cliente'], name='resumo_vend_anomes_0bbcdc_idx'), models.Index(fields=['cliente', 'anomes'], name='resumo_vend_cliente_961671_idx')],
+            },
+        ),
+        migrations.RunPython(preencher_resumo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_versao_dados'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='logsincronizacao',
+            name='tipo',
+            field=models.CharField(choices=[('bi', 'BI SysFat'), ('receita', 'Receita Federal'), ('chatwoot', 'ChatWoot'), ('exportacao', 'Exportação Excel')], max_length=20),
+        ),
+    ]
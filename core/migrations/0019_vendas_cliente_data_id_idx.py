@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_log_sincronizacao_exportacao'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='vendas',
+            name='vendas_cliente_dd456a_idx',
+        ),
+        migrations.AddIndex(
+            model_name='vendas',
+            index=models.Index(fields=['cliente', 'data_venda', 'id'], name='idx_vendas_cliente_data_id'),
+        ),
+    ]
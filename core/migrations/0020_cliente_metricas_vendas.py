@@ -0,0 +1,47 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_vendas_cliente_data_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='faturamento_30d',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Faturamento 30 dias'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='faturamento_365d',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Faturamento 365 dias'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='faturamento_90d',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Faturamento 90 dias'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='faturamento_total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Faturamento Total'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='metricas_atualizadas_em',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Métricas Atualizadas em'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='quantidade_vendas',
+            field=models.IntegerField(default=0, help_text='Linhas de venda registradas para o cliente', verbose_name='Quantidade de Vendas'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['-faturamento_365d'], name='idx_cliente_faturamento_365d'),
+        ),
+    ]
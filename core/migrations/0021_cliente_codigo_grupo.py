@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:45
+
+from django.db import migrations, models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, NullIf
+
+
+def preencher_codigo_grupo(apps, schema_editor):
+    """Grupo dos clientes existentes: o codigo_master, ou o próprio código (um único UPDATE)"""
+    Cliente = apps.get_model('core', 'Cliente')
+    Cliente.objects.update(codigo_grupo=Coalesce(NullIf(F('codigo_master'), Value('')), F('codigo')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_cliente_metricas_vendas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='codigo_grupo',
+            field=models.CharField(blank=True, editable=False, help_text='Preenchido automaticamente: o código master, ou o próprio código nos clientes principais', max_length=20, null=True, verbose_name='Código do Grupo'),
+        ),
+        migrations.RunPython(preencher_codigo_grupo, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['codigo_grupo', 'id'], name='idx_cliente_grupo'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:48
+
+import logging
+import unicodedata
+
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+
+def texto_busca(*textos):
+    """Mesma normalização de Cliente.texto_busca (minúsculas, sem acentos)"""
+    texto = unicodedata.normalize('NFKD', ' '.join(filter(None, textos)))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())
+
+
+def preencher_nome_busca(apps, schema_editor):
+    """Preenche o texto de busca dos clientes existentes"""
+    Cliente = apps.get_model('core', 'Cliente')
+
+    atualizar = []
+    campos = ('id', 'codigo', 'nome', 'nome_fantasia', 'nome_razao_social')
+    for cliente in Cliente.objects.only(*campos).order_by('id').iterator(chunk_size=5000):
+        cliente.nome_busca = texto_busca(cliente.codigo, cliente.nome, cliente.nome_fantasia, cliente.nome_razao_social)
+        atualizar.append(cliente)
+
+        if len(atualizar) >= 5000:
+            Cliente.objects.bulk_update(atualizar, ['nome_busca'])
+            atualizar = []
+
+    if atualizar:
+        Cliente.objects.bulk_update(atualizar, ['nome_busca'])
+
+
+def pg_trgm_disponivel(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm')")
+        return cursor.fetchone()[0]
+
+
+class IndiceTrigram(migrations.RunSQL):
+    """
+    RunSQL do índice GIN (gin_trgm_ops) em nome_busca, aplicado só no PostgreSQL com
+    pg_trgm disponível (sqlmigrate mostra o SQL). Sem a extensão a busca continua
+    funcionando, sem semelhança (ver core.services.busca_clientes).
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        # collect_sql: sqlmigrate lista o SQL sem consultar o servidor
+        if schema_editor.collect_sql or pg_trgm_disponivel(schema_editor):
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            logger.warning("⚠️ Extensão pg_trgm indisponível no servidor: índice trigrama de clientes não criado")
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_cliente_codigo_grupo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='nome_busca',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Preenchido automaticamente: código e nomes em minúsculas, sem acentos (índice trigrama no PostgreSQL)', verbose_name='Texto de busca'),
+        ),
+        migrations.RunPython(preencher_nome_busca, migrations.RunPython.noop),
+        IndiceTrigram(
+            sql=[
+                "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+                "CREATE INDEX IF NOT EXISTS idx_cliente_nome_busca_trgm ON clientes USING gin (nome_busca gin_trgm_ops)",
+            ],
+            reverse_sql=["DROP INDEX IF EXISTS idx_cliente_nome_busca_trgm"],
+        ),
+    ]
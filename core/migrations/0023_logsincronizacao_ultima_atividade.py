@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_cliente_nome_busca'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logsincronizacao',
+            name='ultima_atividade',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Última atividade'),
+        ),
+    ]
@@ -1,7 +1,9 @@
 # core/models.py
 
 import logging
-from django.db import models
+import unicodedata
+from datetime import timedelta
+from django.db import connection, models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 from django.conf import settings
@@ -101,6 +103,30 @@ class Vendedor(models.Model):
     def __str__(self):
         return f"{self.codigo} - {self.nome}"
     
+    @classmethod
+    def nomes_por_codigo(cls, codigos):
+        """
+        Nomes de vários vendedores ativos de uma vez: {codigo informado: nome} ('' se
+        não houver vendedor ativo). Usa as mesmas chaves de cache das properties
+        (vendedor_nome_XXX) num único cache.get_many; os que faltam saem de uma
+        única consulta e voltam ao cache.
+        """
+        formatados = {codigo: str(codigo).zfill(3) for codigo in set(codigos) if codigo}
+        chaves = {f'vendedor_nome_{codigo}': codigo for codigo in set(formatados.values())}
+        
+        nomes = {chaves[chave]: nome for chave, nome in cache.get_many(list(chaves)).items()}
+        faltantes = set(chaves.values()) - nomes.keys()
+        if faltantes:
+            encontrados = dict(cls.objects.filter(codigo__in=faltantes, ativo=True).values_list('codigo', 'nome'))
+            ausentes = faltantes - encontrados.keys()
+            # Mesmos tempos das properties: 5 minutos, e 1 minuto para resultado negativo
+            cache.set_many({f'vendedor_nome_{codigo}': nome for codigo, nome in encontrados.items()}, 300)
+            cache.set_many({f'vendedor_nome_{codigo}': '' for codigo in ausentes}, 60)
+            nomes.update(encontrados)
+            nomes.update(dict.fromkeys(ausentes, ''))
+        
+        return {codigo: nomes[formatado] for codigo, formatado in formatados.items()}
+    
     class Meta:
         db_table = 'vendedores'
         verbose_name = 'Vendedor'
@@ -153,6 +179,9 @@ class Produto(models.Model):
 
 # ===== MODELO CLIENTE ATUALIZADO =====
 class Cliente(models.Model):
+    # Janelas (em dias) do faturamento recente desnormalizado
+    JANELAS_METRICAS = (30, 90, 365)
+
     # Choices para Situação Cadastral da Receita Federal
     SITUACAO_CADASTRAL_CHOICES = [
         ('01', 'Nula'),
@@ -178,6 +207,9 @@ class Cliente(models.Model):
     codigo = models.CharField(max_length=20, unique=True, verbose_name="Código")
     codigo_master = models.CharField(max_length=20, blank=True, null=True, verbose_name="Código Master",
                                     help_text="Se preenchido, indica que este é um sub-cliente")
+    codigo_grupo = models.CharField(max_length=20, blank=True, null=True, editable=False,
+                                    verbose_name="Código do Grupo",
+                                    help_text="Preenchido automaticamente: o código master, ou o próprio código nos clientes principais")
     nome = models.CharField(max_length=100, verbose_name="Nome")
     nome_fantasia = models.CharField(max_length=200, blank=True, null=True, verbose_name="Nome Fantasia")
     
@@ -222,6 +254,12 @@ class Cliente(models.Model):
     
     # ===== DADOS FISCAIS =====
     cpf_cnpj = models.CharField(max_length=20, blank=True, null=True, verbose_name="CPF/CNPJ")
+    # Não é único: filiais e cadastros antigos repetem documento (o cadastro pela tela recusa repetidos)
+    cpf_cnpj_numerico = models.CharField(
+        max_length=20, blank=True, null=True, db_index=True, editable=False,
+        verbose_name="CPF/CNPJ (somente números)",
+        help_text="Preenchido automaticamente a partir do CPF/CNPJ; usado nas buscas exatas e por prefixo"
+    )
     tipo_documento = models.CharField(
         max_length=10, 
         choices=[('cpf', 'CPF'), ('cnpj', 'CNPJ')],
@@ -230,6 +268,11 @@ class Cliente(models.Model):
         verbose_name="Tipo de Documento"
     )
     nome_razao_social = models.CharField(max_length=200, blank=True, null=True, verbose_name="Nome/Razão Social")
+    nome_busca = models.TextField(
+        blank=True, default='', editable=False,
+        verbose_name="Texto de busca",
+        help_text="Preenchido automaticamente: código e nomes em minúsculas, sem acentos (índice trigrama no PostgreSQL)"
+    )
     
     # ===== DADOS DA RECEITA FEDERAL =====
     inscricao_estadual = models.CharField(max_length=30, blank=True, null=True, verbose_name="Inscrição Estadual")
@@ -267,46 +310,27 @@ class Cliente(models.Model):
     ddd_fax = models.CharField(max_length=20, blank=True, null=True, verbose_name="Fax")
     email_receita = models.EmailField(blank=True, null=True, verbose_name="Email Cadastrado na Receita")
 
+    # ===== MÉTRICAS DE VENDAS (DESNORMALIZADAS, VER atualizar_metricas) =====
+    faturamento_30d = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Faturamento 30 dias")
+    faturamento_90d = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Faturamento 90 dias")
+    faturamento_365d = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Faturamento 365 dias")
+    faturamento_total = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Faturamento Total")
+    quantidade_vendas = models.IntegerField(default=0, verbose_name="Quantidade de Vendas",
+                                            help_text="Linhas de venda registradas para o cliente")
+    metricas_atualizadas_em = models.DateTimeField(blank=True, null=True, verbose_name="Métricas Atualizadas em")
+
     # ===== PROPERTIES E MÉTODOS =====
     
     @property
     def nome_vendedor(self):
         """
         Property que busca o nome do vendedor automaticamente
-        Usa cache para otimizar performance
+        Usa cache para otimizar performance (para vários clientes, prefira
+        Vendedor.nomes_por_codigo, que resolve todos de uma vez)
         """
         if not self.codigo_vendedor:
             return ''
-        
-        # Normalizar código para 3 dígitos
-        codigo_formatado = str(self.codigo_vendedor).zfill(3)
-        
-        # Chave do cache
-        cache_key = f'vendedor_nome_{codigo_formatado}'
-        
-        # Tentar buscar no cache primeiro
-        nome_cached = cache.get(cache_key)
-        if nome_cached is not None:
-            return nome_cached
-        
-        try:
-            # Importar aqui para evitar importação circular
-            from core.models import Vendedor
-            vendedor = Vendedor.objects.select_related('loja').get(
-                codigo=codigo_formatado, 
-                ativo=True
-            )
-            nome = vendedor.nome
-            
-            # Cachear por 5 minutos
-            cache.set(cache_key, nome, 300)
-            
-            return nome
-            
-        except Exception:  # Pode ser Vendedor.DoesNotExist ou ImportError
-            # Cachear resultado negativo por 1 minuto
-            cache.set(cache_key, '', 60)
-            return ''
+        return Vendedor.nomes_por_codigo([self.codigo_vendedor])[self.codigo_vendedor]
     
     @property
     def vendedor_completo(self):
@@ -391,9 +415,124 @@ class Cliente(models.Model):
     def get_sub_clientes(self):
         """Retorna todos os sub-clientes deste cliente principal"""
         if self.is_cliente_principal():
-            return Cliente.objects.filter(codigo_master=self.codigo).order_by('nome')
+            return Cliente.objects.filter(codigo_grupo=self.codigo).exclude(pk=self.pk).order_by('nome')
         return Cliente.objects.none()
     
+    @staticmethod
+    def calcular_codigo_grupo(codigo, codigo_master):
+        """Código do grupo de coligados: o codigo_master, ou o próprio código nos clientes principais"""
+        return codigo_master or codigo
+    
+    @staticmethod
+    def expressao_codigo_grupo(prefixo=''):
+        """
+        Código do grupo de coligados (campo codigo_grupo, mantido no save).
+        `prefixo` permite usar a partir de outro modelo, ex.: 'cliente__' em Vendas.
+        """
+        return models.F(f'{prefixo}codigo_grupo')
+    
+    @classmethod
+    def filtro_grupo(cls, codigo, prefixo=''):
+        """
+        Filtro do cliente e de seus sub-clientes pelo índice (codigo_grupo, id).
+        Para um sub-cliente casa só ele mesmo.
+        Com `prefixo` (ex.: 'cliente__' em Vendas) vira cliente_id IN (ids do grupo),
+        uma subconsulta no índice do grupo, sem join com a tabela de clientes.
+        """
+        grupo = models.Q(codigo_grupo=codigo) | models.Q(codigo=codigo)
+        if not prefixo:
+            return grupo
+        return models.Q(**{f'{prefixo}in': cls.objects.filter(grupo).values('id')})
+    
+    @classmethod
+    def atualizar_metricas(cls, clientes=None, hoje=None):
+        """
+        Recalcula as métricas de vendas desnormalizadas (última compra, faturamento de
+        30/90/365 dias e total, quantidade de vendas) com um UPDATE ... FROM (agregado):
+        - total e quantidade vêm do resumo mensal;
+        - as janelas recentes vêm das vendas do último ano (índice de data_venda);
+        - a última compra é o MAX(data_venda) do cliente (índice cliente, data_venda).
+        Clientes que ficaram sem vendas voltam a zero (a última compra é mantida);
+        clientes já zerados não são regravados.
+        Só os `clientes` (ids) informados, ou todos. Retorna os clientes atualizados.
+        """
+        hoje = hoje or timezone.localdate()
+        filtro, filtro_clientes, parametros_filtro = '', '', []
+        if clientes is not None:
+            clientes = sorted({cliente for cliente in clientes if cliente})
+            if not clientes:
+                return 0
+            marcadores = ', '.join(['%s'] * len(clientes))
+            filtro = f"AND cliente_id IN ({marcadores})"
+            filtro_clientes = f"AND id IN ({marcadores})"
+            parametros_filtro = clientes
+
+        # Uma soma condicional por janela, todas na mesma passada pelas vendas do último ano
+        somas_janelas = ', '.join(
+            f"SUM(CASE WHEN data_venda >= %s THEN valor_total ELSE 0 END) AS valor_{dias}d"
+            for dias in cls.JANELAS_METRICAS
+        )
+        campos_janelas = ', '.join(
+            f"faturamento_{dias}d = COALESCE(recentes.valor_{dias}d, 0)" for dias in cls.JANELAS_METRICAS
+        )
+        zerar_janelas = ', '.join(f"faturamento_{dias}d = 0" for dias in cls.JANELAS_METRICAS)
+        inicio_janelas = [hoje - timedelta(days=dias) for dias in cls.JANELAS_METRICAS]
+        agora = timezone.now()
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE {cls._meta.db_table} SET
+                    faturamento_total = totais.valor,
+                    quantidade_vendas = totais.linhas,
+                    {campos_janelas},
+                    data_ultima_compra = (
+                        SELECT MAX(v.data_venda) FROM {Vendas._meta.db_table} v
+                        WHERE v.cliente_id = {cls._meta.db_table}.id
+                    ),
+                    metricas_atualizadas_em = %s
+                FROM (
+                    SELECT cliente_id, SUM(valor_total) AS valor, SUM(quantidade_linhas) AS linhas
+                    FROM {ResumoVendasMensal._meta.db_table}
+                    WHERE 1 = 1 {filtro}
+                    GROUP BY cliente_id
+                ) AS totais
+                LEFT JOIN (
+                    SELECT cliente_id, {somas_janelas}
+                    FROM {Vendas._meta.db_table}
+                    WHERE data_venda >= %s AND data_venda <= %s {filtro}
+                    GROUP BY cliente_id
+                ) AS recentes ON recentes.cliente_id = totais.cliente_id
+                WHERE {cls._meta.db_table}.id = totais.cliente_id
+            """, [agora, *parametros_filtro, *inicio_janelas, min(inicio_janelas), hoje, *parametros_filtro])
+            atualizados = cursor.rowcount
+
+            cursor.execute(f"""
+                UPDATE {cls._meta.db_table} SET
+                    faturamento_total = 0, quantidade_vendas = 0, {zerar_janelas},
+                    metricas_atualizadas_em = %s
+                WHERE (quantidade_vendas <> 0 OR faturamento_total <> 0 OR faturamento_365d <> 0)
+                  {filtro_clientes}
+                  AND NOT EXISTS (
+                      SELECT 1 FROM {ResumoVendasMensal._meta.db_table} r
+                      WHERE r.cliente_id = {cls._meta.db_table}.id
+                  )
+            """, [agora, *parametros_filtro])
+            return atualizados + cursor.rowcount
+    
+    @classmethod
+    def clientes_com_janelas_vencidas(cls, hoje=None):
+        """
+        Ids dos clientes com faturamento em alguma janela (30/90/365 dias) e métricas
+        calculadas antes de `hoje`: as janelas andam com o calendário mesmo sem vendas novas
+        """
+        hoje = hoje or timezone.localdate()
+        sem_janelas = {f'faturamento_{dias}d': 0 for dias in cls.JANELAS_METRICAS}
+        return set(
+            cls.objects.exclude(**sem_janelas).filter(
+                models.Q(metricas_atualizadas_em__isnull=True) | models.Q(metricas_atualizadas_em__date__lt=hoje)
+            ).values_list('id', flat=True)
+        )
+    
     @property
     def ativo(self):
         """Propriedade para compatibilidade - retorna True se status for 'ativo'"""
@@ -451,8 +590,39 @@ class Cliente(models.Model):
         if self.codigo_vendedor:
             self.codigo_vendedor = str(self.codigo_vendedor).zfill(3)
         
+        # Documento só com dígitos (chave das buscas exatas por CPF/CNPJ)
+        self.cpf_cnpj_numerico = self.normalizar_documento(self.cpf_cnpj)
+        
+        # Grupo de coligados (buscas do cliente + sub-clientes num único índice)
+        self.codigo_grupo = self.calcular_codigo_grupo(self.codigo, self.codigo_master)
+        
+        # Texto normalizado da busca por nome (ver core.services.busca_clientes)
+        self.nome_busca = self.texto_busca(self.codigo, self.nome, self.nome_fantasia, self.nome_razao_social)
+        
         super().save(*args, **kwargs)
     
+    @staticmethod
+    def normalizar_documento(cpf_cnpj):
+        """CPF/CNPJ em qualquer formato → somente dígitos (None se vazio)"""
+        digitos = ''.join(filter(str.isdigit, cpf_cnpj or ''))
+        return digitos or None
+    
+    @staticmethod
+    def texto_busca(*textos):
+        """Textos unidos em minúsculas, sem acentos e com espaços simples ('' se vazios)"""
+        texto = unicodedata.normalize('NFKD', ' '.join(filter(None, textos)))
+        texto = ''.join(c for c in texto if not unicodedata.combining(c))
+        return ' '.join(texto.lower().split())
+    
+    @classmethod
+    def buscar_por_documento(cls, cpf_cnpj):
+        """Busca exata pelo CPF/CNPJ normalizado (aceita o documento formatado)"""
+        documento = cls.normalizar_documento(cpf_cnpj)
+        if not documento:
+            return None
+        # Documento repetido: fica com o cliente mais antigo
+        return cls.objects.filter(cpf_cnpj_numerico=documento).order_by('id').first()
+    
     @classmethod 
     def limpar_cache_vendedores(cls):
         """
@@ -487,6 +657,12 @@ class Cliente(models.Model):
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ["nome"]
+        indexes = [
+            # Grupo de coligados (master + sub-clientes): ids do grupo direto do índice
+            models.Index(fields=['codigo_grupo', 'id'], name='idx_cliente_grupo'),
+            # Ordenação da lista de clientes por faturamento
+            models.Index(fields=['-faturamento_365d'], name='idx_cliente_faturamento_365d'),
+        ]
 
 
 # ===== SINAIS PARA LIMPAR CACHE QUANDO VENDEDOR É ALTERADO =====
@@ -616,6 +792,7 @@ class LogSincronizacao(models.Model):
         ('bi', 'BI SysFat'),
         ('receita', 'Receita Federal'),
         ('chatwoot', 'ChatWoot'),
+        ('exportacao', 'Exportação Excel'),
     ]
     
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
@@ -625,13 +802,51 @@ class LogSincronizacao(models.Model):
     registros_criados = models.IntegerField(default=0)
     registros_atualizados = models.IntegerField(default=0)
     registros_com_erro = models.IntegerField(default=0)
+    registros_por_segundo = models.FloatField(blank=True, null=True, verbose_name="Registros por segundo")
     status = models.CharField(max_length=20, default='iniciado')
     mensagem = models.TextField(blank=True, null=True)
     usuario = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, blank=True)
     
+    # ===== ACOMPANHAMENTO DE JOBS EM SEGUNDO PLANO =====
+    registros_total = models.IntegerField(blank=True, null=True, verbose_name="Total estimado de registros")
+    previsao_termino = models.DateTimeField(blank=True, null=True, verbose_name="Previsão de término")
+    arquivo = models.CharField(max_length=500, blank=True, null=True, verbose_name="Arquivo em processamento")
+    resultado = models.JSONField(blank=True, null=True, verbose_name="Resultado detalhado")
+    md5_hash = models.CharField(max_length=32, blank=True, null=True, db_index=True,
+                                verbose_name="MD5 do arquivo importado")
+    # Batimento do job: gravado a cada atualização de progresso (ver encerrar_jobs_abandonados)
+    ultima_atividade = models.DateTimeField(blank=True, null=True, verbose_name="Última atividade")
+    
+    STATUS_FINALIZADOS = ('concluido', 'concluido_com_erros', 'erro')
+    
+    # Opções da importação BI (tela, management commands e core.services.importacao_bi).
+    # Ficam no modelo para o formulário não precisar importar o serviço (pandas)
+    SUBSTITUICAO_CHOICES = [
+        ('periodos', 'Substituir apenas os meses (ANOMES) presentes no arquivo'),
+        ('tudo', 'Zerar toda a base de vendas antes de importar'),
+        ('acrescentar', 'Apenas acrescentar (não remove nada)'),
+    ]
+    MODO_CARGA_CHOICES = [
+        ('orm', 'Lotes via ORM (bulk_create)'),
+        ('copy', 'COPY PostgreSQL (mais rápido)'),
+    ]
+    
     def __str__(self):
         return f"{self.get_tipo_display()} - {self.data_inicio}"
     
+    @property
+    def finalizado(self):
+        return self.status in self.STATUS_FINALIZADOS
+    
+    @property
+    def percentual_concluido(self):
+        """Percentual processado (None quando o total não é conhecido)"""
+        if self.status in ('concluido', 'concluido_com_erros'):
+            return 100
+        if not self.registros_total:
+            return None
+        return min(round(self.registros_processados * 100 / self.registros_total), 99)
+    
     class Meta:
         db_table = 'log_sincronizacao'
         verbose_name = "Log de Sincronização"
@@ -639,6 +854,76 @@ class LogSincronizacao(models.Model):
         ordering = ["-data_inicio"]
 
 
+# ===== IMPRESSÃO DIGITAL DOS PERÍODOS IMPORTADOS =====
+class PeriodoImportado(models.Model):
+    """
+    MD5 das linhas de cada ANOMES na última importação BI que carregou o mês.
+    Permite pular um arquivo idêntico ou só os meses que não mudaram
+    (ver core.services.impressao_digital_bi).
+    """
+    anomes = models.CharField(max_length=6, unique=True, verbose_name="Ano/Mês",
+                              help_text="Formato: YYYYMM")
+    md5_hash = models.CharField(max_length=32, verbose_name="MD5 das linhas do período")
+    registros = models.IntegerField(default=0, verbose_name="Linhas no arquivo")
+    log_sincronizacao = models.ForeignKey(LogSincronizacao, on_delete=models.SET_NULL, null=True, blank=True,
+                                          verbose_name="Importação")
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Data de Atualização")
+
+    @classmethod
+    def invalidar(cls, *periodos):
+        """Esquece a impressão digital dos meses alterados fora da importação"""
+        periodos = [periodo for periodo in periodos if periodo]
+        if periodos:
+            cls.objects.filter(anomes__in=periodos).delete()
+
+    def __str__(self):
+        return f"{self.anomes} - {self.md5_hash}"
+
+    class Meta:
+        db_table = 'periodos_importados'
+        verbose_name = "Período Importado"
+        verbose_name_plural = "Períodos Importados"
+        ordering = ["-anomes"]
+
+
+# ===== VERSÃO DOS DADOS (INVALIDAÇÃO DE CACHE) =====
+class VersaoDados(models.Model):
+    """
+    Contador incrementado a cada alteração das vendas (importação, cadastro manual,
+    atualização de vendedores). Fica no banco para valer entre processos (web,
+    worker Celery, comandos); os caches de relatórios usam a versão na chave.
+    """
+    VENDAS = 'vendas'
+
+    nome = models.CharField(max_length=50, unique=True, verbose_name="Nome")
+    versao = models.PositiveBigIntegerField(default=0, verbose_name="Versão")
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Data de Atualização")
+
+    @classmethod
+    def atual(cls, nome=VENDAS):
+        """Versão atual (0 se os dados nunca foram alterados)"""
+        return cls.objects.filter(nome=nome).values_list('versao', flat=True).first() or 0
+
+    @classmethod
+    def incrementar(cls, nome=VENDAS):
+        """Invalida os caches que dependem dos dados (UPDATE atômico, seguro entre processos)"""
+        atualizados = cls.objects.filter(nome=nome).update(
+            versao=models.F('versao') + 1, data_atualizacao=timezone.now()
+        )
+        if not atualizados:
+            _, criado = cls.objects.get_or_create(nome=nome, defaults={'versao': 1})
+            if not criado:
+                cls.objects.filter(nome=nome).update(versao=models.F('versao') + 1)
+
+    def __str__(self):
+        return f"{self.nome} v{self.versao}"
+
+    class Meta:
+        db_table = 'versao_dados'
+        verbose_name = "Versão dos Dados"
+        verbose_name_plural = "Versões dos Dados"
+
+
 # ===== MODELO VENDAS ATUALIZADO =====
 class Vendas(models.Model):
     # ===== RELACIONAMENTOS =====
@@ -682,25 +967,10 @@ class Vendas(models.Model):
     
     @property
     def vendedor_nf_nome(self):
-        """Nome do vendedor que fez a venda (histórico da NF)"""
+        """Nome do vendedor que fez a venda (histórico da NF); para várias vendas use Vendedor.nomes_por_codigo"""
         if not self.vendedor_nf:
             return ''
-        
-        codigo_formatado = str(self.vendedor_nf).zfill(3)
-        cache_key = f'vendedor_nome_{codigo_formatado}'
-        
-        nome_cached = cache.get(cache_key)
-        if nome_cached is not None:
-            return nome_cached
-        
-        try:
-            vendedor = Vendedor.objects.get(codigo=codigo_formatado, ativo=True)
-            nome = vendedor.nome
-            cache.set(cache_key, nome, 300)
-            return nome
-        except Vendedor.DoesNotExist:
-            cache.set(cache_key, '', 60)
-            return ''
+        return Vendedor.nomes_por_codigo([self.vendedor_nf])[self.vendedor_nf]
     
     @property
     def vendedor_nf_obj(self):
@@ -766,15 +1036,22 @@ class Vendas(models.Model):
         """Property para compatibilidade - retorna nome do vendedor da NF"""
         return self.vendedor_nf_nome
     
-    def save(self, *args, **kwargs):
-        # Calcular campos derivados automaticamente
+    def preencher_campos_periodo(self):
+        """
+        Calcula ano/mes/anomes a partir da data da venda
+        (usado também pelo bulk_create da importação, que não chama save)
+        """
         if self.data_venda:
             self.ano = str(self.data_venda.year)
             self.mes = str(self.data_venda.month).zfill(2)
             self.anomes = f"{self.ano}{self.mes}"
-        
+
+    def save(self, *args, **kwargs):
+        # Calcular campos derivados automaticamente
+        self.preencher_campos_periodo()
+        # Resumo mensal, métricas e caches: ver core.services.edicao_vendas
         super().save(*args, **kwargs)
-    
+
     def __str__(self):
         return f"Venda {self.numero_nf or 'S/N'} - {self.data_venda} - {self.cliente.nome}"
     
@@ -786,8 +1063,82 @@ class Vendas(models.Model):
         indexes = [
             models.Index(fields=['loja', 'cliente']),
             models.Index(fields=['vendedor_nf']),  # Index para vendedor histórico
-            models.Index(fields=['cliente', 'data_venda']),
+            # (data_venda, id) desempata a paginação por cursor das vendas do cliente
+            models.Index(fields=['cliente', 'data_venda', 'id'], name='idx_vendas_cliente_data_id'),
             models.Index(fields=['data_venda']),
             models.Index(fields=['anomes']),
             models.Index(fields=['ano', 'mes']),
         ]
+
+
+# ===== RESUMO MENSAL DE VENDAS (TABELA FATO AGREGADA) =====
+class ResumoVendasMensal(models.Model):
+    """
+    Vendas somadas por (cliente, anomes, loja, vendedor_nf, grupo, fabricante, produto).
+    Os relatórios leem daqui em vez de varrer a tabela de vendas; o resumo é
+    recalculado por ANOMES após cada importação e a cada venda alterada à mão.
+    """
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='resumos_vendas', verbose_name="Cliente")
+    anomes = models.CharField(max_length=6, verbose_name="Ano/Mês", help_text="Formato: YYYYMM")
+    loja = models.ForeignKey(Loja, on_delete=models.CASCADE, related_name='+', verbose_name="Loja")
+    vendedor_nf = models.CharField(max_length=3, blank=True, null=True, verbose_name="Vendedor da NF")
+    grupo_produto = models.ForeignKey(GrupoProduto, on_delete=models.CASCADE, related_name='+', verbose_name="Grupo de Produto")
+    fabricante = models.ForeignKey(Fabricante, on_delete=models.CASCADE, related_name='+', verbose_name="Fabricante")
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='+', verbose_name="Produto")
+
+    quantidade = models.DecimalField(max_digits=14, decimal_places=2, verbose_name="Quantidade")
+    valor_total = models.DecimalField(max_digits=16, decimal_places=2, verbose_name="Valor Total")
+    quantidade_linhas = models.IntegerField(verbose_name="Linhas de venda")
+
+    COLUNAS_CHAVE = ['cliente_id', 'anomes', 'loja_id', 'vendedor_nf', 'grupo_produto_id', 'fabricante_id', 'produto_id']
+
+    @classmethod
+    def recalcular(cls, periodos=None, clientes=None):
+        """
+        Refaz o resumo a partir da tabela de vendas: só os ANOMES (e clientes) informados,
+        ou a tabela inteira quando `periodos` é None. Retorna as linhas gravadas.
+        """
+        filtros, parametros = [], []
+        if periodos is not None:
+            periodos = sorted({periodo for periodo in periodos if periodo})
+            if not periodos:
+                return 0
+            filtros.append(f"anomes IN ({', '.join(['%s'] * len(periodos))})")
+            parametros += periodos
+        if clientes is not None:
+            clientes = sorted({cliente for cliente in clientes if cliente})
+            if clientes:
+                filtros.append(f"cliente_id IN ({', '.join(['%s'] * len(clientes))})")
+                parametros += clientes
+
+        where = f"WHERE {' AND '.join(filtros)}" if filtros else ''
+        colunas = ', '.join(cls.COLUNAS_CHAVE)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {cls._meta.db_table} {where}", parametros)
+            cursor.execute(f"""
+                INSERT INTO {cls._meta.db_table} ({colunas}, quantidade, valor_total, quantidade_linhas)
+                SELECT {colunas}, SUM(quantidade), SUM(valor_total), COUNT(*)
+                FROM {Vendas._meta.db_table} {where}
+                GROUP BY {colunas}
+            """, parametros)
+            return cursor.rowcount
+
+    @classmethod
+    def clientes_dos_periodos(cls, periodos):
+        """Ids dos clientes com vendas no resumo dos ANOMES informados"""
+        if not periodos:
+            return set()
+        return set(cls.objects.filter(anomes__in=sorted(periodos)).values_list('cliente_id', flat=True).distinct())
+
+    def __str__(self):
+        return f"{self.anomes} - {self.cliente_id} - {self.valor_total}"
+
+    class Meta:
+        db_table = 'resumo_vendas_mensal'
+        verbose_name = "Resumo Mensal de Vendas"
+        verbose_name_plural = "Resumos Mensais de Vendas"
+        indexes = [
+            models.Index(fields=['anomes', 'cliente']),
+            models.Index(fields=['cliente', 'anomes']),
+        ]
@@ -0,0 +1,134 @@
+# core/services/bi_cliente.py
+
+"""
+Resumo da aba BI do cliente (totais e séries dos gráficos)
+
+A aba fazia um aggregate() para os totais, vários COUNT(*) sobre as vendas do
+cliente (limite, meta, debug...) e montava os gráficos somando no navegador só as
+1000 vendas exibidas. Agora tudo sai de um único agrupamento por (anomes, produto)
+em totais_agrupados (resumo mensal + bordas parciais na tabela de vendas):
+- totais de valor, quantidade e número de vendas = soma das linhas;
+- série por mês = soma por anomes;
+- série por produto = soma por produto, do maior para o menor.
+
+O resultado fica no cache de relatórios (obter_ou_gerar) por cliente/grupo,
+período e versão dos dados, então reabrir a aba não consulta o banco.
+
+Uso:
+    resumo = resumo_bi_cliente(cliente, date(2024, 1, 1), date.today())
+    resumo['total_valor'], resumo['por_mes'], resumo['por_produto']
+
+A lista de vendas é paginada por cursor (keyset) em (data_venda, id), da mais
+recente para a mais antiga: cada página continua depois da última venda da
+anterior, sem OFFSET, usando o índice (cliente, data_venda, id):
+    vendas = pagina_vendas(queryset, decodificar_cursor(request.GET.get('cursor')))
+    cursor = codificar_cursor(ultima.data_venda, ultima.id)
+"""
+
+import base64
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Q
+
+from core.models import Cliente
+from core.services.cache_relatorios import obter_ou_gerar
+from core.services.resumo_vendas import totais_agrupados
+
+
+def filtro_cliente_bi(cliente, consolidar_coligados=True):
+    """Vendas do cliente ou, consolidando, do grupo (master + sub-clientes) resolvido no SQL"""
+    if consolidar_coligados:
+        return Cliente.filtro_grupo(cliente.codigo, prefixo='cliente__')
+    return Q(cliente=cliente)
+
+
+def resumo_bi_cliente(cliente, data_inicio, data_fim, consolidar_coligados=True):
+    """Totais e séries do período (do cache enquanto os dados de vendas não mudarem)"""
+    filtros = {
+        'cliente': cliente.codigo,
+        'consolidar_coligados': consolidar_coligados,
+        'data_inicio': data_inicio.isoformat(),
+        'data_fim': data_fim.isoformat(),
+    }
+    return obter_ou_gerar(
+        'bi_cliente', filtros,
+        lambda: gerar_resumo_bi(filtro_cliente_bi(cliente, consolidar_coligados), data_inicio, data_fim),
+    )
+
+
+def gerar_resumo_bi(filtro, data_inicio, data_fim):
+    """Soma as linhas (anomes, produto) do período em totais e séries"""
+    linhas = totais_agrupados(
+        data_inicio, data_fim, ['anomes', 'produto__codigo', 'produto__descricao'], filtro
+    )
+
+    total_valor = Decimal('0')
+    total_quantidade = Decimal('0')
+    total_vendas = 0
+    por_mes = defaultdict(Decimal)
+    por_produto = {}
+
+    for linha in linhas:
+        total_valor += linha['total_valor']
+        total_quantidade += linha['total_quantidade']
+        total_vendas += linha['total_linhas']
+        por_mes[linha['anomes']] += linha['total_valor']
+
+        produto = por_produto.setdefault(linha['produto__codigo'], {
+            'codigo': linha['produto__codigo'],
+            'descricao': linha['produto__descricao'],
+            'valor_total': Decimal('0'),
+            'quantidade': Decimal('0'),
+        })
+        produto['valor_total'] += linha['total_valor']
+        produto['quantidade'] += linha['total_quantidade']
+
+    return {
+        'total_valor': total_valor,
+        'total_quantidade': total_quantidade,
+        'total_vendas': total_vendas,
+        'ticket_medio': total_valor / total_vendas if total_vendas else Decimal('0'),
+        # Meses em ordem cronológica, rotulados como MM/AAAA
+        'por_mes': [
+            {'anomes': anomes, 'mes': f'{anomes[4:]}/{anomes[:4]}', 'valor_total': float(valor)}
+            for anomes, valor in sorted(por_mes.items())
+        ],
+        # Produtos do maior para o menor faturamento
+        'por_produto': [
+            {**produto, 'valor_total': float(produto['valor_total']), 'quantidade': float(produto['quantidade'])}
+            for produto in sorted(por_produto.values(), key=lambda produto: produto['valor_total'], reverse=True)
+        ],
+    }
+
+
+# ===== PAGINAÇÃO POR CURSOR (KEYSET) =====
+
+def codificar_cursor(data_venda, venda_id):
+    """Cursor opaco (base64 de 'AAAA-MM-DD:id') apontando para depois da venda informada"""
+    return base64.urlsafe_b64encode(f'{data_venda.isoformat()}:{venda_id}'.encode('ascii')).decode('ascii')
+
+
+def decodificar_cursor(cursor):
+    """(data_venda, id) do cursor; None sem cursor. Cursor malformado gera ValueError"""
+    if not cursor:
+        return None
+    try:
+        texto = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii')
+        data_venda, venda_id = texto.split(':')
+        return date.fromisoformat(data_venda), int(venda_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"cursor inválido: {cursor}") from e
+
+
+def pagina_vendas(vendas, apos=None):
+    """Vendas da mais recente para a mais antiga, começando depois de `apos` (data_venda, id)"""
+    vendas = vendas.order_by('-data_venda', '-id')
+    if apos:
+        data_venda, venda_id = apos
+        # O data_venda <= redundante vira limite do índice; o OR só desempata o próprio dia
+        vendas = vendas.filter(data_venda__lte=data_venda).filter(
+            Q(data_venda__lt=data_venda) | Q(data_venda=data_venda, id__lt=venda_id)
+        )
+    return vendas
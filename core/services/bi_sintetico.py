@@ -0,0 +1,174 @@
+# core/services/bi_sintetico.py
+
+"""
+Geração de planilhas BI (SysFat) sintéticas para medir a importação
+
+Produz arquivos no mesmo formato da planilha real (colunas CNPJ, CLIENTE, CODPRO,
+PRODUTO, NUMLOJ, CODVEN, VEND, QTD, TOTAL, ANOMES, NF, UF, CLIVEN) com dados
+reprodutíveis (mesma semente → mesmo arquivo):
+- clientes com CNPJ e CPF formatados, repetidos ao longo do arquivo;
+- códigos de produto/loja/vendedor sem zeros à esquerda, como vêm do SysFat;
+- QTD com vírgula decimal em parte das linhas;
+- uma fração opcional de linhas inválidas (documento vazio, loja inválida, valores).
+
+O .xlsx é gravado com o openpyxl em modo write_only (memória constante) e inclui
+as planilhas auxiliares PRODUTOS, CLASSE e FABR; o .csv contém só a planilha BI.
+
+Uso:
+    gerar_arquivo_bi('/tmp/bi_100k.xlsx', 100000)
+"""
+
+import csv
+import random
+
+from openpyxl import Workbook
+
+COLUNAS_BI = [
+    'CNPJ', 'CLIENTE', 'CODPRO', 'PRODUTO', 'NUMLOJ', 'CODVEN', 'VEND',
+    'QTD', 'TOTAL', 'ANOMES', 'NF', 'UF', 'CLIVEN',
+]
+
+# Tamanhos de referência do benchmark
+TAMANHOS_PADRAO = {'10k': 10000, '100k': 100000, '1m': 1000000}
+
+UFS = ['SP', 'SP', 'SP', 'RJ', 'MG', 'PR', 'SC', 'RS', 'GO', 'BA']
+PREFIXOS_CLIENTE = ['COMERCIAL', 'DISTRIBUIDORA', 'MERCADO', 'AUTO PECAS', 'FERRAGENS', 'LOJA']
+SUFIXOS_CLIENTE = ['LTDA', 'EIRELI', 'ME', 'S/A']
+
+
+def interpretar_tamanho(valor):
+    """Converte '10k', '100k', '1m' ou um número em quantidade de linhas"""
+    texto = str(valor).strip().lower()
+    if texto in TAMANHOS_PADRAO:
+        return TAMANHOS_PADRAO[texto]
+    multiplicador = 1
+    if texto.endswith('k'):
+        texto, multiplicador = texto[:-1], 1000
+    elif texto.endswith('m'):
+        texto, multiplicador = texto[:-1], 1000000
+    return int(float(texto) * multiplicador)
+
+
+def _formatar_cnpj(digitos):
+    return f'{digitos[:2]}.{digitos[2:5]}.{digitos[5:8]}/{digitos[8:12]}-{digitos[12:]}'
+
+
+def _formatar_cpf(digitos):
+    return f'{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}'
+
+
+class GeradorBI:
+    """Gera as linhas da planilha BI e as planilhas auxiliares de forma reprodutível"""
+
+    def __init__(self, linhas, clientes=None, produtos=None, lojas=10, vendedores=30,
+                 meses=12, ano_inicial=2024, percentual_invalidas=0.0, semente=42):
+        self.linhas = linhas
+        # Proporções parecidas com a base real: muitas vendas por cliente/produto
+        self.clientes = clientes or max(linhas // 40, 10)
+        self.produtos = produtos or max(linhas // 20, 10)
+        self.lojas = lojas
+        self.vendedores = vendedores
+        self.meses = meses
+        self.ano_inicial = ano_inicial
+        self.percentual_invalidas = percentual_invalidas
+        self.semente = semente
+
+        self.grupos = max(self.produtos // 60, 5)
+        self.fabricantes = max(self.produtos // 120, 3)
+        self.periodos = [
+            f'{(ano_inicial + mes // 12) % 100:02d}{mes % 12 + 1:02d}' for mes in range(meses)
+        ]
+
+    def _documentos(self, aleatorio):
+        """Um documento formatado por cliente (30% CPF, 70% CNPJ)"""
+        documentos = []
+        for indice in range(self.clientes):
+            if aleatorio.random() < 0.3:
+                documentos.append(_formatar_cpf(f'{indice + 10000000:09d}{aleatorio.randint(0, 99):02d}'))
+            else:
+                documentos.append(_formatar_cnpj(f'{indice + 10000000:08d}0001{aleatorio.randint(0, 99):02d}'))
+        return documentos
+
+    def linhas_bi(self):
+        """Gera as linhas da planilha BI (listas na ordem de COLUNAS_BI)"""
+        aleatorio = random.Random(self.semente)
+        documentos = self._documentos(aleatorio)
+        nomes = [
+            f'{aleatorio.choice(PREFIXOS_CLIENTE)} {indice + 1} {aleatorio.choice(SUFIXOS_CLIENTE)}'
+            for indice in range(self.clientes)
+        ]
+        ufs = [aleatorio.choice(UFS) for _ in range(self.clientes)]
+        precos = [round(aleatorio.uniform(2, 800), 2) for _ in range(self.produtos)]
+        nf = 100000
+
+        for numero in range(self.linhas):
+            cliente = int(aleatorio.paretovariate(1.2)) % self.clientes
+            produto = int(aleatorio.paretovariate(1.1)) * 7919 % self.produtos
+            vendedor = aleatorio.randint(1, self.vendedores)
+            quantidade = aleatorio.randint(1, 24)
+            total = round(precos[produto] * quantidade, 2)
+            if numero % 4 == 0:
+                nf += 1
+
+            linha = [
+                documentos[cliente], nomes[cliente], str(produto + 1), f'PRODUTO {produto + 1}',
+                str(aleatorio.randint(1, self.lojas)), str(vendedor), f'VENDEDOR {vendedor}',
+                str(quantidade) if numero % 3 else f'{quantidade},00', f'{total:.2f}',
+                self.periodos[numero * self.meses // self.linhas], str(nf), ufs[cliente],
+                f'{aleatorio.randint(1, self.vendedores):03d}',
+            ]
+
+            if self.percentual_invalidas and aleatorio.random() < self.percentual_invalidas:
+                campo = aleatorio.randrange(3)
+                if campo == 0:
+                    linha[0] = ''          # sem documento
+                elif campo == 1:
+                    linha[4] = '9999'      # loja inválida
+                else:
+                    linha[8] = 'ERRO'      # valor inválido
+
+            yield linha
+
+    def planilhas_auxiliares(self):
+        """{'PRODUTOS'|'CLASSE'|'FABR': (cabeçalho, linhas)} no formato do SysFat"""
+        aleatorio = random.Random(self.semente + 1)
+        return {
+            'PRODUTOS': (['CODPRO', 'CODCLA', 'CODFAB', 'DESCR'], [
+                [str(codigo), str(aleatorio.randint(1, self.grupos)),
+                 str(aleatorio.randint(1, self.fabricantes)), f'PRODUTO {codigo}']
+                for codigo in range(1, self.produtos + 1)
+            ]),
+            'CLASSE': (['CODCLA', 'DESCR'], [
+                [str(codigo), f'GRUPO {codigo}'] for codigo in range(1, self.grupos + 1)
+            ]),
+            'FABR': (['CODFAB', 'DESCR'], [
+                [str(codigo), f'FABRICANTE {codigo}'] for codigo in range(1, self.fabricantes + 1)
+            ]),
+        }
+
+
+def gerar_arquivo_bi(caminho, linhas, **opcoes):
+    """Grava a planilha sintética (.xlsx com auxiliares ou .csv) e retorna o GeradorBI usado"""
+    gerador = GeradorBI(linhas, **opcoes)
+
+    if str(caminho).lower().endswith('.csv'):
+        with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+            writer = csv.writer(arquivo)
+            writer.writerow(COLUNAS_BI)
+            writer.writerows(gerador.linhas_bi())
+        return gerador
+
+    workbook = Workbook(write_only=True)
+    planilha = workbook.create_sheet('BI')
+    planilha.append(COLUNAS_BI)
+    for linha in gerador.linhas_bi():
+        planilha.append(linha)
+
+    for nome, (cabecalho, registros) in gerador.planilhas_auxiliares().items():
+        auxiliar = workbook.create_sheet(nome)
+        auxiliar.append(cabecalho)
+        for registro in registros:
+            auxiliar.append(registro)
+
+    workbook.save(caminho)
+    return gerador
@@ -0,0 +1,101 @@
+# core/services/busca_clientes.py
+
+"""
+Busca de clientes por nome/código/documento com ranking por semelhança
+
+A lista de clientes buscava com vários icontains (nome, código, razão social),
+o que sempre varria a tabela inteira e não achava nomes com acento digitados sem
+acento (ou vice-versa). Agora:
+- nome_busca guarda código + nome + fantasia + razão social em minúsculas e sem
+  acentos (mantido no save, ver Cliente.texto_busca); o termo é normalizado igual;
+- no PostgreSQL com pg_trgm, um índice GIN (gin_trgm_ops) em nome_busca atende
+  tanto o LIKE '%termo%' quanto a semelhança por palavra (termo <% nome_busca),
+  que tolera nomes digitados pela metade ou com erro; o ranking é o
+  word_similarity(termo, nome_busca);
+- sem pg_trgm (e no SQLite) cada palavra do termo precisa aparecer em nome_busca
+  e o ranking prioriza código exato, código iniciado pelo termo e palavras
+  iniciadas pelo termo;
+- termos que parecem documento também buscam pelo início de cpf_cnpj_numerico
+  (índice varchar_pattern_ops no PostgreSQL).
+
+Uso:
+    clientes = buscar_clientes(Cliente.objects.filter(status='ativo'), 'joao sil')
+    clientes.order_by('-relevancia', 'nome')
+"""
+
+import logging
+
+from django.db import connection
+from django.db.models import BooleanField, Case, F, FloatField, Func, Q, Value, When
+
+from core.models import Cliente
+
+logger = logging.getLogger(__name__)
+
+# Cache por processo: a extensão só muda com migração
+_trigram_disponivel = {}
+
+
+class SemelhancaPalavra(Func):
+    """word_similarity(termo, campo) do pg_trgm: 0 a 1, maior = mais parecido"""
+    function = 'word_similarity'
+    output_field = FloatField()
+
+
+class PalavraSemelhante(Func):
+    """termo <% campo do pg_trgm: alguma palavra do campo parecida com o termo (usa o índice GIN)"""
+    template = '%(expressions)s'
+    arg_joiner = ' <%% '
+    output_field = BooleanField()
+
+
+def trigram_disponivel():
+    """True se o banco é PostgreSQL com a extensão pg_trgm instalada"""
+    if connection.vendor != 'postgresql':
+        return False
+    if connection.alias not in _trigram_disponivel:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+            _trigram_disponivel[connection.alias] = cursor.fetchone()[0]
+        if not _trigram_disponivel[connection.alias]:
+            logger.warning("⚠️ Extensão pg_trgm indisponível: busca de clientes sem semelhança (só LIKE)")
+    return _trigram_disponivel[connection.alias]
+
+
+def buscar_clientes(clientes, termo):
+    """Filtra `clientes` pelo termo e anota a relevancia (0 a 1) para ordenar"""
+    texto = Cliente.texto_busca(termo)
+    if not texto:
+        return clientes.annotate(relevancia=Value(0.0, output_field=FloatField()))
+
+    # Todas as palavras do termo em nome_busca (LIKE '%palavra%', indexado pelo trigrama)
+    filtro = Q()
+    for palavra in texto.split():
+        filtro &= Q(nome_busca__contains=palavra)
+
+    # Documento (formatado ou não): busca pelo início do CPF/CNPJ normalizado
+    documento = Cliente.normalizar_documento(termo)
+    eh_documento = bool(documento) and not termo.strip(' .-/0123456789')
+    if eh_documento:
+        filtro |= Q(cpf_cnpj_numerico__startswith=documento)
+
+    if trigram_disponivel():
+        filtro |= Q(PalavraSemelhante(Value(texto), F('nome_busca')))
+        relevancia = SemelhancaPalavra(Value(texto), F('nome_busca'))
+    else:
+        # nome_busca começa pelo código: o início do nome vem depois de um espaço,
+        # como o das demais palavras
+        relevancia = Case(
+            When(codigo__startswith=termo.strip(), then=Value(0.9)),
+            When(nome_busca__contains=f' {texto}', then=Value(0.7)),
+            default=Value(0.5),
+            output_field=FloatField(),
+        )
+
+    # Código exato e documento sempre no topo
+    prioridade = [When(codigo=termo.strip(), then=Value(1.0))]
+    if eh_documento:
+        prioridade.append(When(cpf_cnpj_numerico__startswith=documento, then=Value(1.0)))
+    relevancia = Case(*prioridade, default=relevancia, output_field=FloatField())
+
+    return clientes.filter(filtro).annotate(relevancia=relevancia)
@@ -0,0 +1,71 @@
+# core/services/cache_relatorios.py
+
+"""
+Cache de resultados de relatórios
+
+Os gestores geram o mesmo relatório (mesmo período, lojas, vendedores, grupos...)
+várias vezes ao dia. O resultado fica no cache do Django com uma chave formada por:
+- o nome do relatório;
+- a versão dos dados de vendas (VersaoDados), incrementada por importações,
+  vendas cadastradas/alteradas/excluídas e atualização de vendedores;
+- um hash canônico dos filtros (ordem dos parâmetros e dos valores de
+  múltipla escolha não importa).
+
+Quando os dados mudam a versão muda, e os resultados antigos deixam de ser
+encontrados (expiram sozinhos pelo timeout). O mesmo resultado serve a tela e a
+exportação Excel.
+
+Uso:
+    dados = obter_ou_gerar('clientes', filtros, lambda: gerar_dados_relatorio(**filtros))
+"""
+
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.models import VersaoDados
+
+logger = logging.getLogger(__name__)
+
+# Segundos que um resultado fica no cache (mesmo sem alteração dos dados)
+TEMPO_CACHE_RELATORIO = getattr(settings, 'RELATORIO_CACHE_TIMEOUT', 60 * 60)
+
+
+def _valor_canonico(valor):
+    """Listas viram listas ordenadas sem repetição; vazios equivalem a None"""
+    if isinstance(valor, (list, tuple, set)):
+        valores = sorted({str(item).strip() for item in valor if str(item).strip()})
+        return valores or None
+    if isinstance(valor, str):
+        return valor.strip() or None
+    return valor
+
+
+def hash_filtros(filtros):
+    """MD5 canônico de um dicionário de filtros"""
+    canonico = {chave: _valor_canonico(valor) for chave, valor in filtros.items()}
+    texto = json.dumps(canonico, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.md5(texto.encode('utf-8')).hexdigest()
+
+
+def chave_relatorio(nome, filtros, versao=None):
+    """Chave de cache do relatório para os filtros na versão atual dos dados"""
+    if versao is None:
+        versao = VersaoDados.atual()
+    return f'relatorio_{nome}_v{versao}_{hash_filtros(filtros)}'
+
+
+def obter_ou_gerar(nome, filtros, gerar, timeout=TEMPO_CACHE_RELATORIO):
+    """Resultado do cache ou, se ausente, gerado por `gerar()` e guardado"""
+    chave = chave_relatorio(nome, filtros)
+    resultado = cache.get(chave)
+    if resultado is not None:
+        logger.debug(f"📦 Relatório '{nome}' servido do cache ({chave})")
+        return resultado
+
+    resultado = gerar()
+    cache.set(chave, resultado, timeout)
+    return resultado
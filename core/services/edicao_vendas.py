@@ -0,0 +1,46 @@
+# core/services/edicao_vendas.py
+
+"""
+Manutenção dos dados derivados após vendas cadastradas, alteradas ou excluídas à mão
+
+A importação refaz o resumo mensal, as métricas dos clientes e a versão dos dados
+uma vez por carga. As telas de cadastro de vendas fazem o mesmo por aqui, e não
+no save()/delete() do modelo, para que loops e alterações em lote não refaçam o
+resumo a cada linha: junte os pares (anomes, cliente_id) afetados e chame uma vez.
+
+Uso (na mesma transação da alteração):
+    with transaction.atomic():
+        anterior = (venda.anomes, venda.cliente_id)
+        venda = form.save()
+        atualizar_derivados_vendas([anterior, (venda.anomes, venda.cliente_id)])
+"""
+
+import logging
+
+from django.db import transaction
+
+from core.models import Cliente, PeriodoImportado, ResumoVendasMensal, VersaoDados
+
+logger = logging.getLogger(__name__)
+
+
+def atualizar_derivados_vendas(pares):
+    """
+    Refaz o que depende das vendas dos pares (anomes, cliente_id) informados:
+    - resumo mensal e métricas só dos meses/clientes afetados;
+    - versão dos dados (invalida os caches de relatórios);
+    - impressão digital dos meses (deixam de corresponder ao arquivo importado).
+    """
+    pares = {(anomes, cliente_id) for anomes, cliente_id in pares if anomes and cliente_id}
+    if not pares:
+        return
+
+    periodos = {anomes for anomes, _ in pares}
+    clientes = {cliente_id for _, cliente_id in pares}
+    with transaction.atomic():
+        ResumoVendasMensal.recalcular(periodos=periodos, clientes=clientes)
+        Cliente.atualizar_metricas(clientes=clientes)
+        VersaoDados.incrementar()
+        PeriodoImportado.invalidar(*periodos)
+    logger.info(f"🔄 Resumo e métricas refeitos após edição de vendas: {len(clientes)} cliente(s), "
+                f"períodos {', '.join(sorted(periodos))}")
@@ -0,0 +1,266 @@
+# core/services/exportacao_excel.py
+
+"""
+Exportação Excel em modo write_only (memória constante)
+
+O workbook normal do openpyxl mantém uma célula com estilo próprio para cada valor
+e só grava tudo no final; com milhares de clientes × meses isso leva minutos e
+gigabytes. Aqui as linhas são gravadas à medida que são geradas:
+- Workbook(write_only=True) serializa cada linha no append;
+- os estilos são NamedStyle registrados uma vez no workbook e apenas referenciados
+  pelo nome em cada célula (inclusive a borda, sem segunda passada);
+- valores e totais (por cliente, por mês e geral) vêm da MatrizPivot do
+  relatório, sem recalcular nada célula a célula.
+
+O arquivo é gravado em `destino` (caminho ou arquivo binário aberto).
+Relatórios: clientes × meses (gravar_relatorio_clientes) e lista de vendas (gravar_vendas).
+"""
+
+from itertools import islice
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+from core.models import Vendedor
+
+FORMATO_VALOR = '#,##0.00'
+
+_BORDA = Border(left=Side(style='thin'), right=Side(style='thin'),
+                top=Side(style='thin'), bottom=Side(style='thin'))
+_FUNDO_TOTAL = PatternFill(start_color='E7E6E6', end_color='E7E6E6', fill_type='solid')
+
+
+def _estilos():
+    """Estilos nomeados (novas instâncias: o NamedStyle fica vinculado ao workbook)"""
+    return [
+        NamedStyle(name='relatorio_titulo', font=Font(name='Arial', size=14, bold=True),
+                   alignment=Alignment(horizontal='center', vertical='center')),
+        NamedStyle(name='relatorio_cabecalho', font=Font(name='Arial', size=10, bold=True, color='FFFFFF'),
+                   fill=PatternFill(start_color='366092', end_color='366092', fill_type='solid'),
+                   alignment=Alignment(horizontal='center', vertical='center'), border=_BORDA),
+        NamedStyle(name='relatorio_texto', font=Font(name='Arial', size=9), border=_BORDA),
+        NamedStyle(name='relatorio_valor', font=Font(name='Arial', size=9), number_format=FORMATO_VALOR,
+                   alignment=Alignment(horizontal='right', vertical='center'), border=_BORDA),
+        NamedStyle(name='relatorio_total', font=Font(name='Arial', size=10, bold=True), fill=_FUNDO_TOTAL,
+                   number_format=FORMATO_VALOR, alignment=Alignment(horizontal='right', vertical='center'),
+                   border=_BORDA),
+    ]
+
+
+# Colunas fixas do relatório de clientes (antes dos meses)
+COLUNAS_CLIENTE = ['Código', 'Nome do Cliente', 'CPF/CNPJ', 'Cidade', 'UF', 'Loja', 'Vendedor', 'Status', 'Tipo']
+LARGURAS_CLIENTE = [12, 30, 18, 20, 5, 8, 25, 12, 12]
+
+# Colunas da comparação com o período anterior (depois do TOTAL, quando houver)
+COLUNAS_COMPARACAO = ['Período Anterior', 'Variação', 'Variação %', 'Meses Ativos']
+LARGURAS_COMPARACAO = [15, 15, 11, 8]
+
+FILTROS_DESCRITOS = [
+    ('loja', 'Loja:'), ('vendedor', 'Vendedor:'), ('estado', 'Estado:'),
+    ('grupo', 'Grupo:'), ('fabricante', 'Fabricante:'), ('produto', 'Produto:'),
+]
+
+
+# Colunas da lista de vendas
+COLUNAS_VENDAS = ['Data', 'NF', 'Série', 'Cód. Cliente', 'Cliente', 'Cód. Produto', 'Produto',
+                  'Grupo', 'Fabricante', 'Loja', 'Vendedor Cliente', 'Vendedor NF', 'Quantidade', 'Valor Total']
+LARGURAS_VENDAS = [11, 10, 6, 12, 30, 12, 35, 8, 10, 6, 25, 25, 12, 15]
+
+# Vendas lidas do banco (e nomes de vendedores resolvidos) por bloco
+BLOCO_VENDAS = 5000
+
+FILTROS_VENDAS_DESCRITOS = [
+    ('search', 'Busca:'), ('data_inicio', 'Data Início:'), ('data_fim', 'Data Fim:'),
+    ('loja', 'Loja:'), ('vendedor', 'Vendedor:'),
+]
+
+
+def criar_workbook():
+    """Workbook write_only com os estilos nomeados do portal já registrados"""
+    workbook = Workbook(write_only=True)
+    for estilo in _estilos():
+        workbook.add_named_style(estilo)
+    return workbook
+
+
+class CelulasEstilizadas:
+    """Cria células write_only com um dos estilos nomeados registrados em criar_workbook"""
+
+    def __init__(self, ws):
+        self.ws = ws
+
+    def celula(self, valor, estilo):
+        celula = WriteOnlyCell(self.ws, value=valor)
+        celula.style = estilo
+        return celula
+
+    def valor(self, valor, estilo='relatorio_valor'):
+        """Valor monetário; zero aparece como '-' (mesmo padrão da tela)"""
+        return self.celula(valor if valor > 0 else '-', estilo)
+
+
+def gravar_relatorio_clientes(destino, dados_relatorio, meses_periodo, matriz, filtros):
+    """
+    Grava o relatório de clientes × meses em `destino`, linha a linha.
+    `matriz` é a MatrizPivot alinhada a dados_relatorio (uma linha por cliente).
+    """
+    workbook = criar_workbook()
+    ws = workbook.create_sheet("Relatório de Clientes")
+    celulas = CelulasEstilizadas(ws)
+
+    comparando = bool(filtros.get('comparar'))
+    colunas_comparacao = COLUNAS_COMPARACAO if comparando else []
+    larguras_comparacao = LARGURAS_COMPARACAO if comparando else []
+    total_colunas = len(COLUNAS_CLIENTE) + len(meses_periodo) + 1 + len(colunas_comparacao)
+
+    # Larguras e mesclagem precisam ser definidas antes da primeira linha
+    larguras = LARGURAS_CLIENTE + [12] * len(meses_periodo) + [15] + larguras_comparacao
+    for indice, largura in enumerate(larguras, 1):
+        ws.column_dimensions[get_column_letter(indice)].width = largura
+    ws.merged_cells.add(f'A1:{get_column_letter(total_colunas)}1')
+
+    # ===== TÍTULO E FILTROS =====
+    ws.append([celulas.celula("RELATÓRIO DE CLIENTES - FATURAMENTO MENSAL", 'relatorio_titulo')])
+    ws.append([])
+    ws.append(["Período:", f"{filtros['data_inicio']} a {filtros['data_fim']}"])
+    for chave, rotulo in FILTROS_DESCRITOS:
+        if filtros.get(chave) and filtros[chave] not in ('Todas', 'Todos'):
+            ws.append([rotulo, filtros[chave]])
+    ws.append(["Incluir Coligados:", "Sim" if filtros['incluir_coligados'] else "Não"])
+    ws.append(["Consolidar Coligados:", "Sim" if filtros.get('consolidar_coligados') else "Não"])
+    if comparando:
+        ws.append(["Comparar com:", filtros['comparar']])
+    ws.append(["Apenas com Vendas:", "Sim" if filtros['apenas_com_vendas'] else "Não"])
+    ws.append([])
+
+    # ===== CABEÇALHOS =====
+    cabecalhos = COLUNAS_CLIENTE + [mes['nome'] for mes in meses_periodo] + ['TOTAL'] + colunas_comparacao
+    ws.append([celulas.celula(cabecalho, 'relatorio_cabecalho') for cabecalho in cabecalhos])
+
+    # ===== DADOS =====
+    linhas_valores = zip(matriz.valores.tolist(), matriz.totais_linhas().tolist())
+
+    for cliente, (valores_mes, total_cliente) in zip(dados_relatorio, linhas_valores):
+        vendedor = (
+            f"{cliente['vendedor_codigo']} - {cliente['vendedor_nome']}"
+            if cliente['vendedor_codigo'] != '-' else '-'
+        )
+        linha = [
+            celulas.celula(valor, 'relatorio_texto') for valor in (
+                cliente['codigo'], cliente['nome'], cliente['cpf_cnpj'], cliente['cidade'], cliente['estado'],
+                cliente['loja_codigo'], vendedor, cliente['status'], cliente['tipo'],
+            )
+        ]
+        linha += [celulas.valor(valor) for valor in valores_mes]
+        linha.append(celulas.valor(total_cliente, 'relatorio_total'))
+        if comparando:
+            linha += _celulas_comparacao(celulas, cliente['total_anterior'], cliente['variacao'],
+                                         cliente['variacao_percentual'], cliente['meses_ativos'])
+        ws.append(linha)
+
+    # ===== LINHA DE TOTAIS =====
+    linha_total = [celulas.celula(None, 'relatorio_total') for _ in range(len(COLUNAS_CLIENTE) - 1)]
+    linha_total.append(celulas.celula("TOTAL GERAL", 'relatorio_total'))
+    linha_total += [celulas.valor(valor, 'relatorio_total') for valor in matriz.totais_colunas().tolist()]
+    linha_total.append(celulas.valor(matriz.total_geral(), 'relatorio_total'))
+    if comparando:
+        total_anterior = sum(cliente['total_anterior'] for cliente in dados_relatorio)
+        variacao = matriz.total_geral() - total_anterior
+        linha_total += _celulas_comparacao(
+            celulas, total_anterior, variacao, variacao / total_anterior * 100 if total_anterior else None,
+            None, 'relatorio_total',
+        )
+    ws.append(linha_total)
+
+    workbook.save(destino)
+
+
+def _celulas_comparacao(celulas, total_anterior, variacao, variacao_percentual, meses_ativos,
+                        estilo='relatorio_valor'):
+    """Período anterior, variação (pode ser negativa), variação % e meses ativos"""
+    return [
+        celulas.valor(total_anterior, estilo),
+        celulas.celula(variacao, estilo),
+        celulas.celula('-' if variacao_percentual is None else round(variacao_percentual, 1), estilo),
+        # Contagem de meses: sem o formato monetário
+        celulas.celula('-' if meses_ativos is None else meses_ativos,
+                       'relatorio_texto' if estilo == 'relatorio_valor' else estilo),
+    ]
+
+
+def _vendedor_descrito(codigo, nomes_vendedores):
+    if not codigo:
+        return '-'
+    nome = nomes_vendedores.get(codigo)
+    return f"{codigo} - {nome}" if nome else codigo
+
+
+def gravar_vendas(destino, vendas, filtros):
+    """
+    Grava a lista de vendas (queryset já filtrado e ordenado) em `destino`.
+    As linhas são lidas do banco em blocos (iterator), sem carregar a lista inteira.
+    Retorna a quantidade de vendas gravadas.
+    """
+    workbook = criar_workbook()
+    ws = workbook.create_sheet("Vendas")
+    celulas = CelulasEstilizadas(ws)
+
+    for indice, largura in enumerate(LARGURAS_VENDAS, 1):
+        ws.column_dimensions[get_column_letter(indice)].width = largura
+    ws.merged_cells.add(f'A1:{get_column_letter(len(COLUNAS_VENDAS))}1')
+
+    # ===== TÍTULO E FILTROS =====
+    ws.append([celulas.celula("LISTA DE VENDAS", 'relatorio_titulo')])
+    ws.append([])
+    for chave, rotulo in FILTROS_VENDAS_DESCRITOS:
+        if filtros.get(chave):
+            ws.append([rotulo, filtros[chave]])
+    ws.append([])
+
+    # ===== CABEÇALHOS =====
+    ws.append([celulas.celula(cabecalho, 'relatorio_cabecalho') for cabecalho in COLUNAS_VENDAS])
+
+    # ===== DADOS =====
+    linhas = vendas.values_list(
+        'data_venda', 'numero_nf', 'serie_nf', 'cliente__codigo', 'cliente__nome', 'produto__codigo',
+        'produto__descricao', 'grupo_produto__codigo', 'fabricante__codigo', 'loja__codigo',
+        'cliente__codigo_vendedor', 'vendedor_nf', 'quantidade', 'valor_total',
+    )
+    total_vendas = 0
+    total_quantidade = 0
+    total_valor = 0
+    nomes_vendedores = {}
+    iterador = linhas.iterator(chunk_size=BLOCO_VENDAS)
+
+    while bloco := list(islice(iterador, BLOCO_VENDAS)):
+        # Nomes só dos vendedores ainda não vistos, todos numa chamada por bloco
+        novos = {codigo for linha in bloco for codigo in linha[10:12] if codigo and codigo not in nomes_vendedores}
+        if novos:
+            nomes_vendedores.update(Vendedor.nomes_por_codigo(novos))
+
+        for data_venda, *textos, vendedor_cliente, vendedor_nf, quantidade, valor_total in bloco:
+            linha = [celulas.celula(data_venda.strftime('%d/%m/%Y'), 'relatorio_texto')]
+            linha += [celulas.celula(texto or '-', 'relatorio_texto') for texto in textos]
+            linha += [
+                celulas.celula(_vendedor_descrito(codigo, nomes_vendedores), 'relatorio_texto')
+                for codigo in (vendedor_cliente, vendedor_nf)
+            ]
+            linha.append(celulas.celula(quantidade, 'relatorio_valor'))
+            linha.append(celulas.celula(valor_total, 'relatorio_valor'))
+            ws.append(linha)
+
+            total_vendas += 1
+            total_quantidade += quantidade
+            total_valor += valor_total
+
+    # ===== LINHA DE TOTAIS =====
+    linha_total = [celulas.celula(None, 'relatorio_total') for _ in range(len(COLUNAS_VENDAS) - 3)]
+    linha_total.append(celulas.celula("TOTAL GERAL", 'relatorio_total'))
+    linha_total.append(celulas.celula(total_quantidade, 'relatorio_total'))
+    linha_total.append(celulas.celula(total_valor, 'relatorio_total'))
+    ws.append(linha_total)
+
+    workbook.save(destino)
+    return total_vendas
@@ -0,0 +1,727 @@
+# core/services/importacao_bi.py
+
+"""
+Motor de importação em lote da planilha BI (SysFat)
+
+Em vez de processar linha a linha (~8 queries por registro), o importador:
+- normaliza o lote com operações vetorizadas do pandas (normalizacao_bi);
+- resolve cada dimensão (cliente, produto, grupo, fabricante, loja, vendedor)
+  uma única vez em mapas em memória, consultando o banco em blocos;
+- consulta as planilhas auxiliares (PRODUTOS/CLASSE/FABR) em dicionários
+  indexados uma única vez por importação (TabelasAuxiliares);
+- cria os registros faltantes com bulk_create(ignore_conflicts=True);
+- insere as vendas em lotes grandes com bulk_create;
+- recalcula o resumo mensal (ResumoVendasMensal) só dos meses gravados.
+
+Os mapas ficam guardados na instância, então vários lotes do mesmo arquivo
+podem ser processados em sequência sem repetir consultas.
+"""
+
+import logging
+import time
+from contextlib import nullcontext
+from datetime import timedelta
+
+import pandas as pd
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.utils import timezone
+
+from core.models import (Cliente, Produto, GrupoProduto, Fabricante,
+                         Loja, Vendedor, Vendas, LogSincronizacao, PeriodoImportado, ResumoVendasMensal,
+                         VersaoDados)
+from core.services.impressao_digital_bi import (ImpressaoDigitalPeriodos, calcular_impressoes_periodos,
+                                                calcular_md5_arquivo, importacao_identica,
+                                                periodos_inalterados, registrar_impressoes)
+from core.services.leitor_bi import LeitorBI, TAMANHO_LOTE_LEITURA
+from core.services.normalizacao_bi import normalizar_frame
+
+logger = logging.getLogger(__name__)
+
+# Quantidade de vendas por INSERT
+TAMANHO_LOTE_VENDAS = 5000
+
+# Tamanho dos blocos de filtros "__in" (abaixo do limite de parâmetros do SQLite)
+TAMANHO_BLOCO_CONSULTA = 900
+
+# Intervalo mínimo (s) entre gravações de progresso no LogSincronizacao
+INTERVALO_PROGRESSO = 2
+
+# Erros guardados no resultado detalhado do LogSincronizacao
+ERROS_NO_RESULTADO = 50
+
+# O que acontece com as vendas já existentes (ver executar_importacao_bi)
+SUBSTITUICOES = LogSincronizacao.SUBSTITUICAO_CHOICES
+
+# Modos de gravação das vendas (ver criar_importador)
+MODOS_CARGA = LogSincronizacao.MODO_CARGA_CHOICES
+
+
+# ===== FUNÇÕES AUXILIARES =====
+
+def em_blocos(valores, tamanho=TAMANHO_BLOCO_CONSULTA):
+    """Divide uma coleção em listas de no máximo `tamanho` itens"""
+    valores = list(valores)
+    for inicio in range(0, len(valores), tamanho):
+        yield valores[inicio:inicio + tamanho]
+
+
+def texto_celula(valor, padrao=''):
+    """Converte uma célula da planilha em texto limpo (vazio/NaN retorna o padrão)"""
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return padrao
+    texto = str(valor).strip()
+    return texto if texto else padrao
+
+
+# ===== PLANILHAS AUXILIARES (PRODUTOS / CLASSE / FABR) =====
+
+# planilha → (coluna do código, largura do código normalizado, colunas usadas)
+ESTRUTURA_PLANILHAS = {
+    'produtos': ('CODPRO', 6, ['CODCLA', 'CODFAB', 'DESCR']),
+    'classes': ('CODCLA', 4, ['DESCR']),
+    'fabricantes': ('CODFAB', 3, ['DESCR']),
+}
+
+
+def indexar_planilha(df, coluna_codigo, largura, colunas):
+    """
+    Monta {código normalizado: {coluna: valor}} a partir de um DataFrame auxiliar.
+    Códigos repetidos mantêm a primeira ocorrência (mesma regra do .iloc[0] anterior).
+    """
+    if df is None or df.empty:
+        return {}
+    if coluna_codigo not in df.columns:
+        logger.warning(f"Planilha auxiliar sem a coluna {coluna_codigo}; ignorada")
+        return {}
+
+    colunas = [coluna for coluna in colunas if coluna in df.columns]
+    codigos = df[coluna_codigo].astype(str).str.strip().str.zfill(largura)
+
+    indice = {}
+    for codigo, *valores in zip(codigos, *(df[coluna] for coluna in colunas)):
+        if codigo not in indice:
+            indice[codigo] = dict(zip(colunas, valores))
+    return indice
+
+
+class TabelasAuxiliares:
+    """Consulta as planilhas auxiliares por código (índices montados uma vez)"""
+
+    def __init__(self, planilhas_aux=None):
+        planilhas_aux = planilhas_aux or {}
+        self.indices = {
+            nome: indexar_planilha(planilhas_aux.get(nome), coluna, largura, colunas)
+            for nome, (coluna, largura, colunas) in ESTRUTURA_PLANILHAS.items()
+        }
+
+    def dados_produto(self, codigo_produto, descricao_padrao):
+        """Grupo, fabricante e descrições de um produto (padrões quando não está nas planilhas)"""
+        codigo_grupo = '0001'
+        codigo_fabricante = '001'
+        descricao_produto = descricao_padrao
+        descricao_grupo = 'GRUPO PADRÃO'
+        descricao_fabricante = 'FABRICANTE PADRÃO'
+
+        produto_row = self.indices['produtos'].get(codigo_produto)
+        if produto_row:
+            codigo_grupo = texto_celula(produto_row.get('CODCLA'), '0001').zfill(4)
+            codigo_fabricante = texto_celula(produto_row.get('CODFAB'), '001').zfill(3)
+            descricao_produto = texto_celula(produto_row.get('DESCR'), descricao_produto)
+
+        classe_row = self.indices['classes'].get(codigo_grupo)
+        if classe_row:
+            descricao_grupo = texto_celula(classe_row.get('DESCR'), descricao_grupo)
+
+        fabricante_row = self.indices['fabricantes'].get(codigo_fabricante)
+        if fabricante_row:
+            descricao_fabricante = texto_celula(fabricante_row.get('DESCR'), descricao_fabricante)
+
+        return {
+            'codigo_grupo': codigo_grupo,
+            'codigo_fabricante': codigo_fabricante,
+            'descricao_produto': descricao_produto,
+            'descricao_grupo': descricao_grupo,
+            'descricao_fabricante': descricao_fabricante,
+        }
+
+
+# ===== IMPORTADOR =====
+
+class ImportadorBI:
+    """
+    Importa a planilha BI em lotes, mantendo os mapas de dimensões entre lotes
+
+    Uso:
+        importador = ImportadorBI(planilhas_aux)
+        importador.processar_lote(df_bi)
+        resultado = importador.resultado()
+
+    `substituicao` (ver SUBSTITUICOES) define o que sai da base antes das inserções:
+    'periodos' remove as vendas de cada ANOMES antes da primeira inserção daquele mês
+    e 'tudo' zera a tabela no primeiro lote. Quem chama deve envolver a importação
+    em uma transação (ver executar_importacao_bi).
+
+    As linhas dos meses em `periodos_ignorados` (impressão digital igual à da última
+    carga) são descartadas antes da normalização.
+    """
+
+    # Modo de gravação das vendas (ver MODOS_CARGA); subclasses definem o seu
+    modo = 'orm'
+
+    def __init__(self, planilhas_aux=None, tamanho_lote=TAMANHO_LOTE_VENDAS, callback_progresso=None,
+                 substituicao='acrescentar', periodos_ignorados=()):
+        self.planilhas_aux = planilhas_aux or {}
+        self.auxiliares = TabelasAuxiliares(self.planilhas_aux)  # índices montados uma vez
+        self.tamanho_lote = tamanho_lote
+        self.callback_progresso = callback_progresso
+        self.substituicao = substituicao
+        self.periodos = set()  # ANOMES (YYYYMM) importados
+        self.periodos_ignorados = set(periodos_ignorados)
+        self.impressao_digital = ImpressaoDigitalPeriodos()
+
+        # ===== MAPAS DE DIMENSÕES =====
+        self.clientes_por_documento = {}    # documento (só dígitos) → id
+        self.produtos = {}                  # código → (grupo_id, fabricante_id)
+        self.grupos = set()
+        self.fabricantes = set()
+        self.lojas = set()
+        self.vendedores = set()
+
+        # ===== CONTADORES =====
+        self.contadores = {
+            'total_registros': 0,
+            'vendas_criadas': 0,
+            'clientes_criados': 0,
+            'produtos_criados': 0,
+            'grupos_criados': 0,
+            'fabricantes_criados': 0,
+            'vendedores_criados': 0,
+            'lojas_criadas': 0,
+            'vendas_removidas': 0,
+            'registros_ignorados': 0,
+        }
+        self.erros = []
+
+    # ===== API PÚBLICA =====
+
+    def processar_lote(self, df_bi):
+        """
+        Processa um DataFrame (lote) da planilha BI.
+        O índice do DataFrame é usado para numerar as linhas nos erros (índice + 2).
+        """
+        df_bi = df_bi.copy()
+        df_bi.columns = df_bi.columns.astype(str).str.strip().str.upper()
+        self.contadores['total_registros'] += len(df_bi)
+
+        anomes = self.impressao_digital.atualizar(df_bi)
+        if self.periodos_ignorados:
+            ignorar = anomes.isin(self.periodos_ignorados)
+            self.contadores['registros_ignorados'] += int(ignorar.sum())
+            df_bi = df_bi[~ignorar]
+
+        linhas = self._normalizar_linhas(df_bi)
+        if not linhas:
+            return
+
+        self._resolver_clientes(linhas)
+        self._resolver_produtos(linhas)
+        self._resolver_lojas_vendedores(linhas)
+        self._registrar_periodos(linhas)
+        self._inserir_vendas(linhas)
+
+    def finalizar(self):
+        """Conclui a importação (o bulk_create já gravou tudo; subclasses podem sobrescrever)"""
+
+    def descartar(self):
+        """Libera recursos de uma importação interrompida por erro"""
+
+    def resultado(self):
+        """Retorna os contadores, os períodos (importados e ignorados), as impressões digitais e os erros"""
+        return {
+            **self.contadores,
+            'periodos': sorted(self.periodos),
+            'periodos_ignorados': sorted(self.periodos_ignorados),
+            'digests_periodos': self.impressao_digital.digests(),
+            'registros_por_periodo': dict(self.impressao_digital.registros),
+            'erros': list(self.erros),
+        }
+
+    def registros_feitos(self):
+        """Linhas já tratadas (gravadas, com erro ou ignoradas), usadas no progresso"""
+        return self.contadores['vendas_criadas'] + len(self.erros) + self.contadores['registros_ignorados']
+
+    # ===== SUBSTITUIÇÃO POR PERÍODO =====
+
+    def _registrar_periodos(self, linhas):
+        """Guarda os ANOMES do lote e remove as vendas que serão substituídas"""
+        primeiro_lote = not self.periodos
+        novos = {dados['anomes'] for dados in linhas} - self.periodos
+        if not novos:
+            return
+
+        self.periodos |= novos
+        if self.substituicao == 'tudo' and primeiro_lote:
+            self._remover_vendas(Vendas.objects.all(), 'Base anterior zerada')
+        elif self.substituicao == 'periodos':
+            self._remover_vendas(
+                Vendas.objects.filter(anomes__in=sorted(novos)), f"Períodos {', '.join(sorted(novos))}"
+            )
+
+    def _remover_vendas(self, queryset, descricao):
+        removidas, _ = queryset.delete()
+        self.contadores['vendas_removidas'] += removidas
+        logger.info(f"🗑️ {descricao}: {removidas} vendas removidas")
+
+    # ===== NORMALIZAÇÃO =====
+
+    def _normalizar_linhas(self, df_bi):
+        """Converte o lote em dicionários tipados (normalização vetorizada), registrando erros"""
+        df_normalizado, df_erros = normalizar_frame(df_bi)
+        self.erros.extend(f"Linha {linha}: {erro}" for linha, erro in zip(df_erros['linha'], df_erros['erro']))
+        return df_normalizado.to_dict('records')
+
+    # ===== DIMENSÕES =====
+
+    def _resolver_clientes(self, linhas):
+        """Mapeia documento → cliente (busca exata em cpf_cnpj_numerico) e cria os clientes novos"""
+        documentos = {dados['documento'] for dados in linhas} - self.clientes_por_documento.keys()
+        if not documentos:
+            return
+        self._buscar_clientes(documentos)
+
+        novos = {}
+        for dados in linhas:
+            documento = dados['documento']
+            if documento in self.clientes_por_documento or documento in novos:
+                continue
+
+            codigo_cliente = documento[:10] if len(documento) >= 10 else documento.ljust(10, '0')
+            novos[documento] = Cliente(
+                codigo=codigo_cliente,
+                nome=dados['nome_cliente'][:100],
+                status='rascunho',
+                cpf_cnpj=documento,
+                cpf_cnpj_numerico=documento,  # bulk_create não passa pelo save()
+                codigo_grupo=codigo_cliente,
+                nome_busca=Cliente.texto_busca(codigo_cliente, dados['nome_cliente'][:100]),
+                tipo_documento='cnpj' if len(documento) == 14 else 'cpf',
+                codigo_loja=dados['codigo_loja'],
+                codigo_vendedor=dados['codigo_vendedor'],
+                uf=dados['uf'],
+            )
+
+        if not novos:
+            return
+
+        # Conflitos de código (ex: filiais com a mesma raiz de CNPJ) são ignorados;
+        # as linhas desses documentos ficam como "Cliente não encontrado/criado"
+        Cliente.objects.bulk_create(novos.values(), batch_size=self.tamanho_lote, ignore_conflicts=True)
+        self.contadores['clientes_criados'] += self._buscar_clientes(novos)
+
+    def _buscar_clientes(self, documentos):
+        """
+        Completa o mapa documento → id pelo índice de cpf_cnpj_numerico
+        (documento repetido em vários clientes: fica o mais antigo)
+        """
+        encontrados = 0
+        for bloco in em_blocos(documentos):
+            consulta = Cliente.objects.filter(cpf_cnpj_numerico__in=bloco).order_by('id').values_list(
+                'cpf_cnpj_numerico', 'id'
+            )
+            for documento, cliente_id in consulta:
+                if documento not in self.clientes_por_documento:
+                    self.clientes_por_documento[documento] = cliente_id
+                    encontrados += 1
+        return encontrados
+
+    def _resolver_produtos(self, linhas):
+        """Mapeia código → produto, criando produtos/grupos/fabricantes faltantes"""
+        codigos = {dados['codigo_produto'] for dados in linhas} - self.produtos.keys()
+        if not codigos:
+            return
+
+        for bloco in em_blocos(codigos):
+            consulta = Produto.objects.filter(codigo__in=bloco).values_list('codigo', 'grupo_id', 'fabricante_id')
+            for codigo, grupo_id, fabricante_id in consulta:
+                self.produtos[codigo] = (grupo_id, fabricante_id)
+
+        faltantes = {}
+        for dados in linhas:
+            codigo = dados['codigo_produto']
+            if codigo not in self.produtos and codigo not in faltantes:
+                faltantes[codigo] = self.auxiliares.dados_produto(codigo, dados['descricao_produto'])
+
+        if not faltantes:
+            return
+
+        grupos = {}
+        fabricantes = {}
+        for info in faltantes.values():
+            grupos.setdefault(info['codigo_grupo'], {'descricao': info['descricao_grupo'][:100]})
+            fabricantes.setdefault(info['codigo_fabricante'], {'descricao': info['descricao_fabricante'][:100]})
+
+        self._garantir_registros(GrupoProduto, grupos, self.grupos, 'grupos_criados')
+        self._garantir_registros(Fabricante, fabricantes, self.fabricantes, 'fabricantes_criados')
+
+        produtos = {
+            codigo: {
+                'descricao': info['descricao_produto'][:200],
+                'grupo_id': info['codigo_grupo'],
+                'fabricante_id': info['codigo_fabricante'],
+            }
+            for codigo, info in faltantes.items()
+        }
+        self._garantir_registros(Produto, produtos, set(), 'produtos_criados')
+
+        for codigo, info in faltantes.items():
+            self.produtos[codigo] = (info['codigo_grupo'], info['codigo_fabricante'])
+
+    def _resolver_lojas_vendedores(self, linhas):
+        """Cria (em lote) as lojas e vendedores que aparecem no lote"""
+        lojas = {}
+        vendedores = {}
+        for dados in linhas:
+            codigo_loja = dados['codigo_loja']
+            lojas.setdefault(codigo_loja, {'nome': f'Loja {codigo_loja}'})
+            vendedores.setdefault(dados['codigo_vendedor'], {
+                'nome': dados['nome_vendedor'][:100],
+                'loja_id': codigo_loja,
+            })
+
+        self._garantir_registros(Loja, lojas, self.lojas, 'lojas_criadas')
+        criados = self._garantir_registros(Vendedor, vendedores, self.vendedores, 'vendedores_criados')
+
+        # bulk_create não dispara os sinais que limpam o cache de nomes de vendedor
+        if criados:
+            cache.delete_many(
+                [f'vendedor_nome_{codigo}' for codigo in criados] +
+                [f'vendedor_obj_{codigo}' for codigo in criados]
+            )
+
+    def _garantir_registros(self, modelo, registros, conhecidos, contador):
+        """
+        Garante que os registros (pk → campos) existam, criando os faltantes em lote.
+        Retorna a lista de códigos criados.
+        """
+        codigos = set(registros) - conhecidos
+        if not codigos:
+            return []
+
+        existentes = set()
+        for bloco in em_blocos(codigos):
+            existentes.update(modelo.objects.filter(pk__in=bloco).values_list('pk', flat=True))
+
+        criar = sorted(codigos - existentes)
+        if criar:
+            modelo.objects.bulk_create(
+                [modelo(pk=codigo, **registros[codigo]) for codigo in criar],
+                batch_size=self.tamanho_lote,
+                ignore_conflicts=True,
+            )
+            self.contadores[contador] += len(criar)
+
+        conhecidos.update(codigos)
+        return criar
+
+    # ===== VENDAS =====
+
+    def _inserir_vendas(self, linhas):
+        """Monta os objetos Vendas e grava em lotes de `tamanho_lote`"""
+        lote = []
+        for dados in linhas:
+            cliente_id = self.clientes_por_documento.get(dados['documento'])
+            if not cliente_id:
+                self.erros.append(f"Linha {dados['linha']}: Cliente não encontrado/criado")
+                continue
+
+            produto = self.produtos.get(dados['codigo_produto'])
+            if not produto:
+                self.erros.append(f"Linha {dados['linha']}: Produto não encontrado/criado")
+                continue
+
+            grupo_id, fabricante_id = produto
+            venda = Vendas(
+                data_venda=dados['data_venda'],
+                cliente_id=cliente_id,
+                produto_id=dados['codigo_produto'],
+                grupo_produto_id=grupo_id,
+                fabricante_id=fabricante_id,
+                loja_id=dados['codigo_loja'],
+                quantidade=dados['quantidade'],
+                valor_total=dados['valor_total'],
+                numero_nf=dados['numero_nf'],
+                estado=dados['uf'],
+                vendedor_nf=dados['vendedor_nf'],
+            )
+            venda.preencher_campos_periodo()
+            lote.append((dados['linha'], venda))
+
+            if len(lote) >= self.tamanho_lote:
+                self._gravar_vendas(lote)
+                lote = []
+
+        if lote:
+            self._gravar_vendas(lote)
+
+    def _gravar_vendas(self, lote):
+        """Grava um lote de vendas; se o INSERT falhar, grava linha a linha para isolar os erros"""
+        try:
+            with transaction.atomic():
+                Vendas.objects.bulk_create([venda for _, venda in lote], batch_size=self.tamanho_lote)
+            self.contadores['vendas_criadas'] += len(lote)
+        except Exception as e:
+            logger.warning(f"Lote de {len(lote)} vendas falhou ({str(e)}); gravando linha a linha")
+            for numero_linha, venda in lote:
+                try:
+                    with transaction.atomic():
+                        Vendas.objects.bulk_create([venda])
+                    self.contadores['vendas_criadas'] += 1
+                except Exception as erro:
+                    self.erros.append(f"Linha {numero_linha}: {str(erro)}")
+
+        if self.callback_progresso:
+            self.callback_progresso(self.registros_feitos())
+
+
+# ===== EXECUÇÃO COMPLETA (VIEW E MANAGEMENT COMMAND) =====
+
+def criar_importador(modo_carga='orm', planilhas_aux=None, **kwargs):
+    """Cria o importador do modo escolhido (COPY só existe no PostgreSQL)"""
+    if modo_carga == 'copy':
+        if connection.vendor == 'postgresql':
+            from core.services.importacao_copy import ImportadorBICopy
+            return ImportadorBICopy(planilhas_aux, **kwargs)
+        logger.warning("Carga via COPY disponível apenas no PostgreSQL; usando bulk_create")
+    return ImportadorBI(planilhas_aux, **kwargs)
+
+
+class ProgressoImportacao:
+    """
+    Callback de progresso que grava no LogSincronizacao os registros feitos,
+    a taxa e a previsão de término (no máximo uma vez a cada `intervalo` segundos)
+    """
+
+    def __init__(self, log_sync, total_estimado=None, intervalo=INTERVALO_PROGRESSO):
+        self.log_sync = log_sync
+        self.total_estimado = total_estimado
+        self.intervalo = intervalo
+        self.inicio = time.monotonic()
+        self.ultima_gravacao = self.inicio
+        self.conexao_propria = None
+
+    def __call__(self, registros_feitos):
+        agora = time.monotonic()
+        if agora - self.ultima_gravacao < self.intervalo:
+            return
+        self.ultima_gravacao = agora
+
+        taxa = registros_feitos / max(agora - self.inicio, 0.001)
+        previsao = None
+        if self.total_estimado and taxa > 0 and self.total_estimado > registros_feitos:
+            previsao = timezone.now() + timedelta(seconds=(self.total_estimado - registros_feitos) / taxa)
+
+        self._gravar(registros_feitos, round(taxa, 1), previsao)
+
+    def _gravar(self, registros_feitos, taxa, previsao):
+        if not connection.in_atomic_block:
+            LogSincronizacao.objects.filter(pk=self.log_sync.pk).update(
+                registros_processados=registros_feitos,
+                registros_por_segundo=taxa,
+                previsao_termino=previsao,
+                ultima_atividade=timezone.now(),
+            )
+            return
+
+        # Dentro da transação da importação o UPDATE só apareceria no commit:
+        # usa uma conexão própria (autocommit) para o polling enxergar o progresso.
+        # No SQLite não há segundo escritor simultâneo, então o progresso fica para o final.
+        if connection.vendor == 'sqlite':
+            return
+        if self.conexao_propria is None:
+            self.conexao_propria = connections.create_connection(DEFAULT_DB_ALIAS)
+        with self.conexao_propria.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {LogSincronizacao._meta.db_table} "
+                "SET registros_processados = %s, registros_por_segundo = %s, previsao_termino = %s, "
+                "ultima_atividade = %s WHERE id = %s",
+                [registros_feitos, taxa, previsao, timezone.now(), self.log_sync.pk],
+            )
+
+    def fechar(self):
+        if self.conexao_propria is not None:
+            self.conexao_propria.close()
+            self.conexao_propria = None
+
+
+def executar_importacao_bi(lotes, planilhas_aux=None, modo_carga='orm', usuario=None,
+                           log_sync=None, total_estimado=None, substituicao='acrescentar',
+                           periodos_ignorados=(), md5_arquivo=None):
+    """
+    Executa a importação completa da planilha BI registrando o LogSincronizacao
+    (incluindo a taxa de registros por segundo)
+
+    `lotes` pode ser um DataFrame único ou um iterável de DataFrames (ex: LeitorBI.lotes()).
+    `log_sync` permite reaproveitar o registro de um job já criado (ver jobs_importacao).
+    `substituicao` 'periodos'/'tudo' remove as vendas antigas na mesma transação das
+    inserções: se a importação falhar, a base continua como estava.
+    `periodos_ignorados` e `md5_arquivo` vêm da impressão digital (ver importar_arquivo_bi).
+    """
+    if isinstance(lotes, pd.DataFrame):
+        total_estimado = total_estimado or len(lotes)
+        lotes = [lotes]
+
+    if log_sync is None:
+        log_sync = LogSincronizacao.objects.create(tipo='bi', status='iniciado', usuario=usuario)
+
+    progresso = ProgressoImportacao(log_sync, total_estimado)
+    importador = criar_importador(
+        modo_carga, planilhas_aux, callback_progresso=progresso, substituicao=substituicao,
+        periodos_ignorados=periodos_ignorados,
+    )
+    modo_efetivo = importador.modo
+
+    # No COPY a remoção e o INSERT ... SELECT já acontecem juntos em finalizar();
+    # no ORM a importação inteira precisa ser uma transação só
+    transacao_unica = modo_efetivo == 'orm' and substituicao != 'acrescentar'
+
+    log_sync.status = 'processando'
+    log_sync.ultima_atividade = timezone.now()
+    log_sync.registros_total = total_estimado
+    log_sync.mensagem = f'Importação BI ({modo_efetivo}) em andamento'
+    log_sync.save()
+    inicio = time.monotonic()
+
+    try:
+        with transaction.atomic() if transacao_unica else nullcontext():
+            for df_lote in lotes:
+                importador.processar_lote(df_lote)
+            importador.finalizar()
+
+            # Resumo mensal: só os meses gravados (ou tudo, quando a base foi zerada)
+            if substituicao == 'tudo':
+                linhas_resumo = ResumoVendasMensal.recalcular()
+                Cliente.atualizar_metricas()
+            else:
+                # Métricas só dos clientes com vendas nos meses gravados, antes (resumo
+                # ainda antigo: vendas substituídas) ou depois do recálculo
+                clientes_afetados = ResumoVendasMensal.clientes_dos_periodos(importador.periodos)
+                linhas_resumo = ResumoVendasMensal.recalcular(periodos=importador.periodos)
+                clientes_afetados |= ResumoVendasMensal.clientes_dos_periodos(importador.periodos)
+                # ... e dos clientes fora do arquivo cujas janelas de 30/90/365 dias venceram
+                clientes_afetados |= Cliente.clientes_com_janelas_vencidas()
+                for bloco in em_blocos(sorted(clientes_afetados)):
+                    Cliente.atualizar_metricas(clientes=bloco)
+            VersaoDados.incrementar()  # invalida os caches de relatórios
+    except Exception as e:
+        importador.descartar()
+        log_sync.status = 'erro'
+        log_sync.mensagem = f'Erro na importação BI ({modo_efetivo}): {str(e)}'
+        log_sync.previsao_termino = None
+        log_sync.data_termino = timezone.now()
+        log_sync.save()
+        raise
+    finally:
+        progresso.fechar()
+
+    resultado = importador.resultado()
+    duracao = max(time.monotonic() - inicio, 0.001)
+    resultado['modo_carga'] = modo_efetivo
+    resultado['substituicao'] = substituicao
+    resultado['duracao_segundos'] = duracao
+    resultado['registros_por_segundo'] = resultado['total_registros'] / duracao
+    resultado['linhas_resumo'] = linhas_resumo
+    resultado['log_id'] = log_sync.id
+
+    log_sync.registros_processados = resultado['total_registros']
+    log_sync.registros_criados = resultado['vendas_criadas']
+    log_sync.registros_com_erro = len(resultado['erros'])
+    log_sync.registros_por_segundo = round(resultado['registros_por_segundo'], 1)
+    log_sync.status = 'concluido' if not resultado['erros'] else 'concluido_com_erros'
+    log_sync.previsao_termino = None
+    log_sync.data_termino = timezone.now()
+    resumo = [f'Importação BI ({modo_efetivo}) em {duracao:.1f}s']
+    if substituicao == 'periodos' and resultado['periodos']:
+        resumo.append(
+            f"Períodos substituídos: {', '.join(resultado['periodos'])} "
+            f"({resultado['vendas_removidas']} vendas antigas removidas)"
+        )
+    elif substituicao == 'tudo':
+        resumo.append(f"Base anterior zerada: {resultado['vendas_removidas']} vendas removidas")
+    if resultado['periodos_ignorados']:
+        resumo.append(
+            f"Períodos sem alteração (mantidos): {', '.join(resultado['periodos_ignorados'])} "
+            f"({resultado['registros_ignorados']} linhas ignoradas)"
+        )
+    log_sync.mensagem = '\n'.join(resumo + resultado['erros'][:20])
+    log_sync.resultado = {
+        **{chave: valor for chave, valor in resultado.items() if chave != 'erros'},
+        'erros': resultado['erros'][:ERROS_NO_RESULTADO],
+    }
+    log_sync.md5_hash = md5_arquivo
+    log_sync.save()
+
+    registrar_impressoes(resultado['digests_periodos'], resultado['registros_por_periodo'], log_sync, substituicao)
+
+    logger.info(
+        f"📥 Importação BI ({modo_efetivo}): {resultado['vendas_criadas']} vendas em {duracao:.1f}s "
+        f"({resultado['registros_por_segundo']:.0f} registros/s)"
+    )
+    return resultado
+
+
+def importar_arquivo_bi(caminho, modo_carga='orm', substituicao='acrescentar', usuario=None, log_sync=None,
+                        forcar=False, md5_arquivo=None, tamanho_lote=TAMANHO_LOTE_LEITURA):
+    """
+    Importa um arquivo BI em disco usando a impressão digital (MD5) para evitar retrabalho:
+    - arquivo idêntico a uma importação anterior, com os meses inalterados desde então: ignorado;
+    - modo 'periodos': só os meses com impressão digital diferente são reprocessados.
+    `forcar` importa tudo mesmo assim.
+    """
+    md5_arquivo = md5_arquivo or calcular_md5_arquivo(caminho)
+
+    if not forcar:
+        anterior = importacao_identica(md5_arquivo, substituicao)
+        if anterior:
+            return _registrar_arquivo_identico(anterior, md5_arquivo, usuario, log_sync)
+
+    periodos_ignorados = set()
+    if not forcar and substituicao == 'periodos' and PeriodoImportado.objects.exists():
+        # Pré-leitura: MD5 de cada mês do arquivo para comparar com a última carga
+        with LeitorBI(caminho, tamanho_lote=tamanho_lote) as leitor:
+            periodos_ignorados = periodos_inalterados(calcular_impressoes_periodos(leitor.lotes()))
+        if periodos_ignorados:
+            logger.info(f"🔏 Períodos sem alteração: {', '.join(sorted(periodos_ignorados))}")
+
+    with LeitorBI(caminho, tamanho_lote=tamanho_lote) as leitor:
+        return executar_importacao_bi(
+            leitor.lotes(), leitor.planilhas_aux, modo_carga=modo_carga, usuario=usuario,
+            log_sync=log_sync, total_estimado=leitor.total_linhas, substituicao=substituicao,
+            periodos_ignorados=periodos_ignorados, md5_arquivo=md5_arquivo,
+        )
+
+
+def _registrar_arquivo_identico(anterior, md5_arquivo, usuario=None, log_sync=None):
+    """Conclui o job sem importar nada: o arquivo já está carregado"""
+    if log_sync is None:
+        log_sync = LogSincronizacao.objects.create(tipo='bi', status='iniciado', usuario=usuario)
+
+    resultado = {
+        'arquivo_identico': True,
+        'importacao_anterior': anterior.id,
+        'periodos': sorted((anterior.resultado or {}).get('digests_periodos', {})),
+        'erros': [],
+    }
+    log_sync.status = 'concluido'
+    log_sync.md5_hash = md5_arquivo
+    log_sync.mensagem = (
+        f"Arquivo idêntico à importação #{anterior.id} ({anterior.data_inicio:%d/%m/%Y %H:%M}) "
+        f"e sem alterações desde então: nada foi importado. Use a opção de forçar para reimportar."
+    )
+    log_sync.resultado = {chave: valor for chave, valor in resultado.items() if chave != 'erros'}
+    log_sync.previsao_termino = None
+    log_sync.data_termino = timezone.now()
+    log_sync.save()
+
+    logger.info(f"⏭️ Importação BI ignorada: arquivo idêntico à importação #{anterior.id}")
+    return resultado
@@ -0,0 +1,223 @@
+# core/services/importacao_copy.py
+
+"""
+Carga rápida de vendas via COPY (somente PostgreSQL)
+
+As dimensões continuam sendo resolvidas pelo ImportadorBI; apenas a gravação das
+vendas muda:
+1. as linhas normalizadas são enviadas com COPY FROM STDIN para uma tabela
+   UNLOGGED de staging, em blocos de tamanho fixo (memória constante);
+2. no final, um único INSERT ... SELECT move tudo para `vendas`, fazendo o join
+   com clientes/produtos/lojas e calculando ano/mes/anomes no próprio SQL.
+
+Quando a importação substitui vendas (por período ou a base toda), o DELETE roda
+na mesma transação do INSERT ... SELECT.
+"""
+
+import csv
+import io
+import logging
+import uuid
+
+from django.db import connection, transaction
+
+from core.models import Cliente, Loja, Produto, Vendas
+from core.services.importacao_bi import ImportadorBI
+
+logger = logging.getLogger(__name__)
+
+# Linhas enviadas por comando COPY
+TAMANHO_LOTE_COPY = 50000
+
+COLUNAS_STAGING = [
+    'linha', 'cliente_id', 'codigo_produto', 'codigo_loja', 'vendedor_nf',
+    'data_venda', 'quantidade', 'valor_total', 'numero_nf', 'estado',
+]
+
+# Mesmos limites dos campos de Vendas (DecimalField 10,2 / 12,2 e numero_nf 20)
+VALIDACAO_STAGING = (
+    "abs(s.quantidade) < 100000000 AND abs(s.valor_total) < 10000000000 "
+    "AND length(s.numero_nf) <= 20"
+)
+
+
+def _tabela(modelo):
+    """Nome (já entre aspas) da tabela do modelo, para o SQL montado à mão"""
+    return connection.ops.quote_name(modelo._meta.db_table)
+
+
+def _copiar(cursor, sql, buffer):
+    """Executa COPY FROM STDIN com psycopg2 ou psycopg 3"""
+    if hasattr(cursor, 'copy_expert'):
+        cursor.copy_expert(sql, buffer)
+    else:
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+
+class ImportadorBICopy(ImportadorBI):
+    """ImportadorBI que grava as vendas via COPY + INSERT ... SELECT"""
+
+    modo = 'copy'
+
+    def __init__(self, planilhas_aux=None, tamanho_lote=TAMANHO_LOTE_COPY, callback_progresso=None,
+                 substituicao='acrescentar', periodos_ignorados=()):
+        super().__init__(planilhas_aux, tamanho_lote=tamanho_lote, callback_progresso=callback_progresso,
+                         substituicao=substituicao, periodos_ignorados=periodos_ignorados)
+        self.tabela_staging = None
+        self.linhas_staging = 0
+
+    # ===== STAGING =====
+
+    def _criar_staging(self):
+        self.tabela_staging = f"{Vendas._meta.db_table}_staging_{uuid.uuid4().hex[:12]}"
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                CREATE UNLOGGED TABLE {self.tabela_staging} (
+                    linha integer NOT NULL,
+                    cliente_id bigint NOT NULL,
+                    codigo_produto text NOT NULL,
+                    codigo_loja text NOT NULL,
+                    vendedor_nf text NOT NULL,
+                    data_venda date NOT NULL,
+                    quantidade numeric NOT NULL,
+                    valor_total numeric NOT NULL,
+                    numero_nf text NOT NULL,
+                    estado text NOT NULL
+                )
+            """)
+
+    def _remover_staging(self):
+        if self.tabela_staging:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {self.tabela_staging}")
+            self.tabela_staging = None
+
+    def _enviar_copy(self, buffer, quantidade):
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            _copiar(
+                cursor,
+                f"COPY {self.tabela_staging} ({', '.join(COLUNAS_STAGING)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        self.linhas_staging += quantidade
+
+        if self.callback_progresso:
+            self.callback_progresso(self.registros_feitos())
+
+    def registros_feitos(self):
+        """Antes do INSERT ... SELECT o progresso é medido pelas linhas enviadas à staging"""
+        return self.linhas_staging + len(self.erros) + self.contadores['registros_ignorados']
+
+    def _inserir_vendas(self, linhas):
+        """Envia as linhas do lote para a staging (em vez de bulk_create)"""
+        if self.tabela_staging is None:
+            self._criar_staging()
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)  # aspas: '' fica vazio, não NULL
+        pendentes = 0
+
+        for dados in linhas:
+            cliente_id = self.clientes_por_documento.get(dados['documento'])
+            if not cliente_id:
+                self.erros.append(f"Linha {dados['linha']}: Cliente não encontrado/criado")
+                continue
+
+            writer.writerow([
+                dados['linha'], cliente_id, dados['codigo_produto'], dados['codigo_loja'],
+                dados['vendedor_nf'], dados['data_venda'].isoformat(), dados['quantidade'],
+                dados['valor_total'], dados['numero_nf'], dados['uf'],
+            ])
+            pendentes += 1
+
+            if pendentes >= self.tamanho_lote:
+                self._enviar_copy(buffer, pendentes)
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+                pendentes = 0
+
+        if pendentes:
+            self._enviar_copy(buffer, pendentes)
+
+    def _remover_vendas(self, queryset, descricao):
+        """A remoção fica para finalizar(), junto com o INSERT ... SELECT"""
+
+    # ===== CARGA FINAL =====
+
+    def _remover_substituidas(self, cursor, tabela):
+        if self.substituicao == 'tudo':
+            cursor.execute(f"DELETE FROM {_tabela(Vendas)}")
+        elif self.substituicao == 'periodos':
+            cursor.execute(f"""
+                DELETE FROM {_tabela(Vendas)}
+                WHERE anomes IN (SELECT DISTINCT to_char(data_venda, 'YYYYMM') FROM {tabela})
+            """)
+        else:
+            return
+        self.contadores['vendas_removidas'] += cursor.rowcount
+        logger.info(f"🗑️ COPY ({self.substituicao}): {cursor.rowcount} vendas removidas")
+
+    def descartar(self):
+        """Remove a staging de uma importação interrompida"""
+        self._remover_staging()
+
+    def finalizar(self):
+        """Move a staging para `vendas` com um único INSERT ... SELECT"""
+        if self.tabela_staging is None:
+            return
+
+        tabela = self.tabela_staging
+        vendas, clientes, produtos, lojas = (_tabela(modelo) for modelo in (Vendas, Cliente, Produto, Loja))
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(f"ANALYZE {tabela}")
+
+                    # Linhas que não entrarão no INSERT (dimensão ausente ou valor fora do limite)
+                    cursor.execute(f"""
+                        SELECT s.linha, c.id IS NULL, p.codigo IS NULL, l.codigo IS NULL
+                        FROM {tabela} s
+                        LEFT JOIN {clientes} c ON c.id = s.cliente_id
+                        LEFT JOIN {produtos} p ON p.codigo = s.codigo_produto
+                        LEFT JOIN {lojas} l ON l.codigo = s.codigo_loja
+                        WHERE c.id IS NULL OR p.codigo IS NULL OR l.codigo IS NULL
+                           OR NOT ({VALIDACAO_STAGING})
+                        ORDER BY s.linha
+                    """)
+                    for linha, sem_cliente, sem_produto, sem_loja in cursor.fetchall():
+                        if sem_cliente:
+                            motivo = "Cliente não encontrado/criado"
+                        elif sem_produto:
+                            motivo = "Produto não encontrado/criado"
+                        elif sem_loja:
+                            motivo = "Loja não encontrada/criada"
+                        else:
+                            motivo = "Valores numéricos inválidos"
+                        self.erros.append(f"Linha {linha}: {motivo}")
+
+                    self._remover_substituidas(cursor, tabela)
+
+                    cursor.execute(f"""
+                        INSERT INTO {vendas} (
+                            loja_id, produto_id, cliente_id, grupo_produto_id, fabricante_id,
+                            vendedor_nf, data_venda, quantidade, valor_total, numero_nf, estado,
+                            anomes, ano, mes, data_importacao, origem_sistema
+                        )
+                        SELECT
+                            l.codigo, p.codigo, c.id, p.grupo_id, p.fabricante_id,
+                            s.vendedor_nf, s.data_venda, s.quantidade, s.valor_total, s.numero_nf, s.estado,
+                            to_char(s.data_venda, 'YYYYMM'), to_char(s.data_venda, 'YYYY'),
+                            to_char(s.data_venda, 'MM'), now(), 'BI'
+                        FROM {tabela} s
+                        JOIN {clientes} c ON c.id = s.cliente_id
+                        JOIN {produtos} p ON p.codigo = s.codigo_produto
+                        JOIN {lojas} l ON l.codigo = s.codigo_loja
+                        WHERE {VALIDACAO_STAGING}
+                    """)
+                    self.contadores['vendas_criadas'] += cursor.rowcount
+
+            logger.info(f"📥 COPY: {self.contadores['vendas_criadas']} vendas inseridas a partir de {self.linhas_staging} linhas")
+        finally:
+            self._remover_staging()
@@ -0,0 +1,130 @@
+# core/services/impressao_digital_bi.py
+
+"""
+Impressão digital (MD5) das planilhas BI importadas
+
+Operadores costumam reenviar a mesma exportação do SysFat, e cada envio refaz
+toda a remoção e recarga dos meses. Para evitar isso guardamos dois níveis de MD5
+(mesmo padrão do ArquivoRastreamento.md5_hash):
+- do arquivo inteiro, calculado enquanto o upload é gravado, em
+  LogSincronizacao.md5_hash;
+- das linhas de cada ANOMES, calculado lote a lote durante a leitura, em
+  PeriodoImportado (estado atual da base) e no resultado do log.
+
+Um arquivo cujo MD5 já foi importado e cujos meses continuam com as mesmas
+impressões digitais é ignorado; no modo 'periodos' só os meses com impressão
+digital diferente são reprocessados. Em ambos os casos há a opção de forçar.
+"""
+
+import hashlib
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+
+from core.models import LogSincronizacao, PeriodoImportado
+from core.services.normalizacao_bi import anomes_planilha
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_BLOCO_LEITURA = 1024 * 1024
+
+
+def calcular_md5_arquivo(caminho):
+    """MD5 de um arquivo em disco, lido em blocos"""
+    md5 = hashlib.md5()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO_LEITURA), b''):
+            md5.update(bloco)
+    return md5.hexdigest()
+
+
+class ImpressaoDigitalPeriodos:
+    """Acumula o MD5 das linhas brutas de cada ANOMES, lote a lote, na ordem do arquivo"""
+
+    def __init__(self):
+        self._hashes = {}
+        self.registros = defaultdict(int)
+
+    def atualizar(self, df_bi):
+        """Inclui um lote (colunas já normalizadas) e retorna o anomes de cada linha"""
+        anomes = anomes_planilha(df_bi)
+        cabecalho = ','.join(df_bi.columns).encode('utf-8')
+
+        for periodo, df_periodo in df_bi.groupby(anomes.values, sort=False):
+            if periodo not in self._hashes:
+                self._hashes[periodo] = hashlib.md5(cabecalho)
+            self._hashes[periodo].update(df_periodo.to_csv(index=False, header=False).encode('utf-8'))
+            self.registros[periodo] += len(df_periodo)
+
+        return anomes
+
+    def digests(self):
+        """{anomes: md5} dos períodos vistos até aqui"""
+        return {periodo: md5.hexdigest() for periodo, md5 in sorted(self._hashes.items())}
+
+
+def calcular_impressoes_periodos(lotes):
+    """Lê todos os lotes e retorna {anomes: md5} (pré-leitura do modo 'periodos')"""
+    impressao = ImpressaoDigitalPeriodos()
+    for df_lote in lotes:
+        df_lote.columns = df_lote.columns.astype(str).str.strip().str.upper()
+        impressao.atualizar(df_lote)
+    return impressao.digests()
+
+
+# ===== CONSULTAS =====
+
+def importacao_identica(md5_arquivo, substituicao):
+    """
+    Última importação concluída do mesmo arquivo cujos meses não mudaram desde então
+    (None se o arquivo precisa ser importado)
+    """
+    if not md5_arquivo:
+        return None
+
+    anteriores = LogSincronizacao.objects.filter(
+        tipo='bi', status__in=('concluido', 'concluido_com_erros'), md5_hash=md5_arquivo,
+    ).order_by('-data_inicio')
+
+    for log_anterior in anteriores[:10]:
+        digests = (log_anterior.resultado or {}).get('digests_periodos')
+        if not digests:
+            continue  # arquivo ignorado anteriormente ou log sem impressões digitais
+        if periodos_inalterados(digests) != set(digests):
+            return None
+        if substituicao == 'tudo' and PeriodoImportado.objects.exclude(anomes__in=list(digests)).exists():
+            return None  # a base tem outros meses que o 'tudo' removeria
+        return log_anterior
+    return None
+
+
+def periodos_inalterados(digests):
+    """Meses do arquivo cuja impressão digital é igual à da última carga"""
+    atuais = dict(
+        PeriodoImportado.objects.filter(anomes__in=list(digests)).values_list('anomes', 'md5_hash')
+    )
+    return {periodo for periodo, md5 in digests.items() if atuais.get(periodo) == md5}
+
+
+# ===== GRAVAÇÃO =====
+
+def registrar_impressoes(digests, registros, log_sync, substituicao):
+    """Atualiza PeriodoImportado após uma importação concluída"""
+    with transaction.atomic():
+        if substituicao == 'tudo':
+            PeriodoImportado.objects.all().delete()
+        else:
+            PeriodoImportado.objects.filter(anomes__in=list(digests)).delete()
+
+        # Acrescentar soma as linhas às que já existiam: o mês não corresponde mais a um arquivo só
+        if substituicao == 'acrescentar':
+            return
+
+        PeriodoImportado.objects.bulk_create([
+            PeriodoImportado(
+                anomes=periodo, md5_hash=md5, registros=registros.get(periodo, 0), log_sincronizacao=log_sync,
+            )
+            for periodo, md5 in digests.items()
+        ])
+    logger.info(f"🔏 Impressões digitais registradas: {', '.join(digests)}")
@@ -0,0 +1,208 @@
+# core/services/jobs_exportacao.py
+
+"""
+Exportação Excel em segundo plano
+
+Exportações grandes prendiam um worker web até o fim do download. Agora a view
+apenas cria o job (LogSincronizacao tipo 'exportacao', status 'pendente') e o
+enfileira, do mesmo jeito que a importação BI (core.services.jobs_importacao):
+- o worker gera a planilha num arquivo temporário, envia ao MinIO pelo
+  MinioService (que registra o ArquivoRastreamento) e grava no log o objeto gerado;
+- a página acompanha o job por polling (status_exportacao) e, ao terminar,
+  recebe o link pré-assinado de download.
+
+Reaproveitamento: o job é identificado (md5_hash) pelo relatório, pelos filtros
+canônicos e pela versão dos dados de vendas (VersaoDados). Enquanto a versão não
+muda, pedir a mesma exportação devolve o job já concluído (ou ainda em
+andamento) em vez de gerar outro arquivo.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.models import LogSincronizacao, VersaoDados
+from core.services.cache_relatorios import hash_filtros
+
+logger = logging.getLogger(__name__)
+
+# Exportações disponíveis: nome -> (função que grava o Excel e retorna o nº de linhas, prefixo do arquivo)
+# As funções ficam nas views de cada tela e são importadas só no worker
+EXPORTACOES = {
+    'relatorio_clientes': ('gestor.views.relatorio_clientes.exportar_relatorio_arquivo', 'relatorio_clientes'),
+    'vendas': ('gestor.views.vendas.exportar_vendas_arquivo', 'vendas'),
+}
+
+# Jobs pendentes/em processamento mais antigos que isso não são reaproveitados (considerados travados)
+TEMPO_MAXIMO_JOB = timedelta(hours=1)
+
+TIPO_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def chave_exportacao(nome, filtros, versao):
+    """Identificador da exportação: relatório + filtros canônicos + versão dos dados"""
+    return hashlib.md5(f'{nome}|v{versao}|{hash_filtros(filtros)}'.encode('utf-8')).hexdigest()
+
+
+# ===== AGENDAMENTO =====
+
+def _exportacao_reaproveitavel(chave):
+    """Job com a mesma chave já concluído (arquivo ainda rastreado) ou em andamento recente"""
+    from storage.models import ArquivoRastreamento
+
+    for log_sync in LogSincronizacao.objects.filter(tipo='exportacao', md5_hash=chave).order_by('-data_inicio'):
+        if log_sync.status == 'concluido':
+            arquivo_id = (log_sync.resultado or {}).get('arquivo_id')
+            if arquivo_id and ArquivoRastreamento.objects.filter(pk=arquivo_id).exists():
+                return log_sync
+        elif not log_sync.finalizado and log_sync.data_inicio >= timezone.now() - TEMPO_MAXIMO_JOB:
+            return log_sync
+    return None
+
+
+def agendar_exportacao(nome, filtros, usuario=None):
+    """
+    Cria (ou reaproveita) o job de exportação e o enfileira.
+    Retorna (log_sync, reaproveitado).
+    """
+    if nome not in EXPORTACOES:
+        raise ValueError(f"Exportação desconhecida: {nome}")
+
+    versao = VersaoDados.atual()
+    chave = chave_exportacao(nome, filtros, versao)
+
+    existente = _exportacao_reaproveitavel(chave)
+    if existente:
+        logger.info(f"♻️ Exportação '{nome}' reaproveitada (job {existente.id}, versão {versao})")
+        return existente, True
+
+    log_sync = LogSincronizacao.objects.create(
+        tipo='exportacao',
+        status='pendente',
+        usuario=usuario,
+        md5_hash=chave,
+        mensagem=f'Exportação {nome} aguardando processamento',
+        resultado={'exportacao': nome, 'filtros': filtros, 'versao_dados': versao},
+    )
+
+    # Só enfileira depois do commit, para o worker já encontrar o log
+    transaction.on_commit(lambda: _enfileirar(log_sync.id))
+    return log_sync, False
+
+
+def _enfileirar(log_id):
+    if settings.JOBS_EM_THREAD:
+        threading.Thread(
+            target=_executar_em_processo, args=(log_id,), name=f'exportacao-{log_id}', daemon=True,
+        ).start()
+        return
+
+    from core.tasks import exportar_excel_task
+    exportar_excel_task.delay(log_id)
+
+
+def _executar_em_processo(log_id):
+    """Sem broker (JOBS_EM_THREAD): roda o job na thread e fecha as conexões que ela abriu"""
+    try:
+        processar_exportacao(log_id)
+    except Exception:
+        pass  # já registrado no LogSincronizacao
+    finally:
+        connections.close_all()
+
+
+# ===== PROCESSAMENTO (WORKER) =====
+
+def processar_exportacao(log_id):
+    """Gera a planilha, envia ao MinIO e registra o arquivo no log do job"""
+    from storage.models import ArquivoRastreamento
+    from storage.services.minio_service import MinioService
+
+    log_sync = LogSincronizacao.objects.get(pk=log_id)
+    nome = log_sync.resultado['exportacao']
+    filtros = log_sync.resultado['filtros']
+    caminho_funcao, prefixo = EXPORTACOES[nome]
+
+    log_sync.status = 'processando'
+    log_sync.mensagem = f'Gerando exportação {nome}...'
+    log_sync.save(update_fields=['status', 'mensagem'])
+
+    descritor, caminho = tempfile.mkstemp(suffix='.xlsx')
+    os.close(descritor)
+    try:
+        linhas = import_string(caminho_funcao)(filtros, caminho)
+
+        # Um objeto por chave: um job anterior com o mesmo nome de objeto (ex.: que falhou depois
+        # do upload) não pode impedir o registro do novo arquivo
+        objeto = f'exportacoes/{nome}/{log_sync.md5_hash}.xlsx'
+        ArquivoRastreamento.objects.filter(path_minio=objeto).delete()
+        _, arquivo_id = MinioService().upload_file(caminho, object_name=objeto, content_type=TIPO_XLSX)
+
+        log_sync.status = 'concluido'
+        log_sync.registros_processados = linhas
+        log_sync.arquivo = objeto
+        log_sync.data_termino = timezone.now()
+        log_sync.mensagem = f'✅ Exportação concluída: {linhas} linhas'
+        log_sync.resultado = {
+            **log_sync.resultado,
+            'arquivo_id': arquivo_id,
+            'nome_arquivo': f"{prefixo}_{timezone.localtime().strftime('%Y%m%d_%H%M%S')}.xlsx",
+        }
+        log_sync.save()
+        logger.info(f"📤 Exportação '{nome}' enviada ao MinIO: {objeto} ({linhas} linhas)")
+        return log_sync
+    except Exception as e:
+        logger.exception(f"Erro no job de exportação {log_id}")
+        log_sync.status = 'erro'
+        log_sync.mensagem = f'Erro na exportação: {str(e)}'
+        log_sync.data_termino = timezone.now()
+        log_sync.save()
+        raise
+    finally:
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+
+# ===== CONSULTA DE PROGRESSO =====
+
+def link_download(log_sync):
+    """Link pré-assinado do arquivo gerado (None enquanto o job não terminar)"""
+    if log_sync.status != 'concluido' or not log_sync.arquivo:
+        return None
+    from storage.services.minio_service import MinioService
+
+    return MinioService().get_file_url(
+        log_sync.arquivo,
+        expires=settings.EXPORTACAO_LINK_EXPIRACAO,
+        download_name=(log_sync.resultado or {}).get('nome_arquivo'),
+    )
+
+
+def status_exportacao(log_sync):
+    """Dicionário com o andamento do job (usado pelo endpoint de polling)"""
+    url = None
+    mensagem = log_sync.mensagem
+    try:
+        url = link_download(log_sync)
+    except Exception as e:
+        logger.error(f"Erro ao gerar link da exportação {log_sync.id}: {str(e)}")
+        mensagem = 'Arquivo gerado, mas não foi possível gerar o link de download'
+
+    return {
+        'id': log_sync.id,
+        'status': log_sync.status,
+        'finalizado': log_sync.finalizado,
+        'exportacao': (log_sync.resultado or {}).get('exportacao'),
+        'linhas': log_sync.registros_processados,
+        'mensagem': mensagem,
+        'url': url,
+        'expira_em_segundos': settings.EXPORTACAO_LINK_EXPIRACAO if url else None,
+    }
@@ -0,0 +1,229 @@
+# core/services/jobs_importacao.py
+
+"""
+Importação BI em segundo plano
+
+A view apenas grava o arquivo enviado no diretório de spool, cria o
+LogSincronizacao do job (status 'pendente') e enfileira a tarefa. O progresso
+(registros feitos, taxa e previsão de término) é gravado no próprio log e
+consultado pela página via polling (status_importacao).
+
+Execução:
+- com CELERY_BROKER_URL configurado, a tarefa vai para a fila do Celery
+  (core.tasks.importar_bi_task);
+- sem broker (JOBS_EM_THREAD), o job roda em uma thread do próprio
+  processo, o que permite usar o sistema em um único servidor.
+
+Jobs abandonados: se o worker (ou o processo web, no modo thread) for reiniciado
+no meio do job, o log ficaria 'processando' para sempre e o arquivo no spool
+nunca seria apagado. O worker grava um batimento (ultima_atividade) ao pegar o
+job e a cada atualização de progresso; encerrar_jobs_abandonados() marca com erro
+os jobs sem batimento há mais de IMPORTACAO_TEMPO_MAXIMO_MINUTOS (ou ainda
+'pendente' há esse tempo, nunca pegos por um worker) e remove seus arquivos
+(e sobras do spool sem job). Roda a cada novo envio e pelo celery beat
+(core.tasks.encerrar_jobs_abandonados_task), nunca na consulta de progresso.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import LogSincronizacao
+
+logger = logging.getLogger(__name__)
+
+
+# ===== SPOOL DO ARQUIVO =====
+
+def salvar_upload(arquivo):
+    """Grava o arquivo enviado no diretório de spool e retorna (caminho, md5), com o MD5 calculado na gravação"""
+    from core.services.leitor_bi import EXTENSOES_SUPORTADAS
+
+    extensao = os.path.splitext(arquivo.name)[1].lower()
+    if extensao not in EXTENSOES_SUPORTADAS:
+        raise ValueError(f"Formato não suportado: {arquivo.name} (use {' ou '.join(EXTENSOES_SUPORTADAS)})")
+
+    os.makedirs(settings.IMPORTACAO_SPOOL_DIR, exist_ok=True)
+    caminho = os.path.join(settings.IMPORTACAO_SPOOL_DIR, f"{uuid.uuid4().hex}{extensao}")
+
+    md5 = hashlib.md5()
+    with open(caminho, 'wb') as destino:
+        for chunk in arquivo.chunks():
+            md5.update(chunk)
+            destino.write(chunk)
+    return caminho, md5.hexdigest()
+
+
+def _remover_arquivo(caminho):
+    try:
+        if caminho and os.path.exists(caminho):
+            os.remove(caminho)
+    except OSError as e:
+        logger.warning(f"Não foi possível remover {caminho}: {str(e)}")
+
+
+# ===== JOBS ABANDONADOS =====
+
+def encerrar_jobs_abandonados():
+    """
+    Marca com erro os jobs de importação sem sinal de vida há mais de
+    IMPORTACAO_TEMPO_MAXIMO_MINUTOS e remove os arquivos deles e as sobras do spool.
+    Retorna quantos jobs foram encerrados.
+
+    Um job em andamento é julgado pela ultima_atividade (batimento do worker), não
+    pelo início: importações longas que seguem gravando progresso não são encerradas.
+    data_inicio só vale para jobs ainda 'pendente', que nenhum worker pegou.
+    Obs.: no SQLite o progresso dentro da transação da importação só é gravado no
+    final (ver ProgressoImportacao), então o limite precisa cobrir a importação inteira.
+    """
+    limite = timezone.now() - timedelta(minutes=settings.IMPORTACAO_TEMPO_MAXIMO_MINUTOS)
+
+    nunca_pego = Q(status='pendente', data_inicio__lt=limite)
+    sem_batimento = ~Q(status='pendente') & (
+        Q(ultima_atividade__lt=limite) | Q(ultima_atividade__isnull=True, data_inicio__lt=limite)
+    )
+
+    # Só jobs com arquivo no spool: importações pela linha de comando não passam por aqui
+    abandonados = list(
+        LogSincronizacao.objects
+        .filter(nunca_pego | sem_batimento, tipo='bi', arquivo__isnull=False)
+        .exclude(status__in=LogSincronizacao.STATUS_FINALIZADOS)
+    )
+    for log_sync in abandonados:
+        motivo = ('sem ser iniciada pelo worker' if log_sync.status == 'pendente'
+                  else 'sem progresso (worker reiniciado?)')
+        log_sync.status = 'erro'
+        log_sync.mensagem = (f'Importação BI abandonada: {settings.IMPORTACAO_TEMPO_MAXIMO_MINUTOS} '
+                             f'minutos {motivo}')
+        log_sync.data_termino = timezone.now()
+        log_sync.save(update_fields=['status', 'mensagem', 'data_termino'])
+        _remover_arquivo(log_sync.arquivo)
+        logger.warning(f"⚠️ Job de importação BI {log_sync.id} abandonado: marcado com erro")
+
+    # Arquivos antigos do spool que nenhum job em andamento usa
+    if os.path.isdir(settings.IMPORTACAO_SPOOL_DIR):
+        em_uso = set(
+            LogSincronizacao.objects
+            .filter(tipo='bi', arquivo__isnull=False)
+            .exclude(status__in=LogSincronizacao.STATUS_FINALIZADOS)
+            .values_list('arquivo', flat=True)
+        )
+        for nome in os.listdir(settings.IMPORTACAO_SPOOL_DIR):
+            caminho = os.path.join(settings.IMPORTACAO_SPOOL_DIR, nome)
+            try:
+                antigo = os.path.getmtime(caminho) < limite.timestamp()
+            except OSError:
+                continue
+            if antigo and caminho not in em_uso:
+                _remover_arquivo(caminho)
+
+    return len(abandonados)
+
+
+# ===== AGENDAMENTO =====
+
+def agendar_importacao_bi(arquivo, modo_carga='orm', substituicao='periodos', usuario=None, forcar=False):
+    """Grava o upload, cria o job (LogSincronizacao) e enfileira o processamento"""
+    encerrar_jobs_abandonados()
+    caminho, md5_arquivo = salvar_upload(arquivo)
+
+    log_sync = LogSincronizacao.objects.create(
+        tipo='bi',
+        status='pendente',
+        usuario=usuario,
+        arquivo=caminho,
+        md5_hash=md5_arquivo,
+        mensagem=f'Importação BI aguardando processamento: {arquivo.name}',
+    )
+
+    # Só enfileira depois do commit, para o worker já encontrar o log
+    transaction.on_commit(lambda: _enfileirar(log_sync.id, caminho, modo_carga, substituicao, forcar))
+    return log_sync
+
+
+def _enfileirar(log_id, caminho, modo_carga, substituicao, forcar=False):
+    if settings.JOBS_EM_THREAD:
+        threading.Thread(
+            target=_executar_em_processo,
+            args=(log_id, caminho, modo_carga, substituicao, forcar),
+            name=f'importacao-bi-{log_id}',
+            daemon=True,
+        ).start()
+        return
+
+    from core.tasks import importar_bi_task
+    importar_bi_task.delay(log_id, caminho, modo_carga, substituicao, forcar)
+
+
+def _executar_em_processo(log_id, caminho, modo_carga, substituicao, forcar=False):
+    """Sem broker (JOBS_EM_THREAD): roda o job na thread e fecha as conexões que ela abriu"""
+    try:
+        processar_importacao_bi(log_id, caminho, modo_carga, substituicao, forcar)
+    except Exception:
+        pass  # já registrado no LogSincronizacao
+    finally:
+        connections.close_all()
+
+
+# ===== PROCESSAMENTO (WORKER) =====
+
+def processar_importacao_bi(log_id, caminho, modo_carga='orm', substituicao='periodos', forcar=False):
+    """Executa o job: lê o arquivo em lotes e importa, atualizando o LogSincronizacao"""
+    # Serviço (pandas) importado só no worker, não na carga das views
+    from core.services.importacao_bi import importar_arquivo_bi
+
+    log_sync = LogSincronizacao.objects.get(pk=log_id)
+
+    # Job pego pelo worker: a partir daqui vale o batimento, não o tempo na fila
+    # (a impressão digital do arquivo roda antes de executar_importacao_bi)
+    log_sync.status = 'processando'
+    log_sync.ultima_atividade = timezone.now()
+    log_sync.save(update_fields=['status', 'ultima_atividade'])
+
+    try:
+        return importar_arquivo_bi(
+            caminho, modo_carga=modo_carga, substituicao=substituicao, usuario=log_sync.usuario,
+            log_sync=log_sync, forcar=forcar, md5_arquivo=log_sync.md5_hash,
+        )
+    except Exception as e:
+        logger.exception(f"Erro no job de importação BI {log_id}")
+        if not log_sync.finalizado:
+            log_sync.status = 'erro'
+            log_sync.mensagem = f'Erro na importação BI: {str(e)}'
+            log_sync.data_termino = timezone.now()
+            log_sync.save()
+        raise
+    finally:
+        _remover_arquivo(caminho)
+
+
+# ===== CONSULTA DE PROGRESSO =====
+
+def status_importacao(log_sync):
+    """Dicionário com o andamento do job (usado pelo endpoint de polling)"""
+    return {
+        'id': log_sync.id,
+        'status': log_sync.status,
+        'finalizado': log_sync.finalizado,
+        'registros_processados': log_sync.registros_processados,
+        'registros_total': log_sync.registros_total,
+        'percentual': log_sync.percentual_concluido,
+        'registros_por_segundo': log_sync.registros_por_segundo,
+        'previsao_termino': log_sync.previsao_termino.isoformat() if log_sync.previsao_termino else None,
+        'segundos_restantes': (
+            max(int((log_sync.previsao_termino - timezone.now()).total_seconds()), 0)
+            if log_sync.previsao_termino else None
+        ),
+        'registros_criados': log_sync.registros_criados,
+        'registros_com_erro': log_sync.registros_com_erro,
+        'mensagem': log_sync.mensagem,
+        'resultado': log_sync.resultado,
+    }
@@ -0,0 +1,183 @@
+# core/services/leitor_bi.py
+
+"""
+Leitura em streaming da planilha BI (SysFat)
+
+Planilhas com centenas de milhares de linhas não cabem confortavelmente em um
+DataFrame único. O LeitorBI abre o arquivo uma única vez e:
+- .xlsx: usa o openpyxl em modo read_only (as linhas são lidas do XML sob
+  demanda) e, na mesma abertura, carrega as planilhas auxiliares
+  CLASSE/PRODUTOS/FABR, que são pequenas;
+- .csv: usa pd.read_csv com chunksize.
+
+As linhas da planilha principal são entregues em DataFrames de no máximo
+`tamanho_lote` linhas, com colunas normalizadas (strip + upper) e o índice igual
+à posição da linha de dados (a mesma numeração do pd.read_excel), para que o
+ImportadorBI continue reportando "Linha N" corretamente.
+
+Uso:
+    with LeitorBI(arquivo) as leitor:
+        for df_lote in leitor.lotes():
+            importador.processar_lote(df_lote)
+"""
+
+import logging
+
+import pandas as pd
+from openpyxl import load_workbook
+
+logger = logging.getLogger(__name__)
+
+# Linhas por DataFrame entregue ao importador
+TAMANHO_LOTE_LEITURA = 20000
+
+EXTENSOES_SUPORTADAS = ('.xlsx', '.csv')
+
+
+def classificar_planilha_auxiliar(nome_planilha):
+    """Identifica uma planilha auxiliar pelo nome ('classes'|'produtos'|'fabricantes' ou None)"""
+    sheet_upper = str(nome_planilha).upper().strip()
+
+    if sheet_upper in ['CLASSE', 'CLASSES'] or 'CLASS' in sheet_upper:
+        return 'classes'
+    if sheet_upper in ['PRODUTOS', 'PRODUTO'] or 'PRODUTO' in sheet_upper:
+        return 'produtos'
+    if sheet_upper in ['FABR', 'FABRICANTES'] or 'FABRIC' in sheet_upper:
+        return 'fabricantes'
+    return None
+
+
+def _normalizar_cabecalho(cabecalho):
+    return [str(coluna).strip().upper() if coluna is not None else '' for coluna in cabecalho]
+
+
+def _texto(valor):
+    """Célula do openpyxl → texto (equivalente ao dtype=str do pandas)"""
+    if valor is None:
+        return None
+    return str(valor)
+
+
+def _linha_vazia(valores):
+    return all(valor is None or (isinstance(valor, str) and not valor.strip()) for valor in valores)
+
+
+class LeitorBI:
+    """Lê a planilha BI em lotes com memória limitada"""
+
+    def __init__(self, arquivo, nome_arquivo=None, tamanho_lote=TAMANHO_LOTE_LEITURA):
+        self.arquivo = arquivo
+        self.nome_arquivo = (nome_arquivo or getattr(arquivo, 'name', None) or str(arquivo)).lower()
+        self.tamanho_lote = tamanho_lote
+
+        self.planilhas_aux = {}   # {'classes'|'produtos'|'fabricantes': DataFrame}
+        self.colunas = []         # cabeçalho normalizado da planilha principal
+        self.total_linhas = None  # estimativa de linhas de dados (None se desconhecida)
+
+        self._workbook = None
+        self._linhas_excel = None
+        self._leitor_csv = None
+        self._primeiro_chunk = None
+
+        if self.nome_arquivo.endswith('.xlsx'):
+            self._abrir_excel()
+        elif self.nome_arquivo.endswith('.csv'):
+            self._abrir_csv()
+        else:
+            raise ValueError(
+                f"Formato não suportado: {self.nome_arquivo} (use {' ou '.join(EXTENSOES_SUPORTADAS)})"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+    # ===== ABERTURA =====
+
+    def _abrir_excel(self):
+        self._workbook = load_workbook(self.arquivo, read_only=True, data_only=True)
+        nomes_planilhas = self._workbook.sheetnames
+        planilha_principal = self._workbook[nomes_planilhas[0]]
+
+        # Auxiliares na mesma abertura (a primeira planilha é sempre o BI)
+        for nome_planilha in nomes_planilhas[1:]:
+            chave = classificar_planilha_auxiliar(nome_planilha)
+            if chave and chave not in self.planilhas_aux:
+                self.planilhas_aux[chave] = self._ler_planilha_completa(self._workbook[nome_planilha])
+                logger.info(f"📋 Planilha auxiliar {nome_planilha} → {chave}: {len(self.planilhas_aux[chave])} registros")
+
+        self._linhas_excel = planilha_principal.iter_rows(values_only=True)
+        self.colunas = _normalizar_cabecalho(next(self._linhas_excel, None) or ())
+
+        # Em read_only o max_row vem da tag <dimension> (pode não existir)
+        if planilha_principal.max_row:
+            self.total_linhas = max(planilha_principal.max_row - 1, 0)
+
+    def _abrir_csv(self):
+        self._leitor_csv = pd.read_csv(
+            self.arquivo, encoding='utf-8', sep=',', dtype=str, chunksize=self.tamanho_lote
+        )
+        # Primeiro bloco lido já na abertura para conhecer as colunas
+        self._primeiro_chunk = next(self._leitor_csv, None)
+        if self._primeiro_chunk is not None:
+            self.colunas = _normalizar_cabecalho(self._primeiro_chunk.columns)
+
+    def _ler_planilha_completa(self, planilha):
+        linhas = planilha.iter_rows(values_only=True)
+        colunas = _normalizar_cabecalho(next(linhas, None) or ())
+        if not colunas:
+            return pd.DataFrame()
+
+        registros = [
+            [_texto(valor) for valor in linha[:len(colunas)]]
+            for linha in linhas if not _linha_vazia(linha)
+        ]
+        return pd.DataFrame(registros, columns=colunas)
+
+    # ===== LEITURA EM LOTES =====
+
+    def lotes(self):
+        """Gera DataFrames de até `tamanho_lote` linhas da planilha principal"""
+        if self._leitor_csv is not None:
+            yield from self._lotes_csv()
+        else:
+            yield from self._lotes_excel()
+        self.fechar()
+
+    def _lotes_csv(self):
+        chunk = self._primeiro_chunk
+        self._primeiro_chunk = None
+
+        while chunk is not None:
+            chunk.columns = self.colunas
+            yield chunk
+            chunk = next(self._leitor_csv, None)
+
+    def _lotes_excel(self):
+        quantidade_colunas = len(self.colunas)
+        indices, registros = [], []
+
+        for posicao, linha in enumerate(self._linhas_excel):
+            if _linha_vazia(linha):
+                continue
+
+            indices.append(posicao)
+            registros.append([_texto(valor) for valor in linha[:quantidade_colunas]])
+
+            if len(registros) >= self.tamanho_lote:
+                yield pd.DataFrame(registros, columns=self.colunas, index=indices)
+                indices, registros = [], []
+
+        if registros:
+            yield pd.DataFrame(registros, columns=self.colunas, index=indices)
+
+    def fechar(self):
+        """Fecha o arquivo (o openpyxl read_only mantém o arquivo aberto até aqui)"""
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+        if self._leitor_csv is not None:
+            self._leitor_csv.close()
+            self._leitor_csv = None
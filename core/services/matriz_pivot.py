@@ -0,0 +1,117 @@
+# core/services/matriz_pivot.py
+
+"""
+Motor de pivô (linhas × colunas) em NumPy para relatórios de faturamento
+
+Os relatórios recebem do banco triplas já agregadas (cliente, mês, valor) e
+precisam da grade cliente × mês com total por linha, total por coluna, ordenação
+e cortes (top N, percentil). Em vez de dicionários aninhados e laços por mês, as
+triplas são carregadas uma vez numa matriz densa float64 e todas essas operações
+viram uma chamada vetorizada:
+
+    matriz = MatrizPivot.de_triplas(clientes, meses, valores, rotulos_colunas=chaves_meses)
+    matriz.totais_linhas()             # total de cada cliente
+    matriz.totais_colunas()            # total de cada mês
+    matriz.ordem_por_total()           # índices por total decrescente
+    matriz.top(20) / matriz.acima_do_percentil(80)
+
+A matriz é densa: 20 mil clientes × 24 meses ocupam menos de 4 MB.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class MatrizPivot:
+    """Valores (float64) indexados por rótulos de linha e de coluna"""
+
+    def __init__(self, linhas, colunas, valores=None):
+        self.linhas = list(linhas)
+        self.colunas = list(colunas)
+        if valores is None:
+            valores = np.zeros((len(self.linhas), len(self.colunas)), dtype=np.float64)
+        self.valores = np.asarray(valores, dtype=np.float64).reshape(len(self.linhas), len(self.colunas))
+
+    # ===== CONSTRUÇÃO =====
+
+    @classmethod
+    def de_triplas(cls, linhas, colunas, valores, rotulos_linhas=None, rotulos_colunas=None):
+        """
+        Monta a matriz a partir de triplas (linha, coluna, valor); triplas repetidas são somadas.
+        Sem rótulos, linhas/colunas são os valores distintos em ordem crescente; com rótulos,
+        a ordem é a informada e triplas fora deles são descartadas.
+        """
+        indices_linhas, rotulos_linhas = cls._indexar(linhas, rotulos_linhas)
+        indices_colunas, rotulos_colunas = cls._indexar(colunas, rotulos_colunas)
+        valores = np.asarray(valores, dtype=np.float64)
+
+        validas = (indices_linhas >= 0) & (indices_colunas >= 0)
+        total_colunas = len(rotulos_colunas)
+        posicoes = indices_linhas[validas] * total_colunas + indices_colunas[validas]
+        somas = np.bincount(posicoes, weights=valores[validas], minlength=len(rotulos_linhas) * total_colunas)
+        return cls(rotulos_linhas, rotulos_colunas, somas)
+
+    @staticmethod
+    def _indexar(chaves, rotulos):
+        """Posição de cada chave nos rótulos (-1 se ausente)"""
+        if rotulos is None:
+            rotulos, indices = np.unique(np.asarray(chaves), return_inverse=True)
+            return indices.astype(np.int64), rotulos.tolist()
+        rotulos = list(rotulos)
+        indices = pd.Index(rotulos).get_indexer(list(chaves)) if len(chaves) else np.empty(0, dtype=np.int64)
+        return np.asarray(indices, dtype=np.int64), rotulos
+
+    # ===== TOTAIS =====
+
+    def totais_linhas(self):
+        return self.valores.sum(axis=1)
+
+    def totais_colunas(self):
+        return self.valores.sum(axis=0)
+
+    def total_geral(self):
+        return float(self.valores.sum())
+
+    # ===== ORDENAÇÃO E CORTES (RETORNAM ÍNDICES DE LINHA) =====
+
+    @staticmethod
+    def _ordenar(chave, decrescente):
+        # Estável nos dois sentidos: empates mantêm a ordem atual das linhas
+        return np.argsort(-chave if decrescente else chave, kind='stable')
+
+    def ordem_por_total(self, decrescente=True):
+        return self._ordenar(self.totais_linhas(), decrescente)
+
+    def ordem_por_coluna(self, coluna, decrescente=True):
+        return self._ordenar(self.valores[:, self.colunas.index(coluna)], decrescente)
+
+    def top(self, quantidade):
+        """Índices das `quantidade` linhas de maior total, em ordem decrescente"""
+        return self.ordem_por_total()[:max(int(quantidade), 0)]
+
+    def acima_do_percentil(self, percentil):
+        """Máscara das linhas com total maior ou igual ao percentil informado (0-100)"""
+        totais = self.totais_linhas()
+        if not len(totais):
+            return np.zeros(0, dtype=bool)
+        return totais >= np.percentile(totais, percentil)
+
+    # ===== RECORTES =====
+
+    def selecionar(self, indices):
+        """Nova matriz só com as linhas indicadas (índices ou máscara), na ordem dada"""
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        return MatrizPivot([self.linhas[i] for i in indices.tolist()], self.colunas, self.valores[indices])
+
+    def reindexar_linhas(self, rotulos):
+        """Nova matriz com as linhas na ordem dos rótulos (rótulos sem valores viram linhas zeradas)"""
+        indices = pd.Index(self.linhas).get_indexer(list(rotulos)) if self.linhas else np.full(len(rotulos), -1)
+        valores = np.zeros((len(rotulos), len(self.colunas)), dtype=np.float64)
+        encontrados = indices >= 0
+        valores[encontrados] = self.valores[indices[encontrados]]
+        return MatrizPivot(rotulos, self.colunas, valores)
+
+    def __len__(self):
+        return len(self.linhas)
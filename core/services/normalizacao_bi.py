@@ -0,0 +1,155 @@
+# core/services/normalizacao_bi.py
+
+"""
+Normalização vetorizada da planilha BI (SysFat)
+
+Transforma o DataFrame bruto de um lote (tudo texto, como vem da planilha) em
+colunas tipadas com poucas operações de coluna do pandas, em vez de tratar
+linha a linha:
+- documento só com dígitos; códigos de produto/loja/vendedor com zeros à esquerda;
+- quantidade e valor como Decimal (vírgula decimal aceita);
+- ANOMES (YYMM) → data_venda (1º dia do mês) e anomes (YYYYMM);
+- número da NF sem casas decimais.
+
+As linhas inválidas vão para um DataFrame de erros separado, com o número da
+linha na planilha (índice + 2) e o motivo, usando as mesmas mensagens da
+importação linha a linha.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+# Data usada quando o ANOMES da planilha é inválido (mesma regra da importação antiga)
+DATA_VENDA_PADRAO = date(2024, 1, 1)
+
+# Limites dos campos de Vendas (DecimalField 10,2 / 12,2 e numero_nf 20)
+LIMITE_QUANTIDADE = 1e8
+LIMITE_VALOR_TOTAL = 1e10
+TAMANHO_MAXIMO_NF = 20
+
+COLUNAS_NORMALIZADAS = [
+    'linha', 'documento', 'nome_cliente', 'codigo_produto', 'descricao_produto',
+    'codigo_loja', 'codigo_vendedor', 'nome_vendedor', 'quantidade', 'valor_total',
+    'data_venda', 'anomes', 'numero_nf', 'vendedor_nf', 'uf',
+]
+
+
+def _texto(df, coluna, padrao=''):
+    """Coluna como texto limpo (ausente/vazio/NaN → padrão), equivalente ao texto_celula"""
+    if coluna not in df.columns:
+        return pd.Series(padrao, index=df.index, dtype=object)
+
+    serie = df[coluna].astype('string').str.strip().fillna('')
+    return serie.mask(serie == '', padrao).astype(object)
+
+
+def _decimal(serie, limite):
+    """Texto → (Decimal, válido); valores fora do limite do campo são inválidos"""
+    texto = serie.str.replace(',', '.', regex=False)
+    numero = pd.to_numeric(texto, errors='coerce')
+    valido = numero.notna() & (numero.abs() < limite)
+    valores = pd.Series(None, index=serie.index, dtype=object)
+    valores[valido] = texto[valido].map(Decimal)
+    return valores, valido
+
+
+def _anomes(anomes_yymm):
+    """ANOMES (YYMM) → anomes YYYYMM; inválidos usam o mês de DATA_VENDA_PADRAO"""
+    valido = anomes_yymm.str.fullmatch(r'\d{4}')
+    mes = pd.to_numeric(anomes_yymm.str[2:].where(valido), errors='coerce')
+    valido &= mes.between(1, 12)
+    return ('20' + anomes_yymm).where(valido, DATA_VENDA_PADRAO.strftime('%Y%m'))
+
+
+def _periodo(anomes_yymm):
+    """ANOMES (YYMM) → (data_venda, anomes YYYYMM)"""
+    anomes = _anomes(anomes_yymm)
+
+    # Poucos meses distintos por arquivo: converte cada um uma única vez
+    datas = {valor: date(int(valor[:4]), int(valor[4:]), 1) for valor in anomes.unique()}
+    return anomes.map(datas), anomes
+
+
+def anomes_planilha(df_bi):
+    """Período (YYYYMM) de cada linha do lote bruto, pela mesma regra da normalização"""
+    return _anomes(_texto(df_bi, 'ANOMES'))
+
+
+def normalizar_frame(df_bi):
+    """
+    Normaliza um lote da planilha BI.
+    Retorna (df_normalizado, df_erros): o primeiro com COLUNAS_NORMALIZADAS e o
+    segundo com as colunas linha/erro.
+    """
+    df_bi = df_bi.copy()
+    df_bi.columns = df_bi.columns.astype(str).str.strip().str.upper()
+    linha = pd.Series(df_bi.index, index=df_bi.index) + 2
+
+    # ===== CÓDIGOS E DOCUMENTO =====
+    documento = _texto(df_bi, 'CNPJ').str.replace(r'\D', '', regex=True)
+    produto_bruto = _texto(df_bi, 'CODPRO')
+    codigo_produto = produto_bruto.str.zfill(6)
+    # Loja sem zfill: as lojas já cadastradas usam o NUMLOJ como vem no arquivo ('1', '10')
+    codigo_loja = _texto(df_bi, 'NUMLOJ')
+    codigo_vendedor = _texto(df_bi, 'CODVEN', '001').str.zfill(3)
+
+    # ===== VALORES =====
+    quantidade, quantidade_valida = _decimal(_texto(df_bi, 'QTD', '1'), LIMITE_QUANTIDADE)
+    valor_total, valor_valido = _decimal(_texto(df_bi, 'TOTAL', '0'), LIMITE_VALOR_TOTAL)
+
+    nf = _texto(df_bi, 'NF')
+    nf_numero = pd.to_numeric(nf, errors='coerce')
+    nf_valida = (nf == '') | (nf_numero.notna() & (nf_numero.abs() < 1e18))
+    numero_nf = pd.Series('', index=df_bi.index, dtype=object)
+    numero_nf[nf_valida & (nf != '')] = np.trunc(nf_numero[nf_valida & (nf != '')]).astype('int64').astype(str)
+    nf_valida &= numero_nf.str.len() <= TAMANHO_MAXIMO_NF
+
+    data_venda, anomes = _periodo(_texto(df_bi, 'ANOMES'))
+
+    # ===== ERROS (a primeira regra violada define a mensagem) =====
+    erro = pd.Series(np.select(
+        [
+            documento == '',
+            produto_bruto == '',
+            codigo_produto.str.len() > 6,
+            (codigo_loja == '') | (codigo_loja.str.len() > 3),
+            codigo_vendedor.str.len() > 3,
+            ~(quantidade_valida & valor_valido),
+            ~nf_valida,
+        ],
+        [
+            'Cliente não encontrado/criado',
+            'Produto não encontrado/criado',
+            'Código de produto inválido: ' + codigo_produto,
+            'Código de loja inválido: ' + codigo_loja.mask(codigo_loja == '', 'vazio'),
+            'Código de vendedor inválido: ' + codigo_vendedor,
+            'Valores numéricos inválidos',
+            'Número de NF inválido: ' + nf,
+        ],
+        default='',
+    ), index=df_bi.index)
+
+    normalizado = pd.DataFrame({
+        'linha': linha,
+        'documento': documento,
+        'nome_cliente': _texto(df_bi, 'CLIENTE'),
+        'codigo_produto': codigo_produto,
+        'descricao_produto': _texto(df_bi, 'PRODUTO'),
+        'codigo_loja': codigo_loja,
+        'codigo_vendedor': codigo_vendedor,
+        'nome_vendedor': _texto(df_bi, 'VEND', 'VENDEDOR PADRÃO'),
+        'quantidade': quantidade,
+        'valor_total': valor_total,
+        'data_venda': data_venda,
+        'anomes': anomes,
+        'numero_nf': numero_nf,
+        'vendedor_nf': _texto(df_bi, 'CLIVEN').str[:3],
+        'uf': _texto(df_bi, 'UF', 'SP').str[:2],
+    }, columns=COLUNAS_NORMALIZADAS)
+
+    com_erro = erro != ''
+    df_erros = pd.DataFrame({'linha': linha[com_erro], 'erro': erro[com_erro]})
+    return normalizado[~com_erro], df_erros
@@ -0,0 +1,181 @@
+# core/services/resumo_vendas.py
+
+"""
+Consultas de faturamento sobre o resumo mensal (ResumoVendasMensal)
+
+O resumo guarda as vendas somadas por mês, então só responde sozinho por meses
+inteiros. Para um intervalo de datas qualquer, os meses completos vêm do resumo
+e apenas os meses das bordas (parciais) são somados na tabela de vendas, pelo
+índice de data_venda. Os filtros usam caminhos que existem nos dois modelos
+(cliente__estado, loja__codigo, grupo_produto__codigo, vendedor_nf, ...).
+
+Uso:
+    totais_agrupados(date(2024, 1, 1), date.today(), ['cliente_id', 'anomes'], Q(loja__codigo='001'))
+
+Para agrupar por uma expressão (ex.: grupo de coligados), informe-a em `anotacoes`
+e use o nome dela em `campos`:
+    totais_agrupados(inicio, fim, ['grupo', 'anomes'],
+                     anotacoes={'grupo': Cliente.expressao_codigo_grupo('cliente__')})
+
+Comparativos (período atual × anterior) saem das mesmas consultas, com agregação
+condicional (SUM(...) FILTER (WHERE <janela>)) sobre a união das janelas:
+    totais_comparativos([(inicio, fim), periodo_comparacao(inicio, fim, 'ano_anterior')], ['cliente_id'])
+    # -> [{'cliente_id': 1, 'total_valor_0': ..., 'total_valor_1': ..., ...}, ...]
+"""
+
+from calendar import monthrange
+from datetime import timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db.models import Count, Q, Sum
+
+from core.models import ResumoVendasMensal, Vendas
+
+
+def _anomes(data):
+    return f'{data.year}{data.month:02d}'
+
+
+def _fim_do_mes(data):
+    return data.replace(day=monthrange(data.year, data.month)[1])
+
+
+def dividir_periodo(data_inicio, data_fim):
+    """
+    Separa o intervalo em (primeiro_anomes, ultimo_anomes) dos meses completos
+    (None se não houver) e a lista de intervalos parciais [(inicio, fim), ...]
+    """
+    if data_inicio > data_fim:
+        return None, []
+
+    primeiro_completo = data_inicio if data_inicio.day == 1 else _fim_do_mes(data_inicio) + timedelta(days=1)
+    ultimo_completo = data_fim if data_fim == _fim_do_mes(data_fim) else data_fim.replace(day=1) - timedelta(days=1)
+
+    if primeiro_completo > ultimo_completo:
+        return None, [(data_inicio, data_fim)]
+
+    parciais = []
+    if data_inicio < primeiro_completo:
+        parciais.append((data_inicio, primeiro_completo - timedelta(days=1)))
+    if data_fim > ultimo_completo:
+        parciais.append((ultimo_completo + timedelta(days=1), data_fim))
+    return (_anomes(primeiro_completo), _anomes(ultimo_completo)), parciais
+
+
+def periodo_comparacao(data_inicio, data_fim, modo):
+    """
+    Janela de comparação do intervalo:
+    - 'ano_anterior': as mesmas datas um ano antes (29/02 vira 28/02);
+    - 'periodo_anterior': o intervalo imediatamente antes, com o mesmo número de
+      meses (se o intervalo for de meses inteiros) ou de dias.
+    """
+    if modo == 'ano_anterior':
+        return tuple(
+            data.replace(year=data.year - 1, day=min(data.day, monthrange(data.year - 1, data.month)[1]))
+            for data in (data_inicio, data_fim)
+        )
+    if modo == 'periodo_anterior':
+        fim = data_inicio - timedelta(days=1)
+        if data_inicio.day == 1 and data_fim == _fim_do_mes(data_fim):
+            meses = (data_fim.year - data_inicio.year) * 12 + data_fim.month - data_inicio.month + 1
+            indice = data_inicio.year * 12 + data_inicio.month - 1 - meses
+            return data_inicio.replace(year=indice // 12, month=indice % 12 + 1), fim
+        return data_inicio - timedelta(days=(data_fim - data_inicio).days + 1), fim
+    raise ValueError(f"Comparação desconhecida: {modo}")
+
+
+def _agregados(condicoes, linhas):
+    """
+    Agregados de cada janela (sufixo _<índice>). Com uma única janela ela já está
+    no WHERE e o agregado é simples; com várias, cada SUM filtra a sua janela.
+    """
+    agregados = {}
+    for indice, condicao in condicoes.items():
+        filtro_janela = condicao if len(condicoes) > 1 else None
+        agregados[f'total_valor_{indice}'] = Sum('valor_total', filter=filtro_janela)
+        agregados[f'total_quantidade_{indice}'] = Sum('quantidade', filter=filtro_janela)
+        agregados[f'total_linhas_{indice}'] = linhas(filtro_janela)
+    return agregados
+
+
+def totais_comparativos(periodos, campos=(), filtro=None, anotacoes=None):
+    """
+    Soma valor, quantidade e linhas de venda de vários intervalos [(inicio, fim), ...]
+    de uma vez, agrupando por `campos`: no máximo uma consulta no resumo (meses
+    completos de todas as janelas) e uma na tabela de vendas (bordas parciais).
+    Cada dicionário traz os campos e total_valor_<i>/total_quantidade_<i>/total_linhas_<i>
+    para o i-ésimo intervalo (zero quando não houve vendas nele).
+    """
+    filtro = filtro or Q()
+
+    condicoes_resumo = {}
+    condicoes_vendas = {}
+    for indice, (data_inicio, data_fim) in enumerate(periodos):
+        meses, parciais = dividir_periodo(data_inicio, data_fim)
+        if meses:
+            condicoes_resumo[indice] = Q(anomes__gte=meses[0], anomes__lte=meses[1])
+        if parciais:
+            condicoes_vendas[indice] = reduce(or_, (
+                Q(data_venda__gte=inicio, data_venda__lte=fim) for inicio, fim in parciais
+            ))
+
+    consultas = []
+    if condicoes_resumo:
+        consultas.append((
+            ResumoVendasMensal.objects.filter(filtro, reduce(or_, condicoes_resumo.values())),
+            _agregados(condicoes_resumo, lambda janela: Sum('quantidade_linhas', filter=janela)),
+        ))
+    if condicoes_vendas:
+        consultas.append((
+            Vendas.objects.filter(filtro, reduce(or_, condicoes_vendas.values())),
+            _agregados(condicoes_vendas, lambda janela: Count('id', filter=janela)),
+        ))
+
+    zerados = {}
+    for indice in range(len(periodos)):
+        zerados.update({
+            f'total_valor_{indice}': Decimal('0'), f'total_quantidade_{indice}': Decimal('0'),
+            f'total_linhas_{indice}': 0,
+        })
+
+    totais = {}
+    for queryset, agregados in consultas:
+        if anotacoes:
+            queryset = queryset.annotate(**anotacoes)
+        if campos:
+            resultado = queryset.values(*campos).annotate(**agregados).order_by()
+        else:
+            resultado = [queryset.aggregate(**agregados)]
+
+        for linha in resultado:
+            chave = tuple(linha[campo] for campo in campos)
+            acumulado = totais.setdefault(chave, {**{campo: linha[campo] for campo in campos}, **zerados})
+            for nome in agregados:
+                acumulado[nome] += linha[nome] or 0
+
+    return list(totais.values()) or ([] if campos else [dict(zerados)])
+
+
+def totais_agrupados(data_inicio, data_fim, campos=(), filtro=None, anotacoes=None):
+    """
+    Soma valor, quantidade e linhas de venda do intervalo agrupando por `campos`.
+    Retorna uma lista de dicionários com os campos e total_valor/total_quantidade/total_linhas
+    (com `campos` vazio, uma lista com um único dicionário de totais).
+    `anotacoes` são expressões calculadas no banco que podem ser usadas em `campos`.
+    """
+    return [
+        {
+            **{campo: linha[campo] for campo in campos},
+            'total_valor': linha['total_valor_0'],
+            'total_quantidade': linha['total_quantidade_0'],
+            'total_linhas': linha['total_linhas_0'],
+        }
+        for linha in totais_comparativos([(data_inicio, data_fim)], campos, filtro, anotacoes)
+    ]
+
+
+def total_vendas_registradas():
+    """Quantidade de linhas de venda (contada pelo resumo, sem varrer a tabela de vendas)"""
+    return ResumoVendasMensal.objects.aggregate(total=Sum('quantidade_linhas'))['total'] or 0
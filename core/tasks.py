@@ -0,0 +1,33 @@
+# core/tasks.py
+
+from celery import shared_task
+
+from core.models import Cliente
+from core.services.jobs_exportacao import processar_exportacao
+from core.services.jobs_importacao import encerrar_jobs_abandonados, processar_importacao_bi
+
+
+@shared_task(name='core.importar_bi')
+def importar_bi_task(log_id, caminho, modo_carga='orm', substituicao='periodos', forcar=False):
+    """Importação BI em segundo plano (progresso gravado no LogSincronizacao)"""
+    resultado = processar_importacao_bi(log_id, caminho, modo_carga, substituicao, forcar)
+    return {chave: valor for chave, valor in resultado.items() if chave != 'erros'}
+
+
+@shared_task(name='core.exportar_excel')
+def exportar_excel_task(log_id):
+    """Exportação Excel em segundo plano (arquivo no MinIO, link no LogSincronizacao)"""
+    log_sync = processar_exportacao(log_id)
+    return {'arquivo': log_sync.arquivo, 'linhas': log_sync.registros_processados}
+
+
+@shared_task(name='core.atualizar_metricas_clientes')
+def atualizar_metricas_clientes_task():
+    """Métricas de todos os clientes, todo dia pelo beat (as janelas de 30/90/365 dias andam com o calendário)"""
+    return {'clientes_atualizados': Cliente.atualizar_metricas()}
+
+
+@shared_task(name='core.encerrar_jobs_abandonados')
+def encerrar_jobs_abandonados_task():
+    """Encerra as importações BI sem batimento do worker (pelo beat, fora da consulta de progresso)"""
+    return {'jobs_encerrados': encerrar_jobs_abandonados()}
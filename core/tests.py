@@ -1,3 +1,528 @@
-from django.test import TestCase
+import base64
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+import pandas as pd
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from core.forms import ClienteForm
+from core.models import (Cliente, Fabricante, GrupoProduto, LogSincronizacao, Loja, PeriodoImportado, Produto,
+                         ResumoVendasMensal, Vendas, VersaoDados)
+from core.services.bi_cliente import codificar_cursor, decodificar_cursor, pagina_vendas
+from core.services.busca_clientes import buscar_clientes
+from core.services.cache_relatorios import chave_relatorio, obter_ou_gerar
+from core.services.importacao_bi import ImportadorBI, executar_importacao_bi, importar_arquivo_bi
+from core.services.jobs_importacao import encerrar_jobs_abandonados
+from core.services.matriz_pivot import MatrizPivot
+
+
+COLUNAS_BI = ['CNPJ', 'CLIENTE', 'CODPRO', 'PRODUTO', 'NUMLOJ', 'CODVEN', 'VEND', 'QTD', 'TOTAL', 'ANOMES', 'NF',
+              'UF', 'CLIVEN']
+
+
+def linha_bi(documento, anomes, total='10,00', produto='1', loja='1', quantidade='1', nf='123'):
+    """Linha da planilha BI (tudo texto, como o LeitorBI entrega)"""
+    return [documento, f'CLIENTE {documento}', produto, f'PRODUTO {produto}', loja, '1', 'VENDEDOR',
+            quantidade, total, anomes, nf, 'SP', '001']
+
+
+def planilha_bi(linhas):
+    return pd.DataFrame(linhas, columns=COLUNAS_BI, dtype=str)
+
+
+def criar_dimensoes():
+    """Loja, grupo, fabricante e produto mínimos para gravar vendas à mão"""
+    loja = Loja.objects.create(codigo='001', nome='Loja 1')
+    grupo = GrupoProduto.objects.create(codigo='0001', descricao='Grupo 1')
+    fabricante = Fabricante.objects.create(codigo='001', descricao='Fabricante 1')
+    produto = Produto.objects.create(codigo='000001', descricao='Produto 1', grupo=grupo, fabricante=fabricante)
+    return loja, produto
+
+
+def criar_venda(cliente, loja, produto, data_venda, valor='10.00'):
+    return Vendas.objects.create(
+        cliente=cliente, loja=loja, produto=produto, grupo_produto=produto.grupo, fabricante=produto.fabricante,
+        data_venda=data_venda, quantidade=Decimal('1'), valor_total=Decimal(valor), vendedor_nf='001',
+    )
+
+
+# ===== IMPORTAÇÃO BI =====
+
+class ImportadorBITest(TestCase):
+
+    def test_dimensoes_sao_criadas_uma_vez_entre_lotes(self):
+        importador = ImportadorBI()
+        importador.processar_lote(planilha_bi([
+            linha_bi('11111111000191', '2403'),
+            linha_bi('11111111000191', '2403', produto='2'),
+        ]))
+        # Segundo lote continua a numeração das linhas da planilha
+        importador.processar_lote(planilha_bi([
+            linha_bi('11111111000191', '2404'),
+            linha_bi('22222222000191', '2404', produto='2'),
+        ]).set_axis([2, 3]))
+        resultado = importador.resultado()
+
+        self.assertEqual(resultado['total_registros'], 4)
+        self.assertEqual(resultado['vendas_criadas'], 4)
+        self.assertEqual(resultado['clientes_criados'], 2)
+        self.assertEqual(resultado['produtos_criados'], 2)
+        self.assertEqual(resultado['erros'], [])
+        self.assertEqual(Cliente.objects.count(), 2)
+        self.assertEqual(set(Vendas.objects.values_list('produto__codigo', flat=True)), {'000001', '000002'})
+
+    def test_linhas_invalidas_sao_registradas_com_o_numero_da_linha(self):
+        importador = ImportadorBI()
+        importador.processar_lote(planilha_bi([
+            linha_bi('44444444000191', '2406'),
+            linha_bi('', '2406'),
+            linha_bi('44444444000191', '2406', produto=''),
+            linha_bi('44444444000191', '2406', loja='1234'),
+            linha_bi('44444444000191', '2406', total='abc'),
+        ]))
+        resultado = importador.resultado()
+
+        self.assertEqual(resultado['vendas_criadas'], 1)
+        self.assertEqual(resultado['erros'], [
+            'Linha 3: Cliente não encontrado/criado',
+            'Linha 4: Produto não encontrado/criado',
+            'Linha 5: Código de loja inválido: 1234',
+            'Linha 6: Valores numéricos inválidos',
+        ])
+
+    def test_log_registra_contadores_e_erros(self):
+        resultado = executar_importacao_bi(planilha_bi([
+            linha_bi('44444444000191', '2406'),
+            linha_bi('', '2406'),
+        ]))
+
+        log_sync = LogSincronizacao.objects.get(pk=resultado['log_id'])
+        self.assertEqual(log_sync.status, 'concluido_com_erros')
+        self.assertEqual(log_sync.registros_processados, 2)
+        self.assertEqual(log_sync.registros_criados, 1)
+        self.assertEqual(log_sync.registros_com_erro, 1)
+        self.assertIsNotNone(log_sync.registros_por_segundo)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'COPY só existe no PostgreSQL')
+class ImportacaoCopyTest(TestCase):
+
+    def vendas(self):
+        return list(Vendas.objects.order_by('data_venda', 'valor_total').values_list(
+            'cliente__cpf_cnpj', 'produto__codigo', 'loja__codigo', 'data_venda', 'quantidade', 'valor_total',
+            'numero_nf',
+        ))
+
+    def test_copy_grava_as_mesmas_vendas_que_o_orm(self):
+        linhas = [
+            linha_bi('11111111000191', '2403', total='12,34', quantidade='2'),
+            linha_bi('22222222000191', '2404', produto='2', nf='456'),
+            linha_bi('', '2404'),
+        ]
+        resultado = executar_importacao_bi(planilha_bi(linhas), modo_carga='copy')
+
+        self.assertEqual(resultado['modo_carga'], 'copy')
+        self.assertEqual(resultado['vendas_criadas'], 2)
+        self.assertEqual(resultado['erros'], ['Linha 4: Cliente não encontrado/criado'])
+        copiadas = self.vendas()
+
+        Vendas.objects.all().delete()
+        executar_importacao_bi(planilha_bi(linhas), modo_carga='orm')
+        self.assertEqual(self.vendas(), copiadas)
+
+
+class ImportacaoSubstituicaoTest(TestCase):
+
+    def importar(self, linhas, substituicao):
+        return executar_importacao_bi(planilha_bi(linhas), substituicao=substituicao)
+
+    def vendas_por_mes(self):
+        return dict(Vendas.objects.values_list('anomes').annotate(total=Count('id')).order_by())
+
+    def setUp(self):
+        self.importar([
+            linha_bi('11111111000191', '2403'),
+            linha_bi('11111111000191', '2403'),
+            linha_bi('22222222000191', '2404'),
+        ], 'periodos')
+
+    def test_acrescentar_mantem_vendas_existentes(self):
+        resultado = self.importar([linha_bi('11111111000191', '2403')], 'acrescentar')
+
+        self.assertEqual(resultado['vendas_removidas'], 0)
+        self.assertEqual(self.vendas_por_mes(), {'202403': 3, '202404': 1})
+
+    def test_periodos_substitui_so_os_meses_do_arquivo(self):
+        resultado = self.importar([linha_bi('22222222000191', '2404', total='99,00')], 'periodos')
+
+        self.assertEqual(resultado['periodos'], ['202404'])
+        self.assertEqual(resultado['vendas_removidas'], 1)
+        self.assertEqual(self.vendas_por_mes(), {'202403': 2, '202404': 1})
+        self.assertEqual(Vendas.objects.get(anomes='202404').valor_total, Decimal('99.00'))
+
+    def test_tudo_zera_a_base(self):
+        resultado = self.importar([linha_bi('33333333000191', '2405')], 'tudo')
+
+        self.assertEqual(resultado['vendas_removidas'], 3)
+        self.assertEqual(self.vendas_por_mes(), {'202405': 1})
+        self.assertEqual(list(PeriodoImportado.objects.values_list('anomes', flat=True)), ['202405'])
+
+
+# ===== IMPORTAÇÃO DE ARQUIVO (IMPRESSÃO DIGITAL) =====
+
+class ImportacaoArquivoBITest(TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio)
+
+    def arquivo(self, nome, linhas):
+        caminho = os.path.join(self.diretorio, nome)
+        planilha_bi(linhas).to_csv(caminho, index=False)
+        return caminho
+
+    def test_arquivo_identico_nao_e_reimportado(self):
+        caminho = self.arquivo('bi.csv', [linha_bi('11111111000191', '2403'), linha_bi('11111111000191', '2404')])
+        importar_arquivo_bi(caminho, substituicao='periodos')
+
+        resultado = importar_arquivo_bi(caminho, substituicao='periodos')
+
+        self.assertTrue(resultado['arquivo_identico'])
+        self.assertEqual(Vendas.objects.count(), 2)
+
+        resultado = importar_arquivo_bi(caminho, substituicao='periodos', forcar=True)
+        self.assertNotIn('arquivo_identico', resultado)
+        self.assertEqual(resultado['vendas_removidas'], 2)
+        self.assertEqual(Vendas.objects.count(), 2)
+
+    def test_so_os_meses_alterados_sao_reprocessados(self):
+        importar_arquivo_bi(self.arquivo('marco_abril.csv', [
+            linha_bi('11111111000191', '2403'),
+            linha_bi('11111111000191', '2404'),
+        ]), substituicao='periodos')
+
+        resultado = importar_arquivo_bi(self.arquivo('abril_corrigido.csv', [
+            linha_bi('11111111000191', '2403'),
+            linha_bi('11111111000191', '2404', total='20,00'),
+            linha_bi('11111111000191', '2404', total='30,00'),
+        ]), substituicao='periodos')
+
+        self.assertEqual(resultado['periodos_ignorados'], ['202403'])
+        self.assertEqual(resultado['periodos'], ['202404'])
+        self.assertEqual(resultado['registros_ignorados'], 1)
+        self.assertEqual(resultado['vendas_criadas'], 2)
+        self.assertEqual(Vendas.objects.filter(anomes='202403').count(), 1)
+        self.assertEqual(Vendas.objects.filter(anomes='202404').aggregate(total=Sum('valor_total'))['total'],
+                         Decimal('50.00'))
+
+
+# ===== JOBS DE IMPORTAÇÃO =====
+
+class JobsAbandonadosTest(TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio)
+
+    def arquivo_spool(self, nome, horas_atras=0):
+        caminho = os.path.join(self.diretorio, nome)
+        open(caminho, 'w').close()
+        instante = (timezone.now() - timedelta(hours=horas_atras)).timestamp()
+        os.utime(caminho, (instante, instante))
+        return caminho
+
+    def job(self, nome, status='processando', inicio_horas=0, atividade_horas=None):
+        log_sync = LogSincronizacao.objects.create(tipo='bi', status=status,
+                                                   arquivo=self.arquivo_spool(nome, horas_atras=inicio_horas))
+        agora = timezone.now()
+        LogSincronizacao.objects.filter(pk=log_sync.pk).update(
+            data_inicio=agora - timedelta(hours=inicio_horas),
+            ultima_atividade=None if atividade_horas is None else agora - timedelta(hours=atividade_horas),
+        )
+        return log_sync
+
+    def test_job_travado_e_encerrado_e_o_arquivo_removido(self):
+        travado = self.job('travado.csv', inicio_horas=5, atividade_horas=2)
+        sem_worker = self.job('sem_worker.csv', status='pendente', inicio_horas=2)
+        longo = self.job('longo.csv', inicio_horas=5, atividade_horas=0)
+        na_fila = self.job('na_fila.csv', status='pendente', inicio_horas=0)
+        orfao = self.arquivo_spool('orfao.csv', horas_atras=5)
+
+        with override_settings(IMPORTACAO_SPOOL_DIR=self.diretorio, IMPORTACAO_TEMPO_MAXIMO_MINUTOS=60):
+            self.assertEqual(encerrar_jobs_abandonados(), 2)
+
+        for log_sync in (travado, sem_worker, longo, na_fila):
+            log_sync.refresh_from_db()
+        self.assertEqual(travado.status, 'erro')
+        self.assertEqual(sem_worker.status, 'erro')
+        self.assertFalse(os.path.exists(travado.arquivo))
+        self.assertFalse(os.path.exists(sem_worker.arquivo))
+        self.assertFalse(os.path.exists(orfao))
+
+        # Importação longa com batimento recente e job recém-enfileirado continuam
+        self.assertEqual(longo.status, 'processando')
+        self.assertEqual(na_fila.status, 'pendente')
+        self.assertTrue(os.path.exists(longo.arquivo))
+        self.assertTrue(os.path.exists(na_fila.arquivo))
+
+
+# ===== RESUMO MENSAL =====
+
+class ResumoVendasMensalTest(TestCase):
+
+    def totais(self, queryset, linhas):
+        return {
+            (anomes, cliente_id): (valor, quantidade, total_linhas)
+            for anomes, cliente_id, valor, quantidade, total_linhas in queryset.values_list('anomes', 'cliente_id')
+            .annotate(Sum('valor_total'), Sum('quantidade'), linhas).order_by()
+        }
+
+    def test_resumo_mensal_confere_com_as_vendas(self):
+        executar_importacao_bi(planilha_bi([
+            linha_bi('11111111000191', '2403'),
+            linha_bi('11111111000191', '2403'),
+            linha_bi('22222222000191', '2404'),
+            linha_bi('22222222000191', '2403', total='7,50', quantidade='3'),
+        ]), substituicao='periodos')
+
+        esperado = self.totais(Vendas.objects, Count('id'))
+        self.assertEqual(self.totais(ResumoVendasMensal.objects, Sum('quantidade_linhas')), esperado)
+        self.assertEqual(len(esperado), 3)
+
+        # Venda gravada à mão: recalcular só o mês e o cliente afetados
+        venda = Vendas.objects.filter(anomes='202404').first()
+        criar_venda(venda.cliente, venda.loja, venda.produto, date(2024, 4, 15), valor='5.25')
+        ResumoVendasMensal.recalcular(periodos=['202404'], clientes=[venda.cliente_id])
+        self.assertEqual(self.totais(ResumoVendasMensal.objects, Sum('quantidade_linhas')),
+                         self.totais(Vendas.objects, Count('id')))
+
+
+# ===== CACHE DE RELATÓRIOS =====
+
+class CacheRelatoriosTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_chave_ignora_ordem_repeticao_e_espacos_dos_filtros(self):
+        self.assertEqual(chave_relatorio('clientes', {'lojas': ['2', '1'], 'uf': 'SP'}),
+                         chave_relatorio('clientes', {'uf': 'SP ', 'lojas': ['1', '2', '1']}))
+        self.assertNotEqual(chave_relatorio('clientes', {'uf': 'SP'}), chave_relatorio('clientes', {'uf': 'RJ'}))
+        self.assertNotEqual(chave_relatorio('clientes', {'uf': 'SP'}), chave_relatorio('vendas', {'uf': 'SP'}))
+
+    def test_nova_versao_dos_dados_gera_o_relatorio_de_novo(self):
+        geracoes = []
+
+        def gerar():
+            geracoes.append(1)
+            return {'geracao': len(geracoes)}
+
+        self.assertEqual(obter_ou_gerar('clientes', {'uf': 'SP'}, gerar), {'geracao': 1})
+        self.assertEqual(obter_ou_gerar('clientes', {'uf': 'SP'}, gerar), {'geracao': 1})
+
+        VersaoDados.incrementar()
+        self.assertEqual(obter_ou_gerar('clientes', {'uf': 'SP'}, gerar), {'geracao': 2})
+
+    def test_importacao_incrementa_a_versao(self):
+        versao = VersaoDados.atual()
+        executar_importacao_bi(planilha_bi([linha_bi('11111111000191', '2403')]))
+
+        self.assertEqual(VersaoDados.atual(), versao + 1)
+
+
+# ===== MATRIZ PIVÔ =====
+
+class MatrizPivotTest(SimpleTestCase):
+
+    def setUp(self):
+        # Triplas (cliente, mês, valor) como saem do GROUP BY; a repetida (A, 2404) é somada
+        self.matriz = MatrizPivot.de_triplas(
+            ['A', 'B', 'A', 'C', 'B', 'A'],
+            ['2403', '2403', '2404', '2404', '2405', '2404'],
+            [10, 5, 20, 1, 7, 5],
+            rotulos_colunas=['2403', '2404', '2405'],
+        )
+
+    def test_totais(self):
+        self.assertEqual(self.matriz.linhas, ['A', 'B', 'C'])
+        self.assertEqual(self.matriz.totais_linhas().tolist(), [35.0, 12.0, 1.0])
+        self.assertEqual(self.matriz.totais_colunas().tolist(), [15.0, 26.0, 7.0])
+        self.assertEqual(self.matriz.total_geral(), 48.0)
+
+    def test_ordenacao_e_cortes(self):
+        self.assertEqual(self.matriz.ordem_por_total().tolist(), [0, 1, 2])
+        self.assertEqual(self.matriz.ordem_por_coluna('2405').tolist(), [1, 0, 2])  # empate mantém a ordem
+        self.assertEqual(self.matriz.top(2).tolist(), [0, 1])
+        self.assertEqual(self.matriz.acima_do_percentil(50).tolist(), [True, True, False])
+
+    def test_triplas_fora_dos_rotulos_sao_descartadas(self):
+        matriz = MatrizPivot.de_triplas(['A', 'B'], ['2403', '2499'], [1, 2], rotulos_colunas=['2403'])
+
+        self.assertEqual(matriz.linhas, ['A', 'B'])
+        self.assertEqual(matriz.valores.tolist(), [[1.0], [0.0]])
+
+    def test_recortes(self):
+        selecionada = self.matriz.selecionar(self.matriz.acima_do_percentil(50))
+        self.assertEqual(selecionada.linhas, ['A', 'B'])
+
+        reindexada = self.matriz.reindexar_linhas(['C', 'X', 'A'])
+        self.assertEqual(reindexada.valores.tolist(), [[0.0, 1.0, 0.0], [0.0, 0.0, 0.0], [10.0, 25.0, 0.0]])
+
+
+# ===== PAGINAÇÃO POR CURSOR =====
+
+class CursorVendasTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        loja, produto = criar_dimensoes()
+        cliente = Cliente.objects.create(codigo='100', nome='Cliente')
+        # Várias vendas no mesmo dia: o id desempata
+        for data_venda in [date(2024, 3, 1)] * 3 + [date(2024, 3, 2)] * 4 + [date(2024, 3, 5)]:
+            criar_venda(cliente, loja, produto, data_venda)
+
+    def test_cursor_ida_e_volta(self):
+        cursor = codificar_cursor(date(2024, 3, 2), 42)
+        self.assertEqual(decodificar_cursor(cursor), (date(2024, 3, 2), 42))
+        self.assertIsNone(decodificar_cursor(''))
+
+    def test_cursor_malformado(self):
+        # Base64 inválido, sem o id e com data impossível
+        for cursor in ('lixo', 'MjAyNC0wMy0wMg==', base64.urlsafe_b64encode(b'2024-13-40:1').decode()):
+            with self.assertRaises(ValueError):
+                decodificar_cursor(cursor)
+
+    def test_percorre_todas_as_paginas_sem_repetir(self):
+        esperado = list(Vendas.objects.order_by('-data_venda', '-id').values_list('id', flat=True))
+        vistos = []
+        apos = None
+        while True:
+            pagina = list(pagina_vendas(Vendas.objects.all(), apos)[:3])
+            if not pagina:
+                break
+            vistos += [venda.id for venda in pagina]
+            apos = decodificar_cursor(codificar_cursor(pagina[-1].data_venda, pagina[-1].id))
+
+        self.assertEqual(vistos, esperado)
+
+
+# ===== CLIENTES =====
+
+class ClienteFormDocumentoTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.existente = Cliente.objects.create(codigo='3001', nome='Existente', cpf_cnpj='12.345.678/0001-95')
+
+    def formulario(self, cpf_cnpj, instance=None):
+        return ClienteForm(data={
+            'codigo': instance.codigo if instance else '3002', 'nome': 'Cliente', 'status': 'ativo',
+            'tipo_documento': 'cnpj', 'cpf_cnpj': cpf_cnpj,
+        }, instance=instance)
+
+    def test_documento_repetido_e_recusado(self):
+        for cpf_cnpj in ('12.345.678/0001-95', '12345678000195'):
+            form = self.formulario(cpf_cnpj)
+            self.assertFalse(form.is_valid())
+            self.assertIn('já cadastrado para o cliente 3001', form.errors['cpf_cnpj'][0])
+
+    def test_documento_novo_e_aceito(self):
+        form = self.formulario('98.765.432/0001-10')
+        form.is_valid()
+        self.assertNotIn('cpf_cnpj', form.errors)
+
+    def test_cadastro_antigo_repetido_continua_editavel(self):
+        repetido = Cliente.objects.create(codigo='3003', nome='Repetido', cpf_cnpj='12.345.678/0001-95')
+        form = self.formulario('12.345.678/0001-95', instance=repetido)
+        form.is_valid()
+        self.assertNotIn('cpf_cnpj', form.errors)
+
+    def test_busca_por_documento_fica_com_o_cliente_mais_antigo(self):
+        Cliente.objects.create(codigo='3003', nome='Filial', cpf_cnpj='12345678000195')
+
+        self.assertEqual(Cliente.buscar_por_documento('12.345.678/0001-95'), self.existente)
+
+
+class MetricasClienteTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.loja, cls.produto = criar_dimensoes()
+        cls.cliente = Cliente.objects.create(codigo='100', nome='Cliente')
+
+    def metricas(self):
+        self.cliente.refresh_from_db()
+        return (self.cliente.faturamento_30d, self.cliente.faturamento_90d, self.cliente.faturamento_365d,
+                self.cliente.faturamento_total)
+
+    def test_janelas_andam_com_o_calendario(self):
+        hoje = date(2024, 6, 30)
+        for dias, valor in ((10, '1.00'), (70, '2.00'), (200, '4.00'), (500, '8.00')):
+            criar_venda(self.cliente, self.loja, self.produto, hoje - timedelta(days=dias), valor=valor)
+        ResumoVendasMensal.recalcular()
+
+        Cliente.atualizar_metricas(hoje=hoje)
+        self.assertEqual(self.metricas(), (Decimal('1.00'), Decimal('3.00'), Decimal('7.00'), Decimal('15.00')))
+        self.assertEqual(self.cliente.quantidade_vendas, 4)
+        self.assertEqual(self.cliente.data_ultima_compra, hoje - timedelta(days=10))
+
+        # Um mês depois, sem vendas novas: as vendas saem das janelas de 30 e 90 dias
+        Cliente.atualizar_metricas(hoje=hoje + timedelta(days=30))
+        self.assertEqual(self.metricas(), (Decimal('0.00'), Decimal('1.00'), Decimal('7.00'), Decimal('15.00')))
+
+    def test_cliente_sem_vendas_volta_a_zero(self):
+        venda = criar_venda(self.cliente, self.loja, self.produto, date(2024, 6, 1))
+        ResumoVendasMensal.recalcular()
+        Cliente.atualizar_metricas(hoje=date(2024, 6, 30))
+
+        venda.delete()
+        ResumoVendasMensal.recalcular()
+        Cliente.atualizar_metricas(hoje=date(2024, 6, 30))
+        self.assertEqual(self.metricas(), (Decimal('0.00'),) * 4)
+        self.assertEqual(self.cliente.quantidade_vendas, 0)
+
+    def test_importacao_atualiza_janelas_vencidas_de_clientes_fora_do_arquivo(self):
+        hoje = timezone.localdate()
+        criar_venda(self.cliente, self.loja, self.produto, hoje - timedelta(days=40))
+        ResumoVendasMensal.recalcular()
+        # Métricas calculadas há 20 dias, quando a venda ainda estava na janela de 30 dias
+        Cliente.atualizar_metricas(hoje=hoje - timedelta(days=20))
+        Cliente.objects.filter(pk=self.cliente.pk).update(metricas_atualizadas_em=timezone.now() - timedelta(days=20))
+        self.assertEqual(self.metricas()[0], Decimal('10.00'))
+
+        executar_importacao_bi(planilha_bi([linha_bi('11111111000191', '2001')]), substituicao='periodos')
+
+        self.assertEqual(self.metricas(), (Decimal('0.00'), Decimal('10.00'), Decimal('10.00'), Decimal('10.00')))
+
+
+class BuscaClientesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.jose = Cliente.objects.create(codigo='2001', nome='José Ação Peças', cpf_cnpj='12.345.678/0001-95')
+        cls.maria = Cliente.objects.create(codigo='2002', nome='Maria Auto Center', cpf_cnpj='98.765.432/0001-10')
+
+    def buscar(self, termo):
+        return list(buscar_clientes(Cliente.objects.all(), termo).order_by('-relevancia', 'nome'))
+
+    def test_busca_ignora_acentos_e_maiusculas(self):
+        self.assertEqual(self.buscar('jose acao'), [self.jose])
+        self.assertEqual(self.buscar('PECAS'), [self.jose])
+        self.assertEqual(self.buscar('açao'), [self.jose])
+
+    def test_busca_por_documento_formatado_ou_nao(self):
+        self.assertEqual(self.buscar('12.345.678'), [self.jose])
+        self.assertEqual(self.buscar('98765432000110'), [self.maria])
+
+    def test_codigo_exato_vem_primeiro(self):
+        resultado = self.buscar('2002')
+        self.assertEqual(resultado[0], self.maria)
+        self.assertEqual(resultado[0].relevancia, 1.0)
@@ -1,3 +1,137 @@
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from core.models import (Cliente, Fabricante, GrupoProduto, Loja, Produto, ResumoVendasMensal, Usuario, Vendas,
+                         VersaoDados)
+from core.services.jobs_exportacao import agendar_exportacao, processar_exportacao
+
+
+class GestorTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user(username='gestor', password='senha', nivel='gestor')
+        cls.loja = Loja.objects.create(codigo='001', nome='Loja 1')
+        grupo = GrupoProduto.objects.create(codigo='0001', descricao='Grupo 1')
+        fabricante = Fabricante.objects.create(codigo='001', descricao='Fabricante 1')
+        cls.produto = Produto.objects.create(codigo='000001', descricao='Produto 1', grupo=grupo, fabricante=fabricante)
+        cls.cliente = Cliente.objects.create(codigo='100', nome='Cliente BI')
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def criar_venda(self, data_venda, valor='10.00', numero_nf=None):
+        return Vendas.objects.create(
+            cliente=self.cliente, loja=self.loja, produto=self.produto, grupo_produto=self.produto.grupo,
+            fabricante=self.produto.fabricante, data_venda=data_venda, quantidade=Decimal('1'),
+            valor_total=Decimal(valor), vendedor_nf='001', numero_nf=numero_nf,
+        )
+
+
+# ===== CONSULTA BI (JSON PAGINADO POR CURSOR) =====
+
+class ConsultarBIJsonTest(GestorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()  # resumo do BI em cache entre os testes
+        hoje = timezone.now().date()
+        # Vendas repetidas no mesmo dia: as páginas não podem perder nem repetir nenhuma
+        for numero, dias in enumerate([1, 1, 1, 3, 3, 10, 10, 10, 10, 40]):
+            self.criar_venda(hoje - timedelta(days=dias), numero_nf=str(numero))
+        ResumoVendasMensal.recalcular()  # os totais dos meses fechados vêm do resumo
+        self.url = reverse('gestor:consultar_bi', args=[self.cliente.codigo])
+
+    def pagina(self, **parametros):
+        resposta = self.client.get(self.url, {'format': 'json', 'por_pagina': 3, **parametros})
+        self.assertEqual(resposta.status_code, 200)
+        return json.loads(b''.join(resposta.streaming_content))
+
+    def test_percorre_todas_as_paginas(self):
+        esperado = list(Vendas.objects.order_by('-data_venda', '-id').values_list('numero_nf', flat=True))
+        vistos = []
+        parametros = {}
+        while True:
+            dados = self.pagina(**parametros)
+            vistos += [venda['numero_nf'] for venda in dados['vendas']]
+            if not dados['meta']['next']:
+                break
+            parametros = {'cursor': dados['meta']['next']}
+
+        self.assertEqual(vistos, esperado)
+        self.assertEqual(dados['meta']['total_registros'], 10)
+        self.assertFalse(dados['meta']['limitado'])
+
+    def test_cursor_invalido_retorna_400(self):
+        resposta = self.client.get(self.url, {'format': 'json', 'cursor': 'lixo'})
+
+        self.assertEqual(resposta.status_code, 400)
+        self.assertFalse(resposta.json()['success'])
+
+
+# ===== CADASTRO DE VENDAS =====
+
+class VendasDeleteTest(GestorTestCase):
+
+    def test_exclusao_refaz_o_resumo_do_mes(self):
+        data_venda = timezone.now().date().replace(day=1)
+        venda = self.criar_venda(data_venda, valor='10.00')
+        self.criar_venda(data_venda, valor='5.00')
+        ResumoVendasMensal.recalcular()
+
+        resposta = self.client.post(reverse('gestor:vendas_delete', args=[venda.pk]))
+
+        self.assertRedirects(resposta, reverse('gestor:vendas_list'), fetch_redirect_response=False)
+        resumo = ResumoVendasMensal.objects.get(cliente=self.cliente, anomes=data_venda.strftime('%Y%m'))
+        self.assertEqual(resumo.valor_total, Decimal('5.00'))
+        self.assertEqual(resumo.quantidade_linhas, 1)
+        self.cliente.refresh_from_db()
+        self.assertEqual(self.cliente.faturamento_total, Decimal('5.00'))
+
+
+# ===== EXPORTAÇÃO EM SEGUNDO PLANO =====
+
+class ExportacaoSegundoPlanoTest(GestorTestCase):
+
+    filtros = {'search': '', 'data_inicio': '', 'data_fim': '', 'loja': '001', 'vendedor': ''}
+
+    def test_mesma_exportacao_e_reaproveitada_ate_os_dados_mudarem(self):
+        log_sync, reaproveitado = agendar_exportacao('vendas', self.filtros)
+        self.assertFalse(reaproveitado)
+        self.assertEqual(log_sync.status, 'pendente')
+
+        self.assertEqual(agendar_exportacao('vendas', dict(self.filtros)), (log_sync, True))
+
+        VersaoDados.incrementar()
+        novo, reaproveitado = agendar_exportacao('vendas', self.filtros)
+        self.assertFalse(reaproveitado)
+        self.assertNotEqual(novo.md5_hash, log_sync.md5_hash)
+
+    def test_job_grava_a_planilha_e_registra_o_objeto(self):
+        for dia in (1, 2, 3):
+            self.criar_venda(date(2024, 3, dia), numero_nf=str(dia))
+        log_sync, _ = agendar_exportacao('vendas', self.filtros)
+        enviadas = []
+
+        def upload_file(caminho, object_name, content_type):
+            planilha = load_workbook(caminho, read_only=True).active
+            enviadas.append([linha for linha in planilha.iter_rows(values_only=True) if 'Cliente BI' in linha])
+            return object_name, None
+
+        with mock.patch('storage.services.minio_service.MinioService') as minio:
+            minio.return_value.upload_file.side_effect = upload_file
+            processar_exportacao(log_sync.id)
 
-# Create your tests here.
+        log_sync.refresh_from_db()
+        self.assertEqual(log_sync.status, 'concluido')
+        self.assertEqual(log_sync.registros_processados, 3)
+        self.assertEqual(log_sync.arquivo, f'exportacoes/vendas/{log_sync.md5_hash}.xlsx')
+        self.assertEqual(len(enviadas[0]), 3)
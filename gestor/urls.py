@@ -73,6 +73,7 @@ urlpatterns = [
     path('vendas/<int:pk>/atualizar/', views.vendas_update, name='vendas_update'),
     path('vendas/<int:pk>/excluir/', views.vendas_delete, name='vendas_delete'),
     path('vendas/importar/', views.importar_vendas, name='importar_vendas'),
+    path('vendas/importar/<int:log_id>/status/', views.importacao_status, name='importacao_status'),
     
     # ===== USUÁRIOS =====
     path('usuarios/', views.usuario_list, name='usuario_list'),
@@ -90,10 +91,13 @@ urlpatterns = [
     # ===== APIs E CONSULTAS EXTERNAS - CORRIGIDAS =====
     path('api/cliente-por-codigo/<str:codigo>/', views.cliente_por_codigo, name='api_cliente_por_codigo'),
     path('api/vendedor-por-codigo/<str:codigo>/', views.vendedor_por_codigo, name='api_vendedor_por_codigo'),
+    path('api/cliente-por-documento/<str:cpf_cnpj>/', views.cliente_por_documento, name='api_cliente_por_documento'),
     path('api/consultar-receita/<str:cpf_cnpj>/', views.consultar_receita, name='api_consultar_receita'),
 
         # Relatórios
     path('relatorio-clientes/', views.relatorio_clientes, name='relatorio_clientes'),
+    path('relatorio-clientes/dados/', views.relatorio_clientes_dados, name='relatorio_clientes_dados'),
+    path('exportacoes/<int:log_id>/status/', views.exportacao_status, name='exportacao_status'),
     
     # ===== BI E RELATÓRIOS =====
     path('clientes/<str:codigo>/bi/', views.api.consultar_bi, name='consultar_bi'),
@@ -34,7 +34,8 @@ from .vendas import (
     vendas_list, vendas_create, vendas_edit, vendas_delete,
     vendas_detail, vendas_update
 )
-from .importacao import importar_vendas
+from .importacao import importar_vendas, importacao_status
+from .exportacao import exportacao_status
 from .sincronizacao import (
     sincronizacao_dashboard, sincronizar_bi, sincronizar_receita,
     sincronizacao_completa
@@ -44,11 +45,12 @@ from .usuario import (
     usuario_update, usuario_delete
 )
 from .api import (
-    vendedor_por_codigo, cliente_por_codigo, consultar_receita, consultar_bi
+    vendedor_por_codigo, cliente_por_codigo, cliente_por_documento, consultar_receita, consultar_bi
 )
 # ===== NOVO IMPORT PARA RELATÓRIOS =====
 from .relatorio_clientes import (
-    relatorio_clientes  # ← NOVA VIEW ADICIONADA
+    relatorio_clientes,  # ← NOVA VIEW ADICIONADA
+    relatorio_clientes_dados
 )
 
 __all__ = [
@@ -88,7 +90,10 @@ __all__ = [
     'vendas_detail', 'vendas_update',
     
     # Importação
-    'importar_vendas',
+    'importar_vendas', 'importacao_status',
+    
+    # Exportação em segundo plano
+    'exportacao_status',
     
     # Sincronização
     'sincronizacao_dashboard', 'sincronizar_bi', 'sincronizar_receita',
@@ -100,10 +105,11 @@ __all__ = [
     
     # ===== RELATÓRIOS =====
     'relatorio_clientes',  # ← NOVA VIEW ADICIONADA
+    'relatorio_clientes_dados',
     
     # APIs (Cliente)
     'api_vendedor_por_codigo', 'api_cliente_por_codigo', 'api_consultar_receita',
     
     # APIs (Gerais)
-    'vendedor_por_codigo', 'cliente_por_codigo', 'consultar_receita', 'consultar_bi',
+    'vendedor_por_codigo', 'cliente_por_codigo', 'cliente_por_documento', 'consultar_receita', 'consultar_bi',
 ]
\ No newline at end of file
@@ -2,17 +2,49 @@
 
 import logging
 from datetime import timedelta, datetime
+from itertools import islice
 from django.shortcuts import get_object_or_404, render
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import Sum, Count
 from django.db import transaction
+import orjson
 
 from core.models import Cliente, Vendedor, Vendas, ClienteCnaeSecundario
+from core.services.bi_cliente import (
+    codificar_cursor, decodificar_cursor, filtro_cliente_bi, pagina_vendas, resumo_bi_cliente,
+)
 
 logger = logging.getLogger(__name__)
 
+# Vendas listadas na aba BI (os totais e gráficos cobrem o período inteiro)
+LIMITE_VENDAS_BI = 1000
+
+# Paginação por cursor do consultar_bi em JSON
+VENDAS_BI_POR_PAGINA = 1000
+MAXIMO_VENDAS_BI_POR_PAGINA = 50000
+
+# Vendas lidas do banco (e nomes de vendedores resolvidos) por bloco ao escrever a página JSON
+BLOCO_VENDAS_BI = 2000
+
+# Colunas da venda no JSON do consultar_bi (nome no JSON, caminho no banco)
+CAMPOS_VENDA_BI = [
+    ('data_venda', 'data_venda'),
+    ('produto_codigo', 'produto__codigo'),
+    ('produto_descricao', 'produto__descricao'),
+    ('loja_codigo', 'loja__codigo'),
+    ('loja_nome', 'loja__nome'),
+    ('vendedor_codigo', 'vendedor_nf'),
+    ('quantidade', 'quantidade'),
+    ('valor_total', 'valor_total'),
+    ('numero_nf', 'numero_nf'),
+    ('serie_nf', 'serie_nf'),
+    ('grupo_produto', 'grupo_produto__descricao'),
+    ('fabricante', 'fabricante__descricao'),
+    ('cliente_codigo', 'cliente__codigo'),
+    ('cliente_nome', 'cliente__nome'),
+]
+
 @login_required
 def api_cliente_por_codigo(request, codigo):
     """API para buscar cliente por código"""
@@ -81,6 +113,25 @@ def cliente_por_codigo(request, codigo):
             'message': f'Erro interno: {str(e)}'
         })
 
+@login_required
+def cliente_por_documento(request, cpf_cnpj):
+    """API para buscar cliente por CPF/CNPJ (busca exata no documento normalizado)"""
+    cliente = Cliente.buscar_por_documento(cpf_cnpj)
+    
+    if cliente:
+        return JsonResponse({
+            'success': True,
+            'id': cliente.id,
+            'codigo': cliente.codigo,
+            'nome': cliente.nome,
+            'cpf_cnpj': cliente.cpf_cnpj or '',
+            'status': cliente.get_status_display()
+        })
+    return JsonResponse({
+        'success': False,
+        'message': f'Cliente com CPF/CNPJ {cpf_cnpj} não encontrado'
+    })
+
 @login_required
 def api_consultar_receita(request, cpf_cnpj):
     """API para consultar dados na Receita Federal com CNAEs múltiplos"""
@@ -237,6 +288,9 @@ def consultar_receita(request, cpf_cnpj):
 def consultar_bi(request, codigo):
     """
     View para consultar dados de BI (vendas) do cliente - CORRIGIDA
+    
+    Com format=json, as vendas vêm paginadas por cursor (mais recentes primeiro):
+    por_pagina (padrão 1000, máximo 50000) e cursor (meta.next da página anterior).
     """
     cliente = get_object_or_404(Cliente, codigo=codigo)
     
@@ -245,6 +299,8 @@ def consultar_bi(request, codigo):
     data_inicio_param = request.GET.get('data_inicio')
     data_fim_param = request.GET.get('data_fim')
     format_response = request.GET.get('format', 'html')  # html ou json
+    # Cliente master: vendas dos sub-clientes somadas (coligados=0 mostra só o próprio cliente)
+    consolidar_coligados = request.GET.get('coligados', '1') != '0'
     
     # Definir datas
     hoje = timezone.now().date()
@@ -272,72 +328,43 @@ def consultar_bi(request, codigo):
         
         data_fim = hoje
     
-    # Obter códigos de todos os clientes (principal + associados)
-    codigos_clientes = [cliente.codigo]
-    if not cliente.codigo_master and cliente.is_cliente_principal():
-        # Se é cliente principal, incluir sub-clientes
-        sub_clientes = cliente.get_sub_clientes()
-        if sub_clientes:
-            codigos_clientes.extend([c.codigo for c in sub_clientes])
+    # Cliente + sub-clientes resolvidos no próprio SQL (sem buscar antes a lista de códigos)
+    filtro_cliente = filtro_cliente_bi(cliente, consolidar_coligados)
     
     # Buscar vendas no período - *** CORRIGIDO: REMOVIDO 'vendedor' ***
+    vendas = Vendas.objects.filter(
+        filtro_cliente,
+        data_venda__gte=data_inicio,
+        data_venda__lte=data_fim
+    )
+    
     try:
-        vendas = Vendas.objects.filter(
-            cliente__codigo__in=codigos_clientes,
-            data_venda__gte=data_inicio,
-            data_venda__lte=data_fim
-        ).select_related(
-            'produto', 'loja', 'grupo_produto', 'fabricante', 'cliente'
-            # ❌ REMOVIDO: 'vendedor' - não existe mais no modelo!
-            # ✅ vendedor_nf é CharField, não precisa de select_related
-        ).order_by('-data_venda')
-        
-        # Calcular totais
-        totais = vendas.aggregate(
-            total_valor=Sum('valor_total'),
-            total_quantidade=Sum('quantidade'),
-            total_vendas=Count('id')
-        )
-        
-        total_valor = totais['total_valor'] or 0
-        total_quantidade = totais['total_quantidade'] or 0
-        total_vendas = totais['total_vendas'] or 0
-        
-        # Limitar vendas para exibição (máximo 1000 registros)
-        vendas_limitadas = vendas[:1000] if vendas.count() > 1000 else vendas
-        
+        # Totais, nº de vendas e séries dos gráficos num só agrupamento (em cache por versão dos dados)
+        resumo = resumo_bi_cliente(cliente, data_inicio, data_fim, consolidar_coligados)
     except Exception as e:
         logger.error(f"Erro ao consultar dados de BI para cliente {codigo}: {str(e)}")
-        vendas = Vendas.objects.none()
-        vendas_limitadas = vendas
-        total_valor = 0
-        total_quantidade = 0
-        total_vendas = 0
+        resumo = {
+            'total_valor': 0, 'total_quantidade': 0, 'total_vendas': 0, 'ticket_medio': 0,
+            'por_mes': [], 'por_produto': [],
+        }
+    
+    total_valor = resumo['total_valor']
+    total_quantidade = resumo['total_quantidade']
+    total_vendas = resumo['total_vendas']
     
-    # Resposta JSON para APIs
+    # Resposta JSON para APIs: uma página de vendas por cursor, escrita em blocos
     if format_response == 'json':
-        vendas_data = []
-        for venda in vendas_limitadas:
-            # *** CORRIGIDO: USAR vendedor_nf e vendedor_nf_nome ***
-            vendas_data.append({
-                'data_venda': venda.data_venda.strftime('%Y-%m-%d'),
-                'produto_codigo': venda.produto.codigo,
-                'produto_descricao': venda.produto.descricao,
-                'loja_codigo': venda.loja.codigo,
-                'loja_nome': venda.loja.nome,
-                'vendedor_codigo': venda.vendedor_nf or '',  # ← CORRIGIDO
-                'vendedor_nome': venda.vendedor_nf_nome or '',  # ← CORRIGIDO: usar property
-                'quantidade': float(venda.quantidade),
-                'valor_total': float(venda.valor_total),
-                'numero_nf': venda.numero_nf or '',
-                'serie_nf': venda.serie_nf or '',
-                'grupo_produto': venda.grupo_produto.descricao if venda.grupo_produto else '',
-                'fabricante': venda.fabricante.descricao if venda.fabricante else '',
-                'cliente_codigo': venda.cliente.codigo,
-                'cliente_nome': venda.cliente.nome,
-            })
+        try:
+            por_pagina = int(request.GET.get('por_pagina', VENDAS_BI_POR_PAGINA))
+            apos = decodificar_cursor(request.GET.get('cursor'))
+        except ValueError as e:
+            return JsonResponse({
+                'success': False,
+                'message': f'Parâmetros inválidos: {str(e)}'
+            }, status=400)
+        por_pagina = min(max(por_pagina, 1), MAXIMO_VENDAS_BI_POR_PAGINA)
         
-        response_data = {
+        cabecalho = {
             'cliente': {
                 'codigo': cliente.codigo,
                 'nome': cliente.nome,
@@ -349,22 +376,41 @@ def consultar_bi(request, codigo):
                 'data_inicio': data_inicio.strftime('%Y-%m-%d'),
                 'data_fim': data_fim.strftime('%Y-%m-%d'),
                 'filtro_periodo': filtro_periodo,
+                'consolidar_coligados': consolidar_coligados,
             },
             'totais': {
                 'total_valor': float(total_valor),
                 'total_quantidade': float(total_quantidade),
                 'total_vendas': total_vendas,
-                'ticket_medio': float(total_valor / total_vendas) if total_vendas > 0 else 0,
+                'ticket_medio': float(resumo['ticket_medio']),
+            },
+            'series': {
+                'por_mes': resumo['por_mes'],
+                'por_produto': resumo['por_produto'],
             },
-            'vendas': vendas_data,
-            'meta': {
-                'total_registros': vendas.count(),
-                'registros_exibidos': len(vendas_data),
-                'limitado': vendas.count() > 1000,
-            }
         }
         
-        return JsonResponse(response_data, safe=False)
+        # Uma venda a mais que a página só para saber se existe a próxima
+        pagina = pagina_vendas(vendas, apos)[:por_pagina + 1]
+        return StreamingHttpResponse(
+            _vendas_bi_json(request, cabecalho, pagina, por_pagina, total_vendas),
+            content_type='application/json',
+        )
+    
+    try:
+        # Limitar vendas para exibição (máximo 1000 registros, as mais recentes)
+        vendas_limitadas = list(pagina_vendas(vendas).select_related(
+            'produto', 'loja', 'grupo_produto', 'fabricante', 'cliente'
+            # ✅ vendedor_nf é CharField, não precisa de select_related
+        )[:LIMITE_VENDAS_BI])
+    except Exception as e:
+        logger.error(f"Erro ao listar vendas de BI para cliente {codigo}: {str(e)}")
+        vendas_limitadas = []
+    
+    # Nome do vendedor da NF de todas as vendas exibidas de uma vez (um get_many no cache)
+    nomes_vendedores = Vendedor.nomes_por_codigo(venda.vendedor_nf for venda in vendas_limitadas)
+    for venda in vendas_limitadas:
+        venda.nome_vendedor_nf = nomes_vendedores.get(venda.vendedor_nf, '')
     
     # Resposta HTML (template)
     context = {
@@ -373,29 +419,84 @@ def consultar_bi(request, codigo):
         'total_valor': total_valor,
         'total_quantidade': total_quantidade,
         'total_vendas': total_vendas,
+        'ticket_medio': resumo['ticket_medio'],
         'data_inicio': data_inicio,
         'data_fim': data_fim,
         'filtro_periodo': filtro_periodo,
+        'consolidar_coligados': consolidar_coligados,
         
         # Meta informações
-        'total_registros': vendas.count(),
-        'registros_limitados': vendas.count() > 1000,
+        'total_registros': total_vendas,
+        'registros_limitados': total_vendas > LIMITE_VENDAS_BI,
         
-        # Para os gráficos JavaScript - *** CORRIGIDO ***
-        'vendas_json': list(vendas_limitadas.values(
-            'data_venda', 'produto__descricao', 'valor_total', 'vendedor_nf'  # ← CORRIGIDO
-        )),
+        # Para os gráficos JavaScript (séries de todo o período, não só das vendas exibidas)
+        'series_mes': resumo['por_mes'],
+        'series_produto': resumo['por_produto'],
         
         # *** INFO ADICIONAL PARA DEBUG ***
         'debug_info': {
-            'codigos_clientes': codigos_clientes,
-            'total_vendas_query': vendas.count(),
+            'consolidar_coligados': consolidar_coligados,
+            'total_vendas_query': total_vendas,
             'vendas_limitadas': len(vendas_limitadas),
         }
     }
     
     return render(request, 'gestor/cliente_bi.html', context)
 
+def _vendas_bi_json(request, cabecalho, pagina, por_pagina, total_registros):
+    """
+    Escreve a página JSON do consultar_bi aos poucos: o cabeçalho, as vendas lidas
+    do banco em blocos (iterator, sem montar a lista inteira) e, no fim, o meta com
+    o cursor da próxima página. `pagina` traz uma venda além de `por_pagina`.
+    """
+    yield orjson.dumps(cabecalho)[:-1] + b',"vendas":['
+    
+    colunas = [campo for _, campo in CAMPOS_VENDA_BI] + ['id']
+    nomes_json = [nome for nome, _ in CAMPOS_VENDA_BI]
+    posicao_vendedor = nomes_json.index('vendedor_codigo')
+    iterador = pagina.values_list(*colunas).iterator(chunk_size=BLOCO_VENDAS_BI)
+    exibidos = 0
+    ultima = None
+    tem_proxima = False
+    
+    while bloco := list(islice(iterador, BLOCO_VENDAS_BI)):
+        if exibidos + len(bloco) > por_pagina:
+            tem_proxima = True
+            bloco = bloco[:por_pagina - exibidos]
+            if not bloco:
+                break
+        
+        nomes_vendedores = Vendedor.nomes_por_codigo(linha[posicao_vendedor] for linha in bloco)
+        vendas_json = []
+        for linha in bloco:
+            venda = dict(zip(nomes_json, linha))
+            venda['vendedor_nome'] = nomes_vendedores.get(venda['vendedor_codigo'], '')
+            for campo in ('vendedor_codigo', 'numero_nf', 'serie_nf', 'grupo_produto', 'fabricante'):
+                venda[campo] = venda[campo] or ''
+            venda['quantidade'] = float(venda['quantidade'])
+            venda['valor_total'] = float(venda['valor_total'])
+            vendas_json.append(orjson.dumps(venda))
+        
+        yield (b',' if exibidos else b'') + b','.join(vendas_json)
+        exibidos += len(bloco)
+        ultima = bloco[-1]
+    
+    proximo_cursor = codificar_cursor(ultima[0], ultima[-1]) if tem_proxima and ultima else None
+    proxima_url = None
+    if proximo_cursor:
+        parametros = request.GET.copy()
+        parametros['cursor'] = proximo_cursor
+        proxima_url = request.build_absolute_uri(f"{request.path}?{parametros.urlencode()}")
+    
+    yield b'],"meta":' + orjson.dumps({
+        'total_registros': total_registros,
+        'registros_exibidos': exibidos,
+        'por_pagina': por_pagina,
+        'limitado': tem_proxima,
+        'next': proximo_cursor,
+        'next_url': proxima_url,
+    }) + b'}'
+
 # ===== UTILITÁRIOS =====
 
 def processar_cnaes_receita(cliente, dados_receita):
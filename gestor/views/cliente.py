@@ -6,16 +6,25 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q, Sum, Prefetch
+from django.db.models import F, Q, Sum, Max, Prefetch
 from django.utils import timezone
 from django.db import transaction
 from django.http import JsonResponse
 
 from core.models import Cliente, ClienteContato, ClienteCnaeSecundario, Vendas, Loja, Vendedor
 from core.forms import ClienteForm
+from core.services.busca_clientes import buscar_clientes
 
 logger = logging.getLogger(__name__)
 
+# Ordenações da lista de clientes (valor do parâmetro 'ordenar' -> campos)
+ORDENACOES_CLIENTES = {
+    'nome': ('nome',),
+    'faturamento': ('-faturamento_365d', 'nome'),
+    'faturamento_total': ('-faturamento_total', 'nome'),
+    'ultima_compra': (F('data_ultima_compra').desc(nulls_last=True), 'nome'),
+}
+
 
 # gestor/views/cliente.py - Função cliente_list atualizada
 
@@ -56,20 +65,22 @@ def cliente_list(request):
     if loja_codigo:
         clientes_list = clientes_list.filter(codigo_loja=loja_codigo)
     
-    # Busca
-    query = request.GET.get('q', '')
+    # Busca indexada (nome sem acento por semelhança, código e início do CPF/CNPJ)
+    query = request.GET.get('q', '').strip()
     if query:
-        clientes_list = clientes_list.filter(
-            Q(nome__icontains=query) | 
-            Q(codigo__icontains=query) |
-            Q(cpf_cnpj__icontains=query) |
-            Q(nome_razao_social__icontains=query)
-        )
+        clientes_list = buscar_clientes(clientes_list, query)
+    
+    # Ordenação (métricas de vendas desnormalizadas: não consulta a tabela de vendas)
+    # Sem escolha, ordena pela relevância na busca ou pelo nome
+    ordenar = request.GET.get('ordenar', '')
+    if ordenar not in ORDENACOES_CLIENTES:
+        ordenar = ''
+    ordenacao = ORDENACOES_CLIENTES.get(ordenar) or (('-relevancia', 'nome') if query else ('nome',))
     
     # Prefetch para otimizar CNAEs secundários
     clientes_list = clientes_list.prefetch_related(
         Prefetch('cnaes_secundarios', queryset=ClienteCnaeSecundario.objects.order_by('ordem'))
-    ).order_by('nome')
+    ).order_by(*ordenacao)
     
     # Paginação
     paginator = Paginator(clientes_list, 15)
@@ -92,6 +103,7 @@ def cliente_list(request):
         'tipo_filtro': tipo_cliente,
         'vendedor_filtro': vendedor_codigo,
         'loja_filtro': loja_codigo,
+        'ordenar': ordenar,
         'query': query,
         'lojas': lojas,
         'vendedores': vendedores,
@@ -273,7 +285,7 @@ def cliente_detail(request, pk):
         cliente_master = Cliente.objects.filter(codigo=cliente.codigo_master).first()
     
     # Buscar clientes associados (sub-clientes)
-    clientes_associados = Cliente.objects.filter(codigo_master=cliente.codigo).order_by('nome')
+    clientes_associados = cliente.get_sub_clientes()
     
     # Buscar contatos de sub-clientes
     contatos_sub_clientes = []
@@ -289,27 +301,27 @@ def cliente_detail(request, pk):
     hoje = timezone.now().date()
     data_inicio = hoje - timedelta(days=90)
     
-    # Obter códigos de todos os clientes (principal + associados)
-    codigos_clientes = [cliente.codigo]
-    if not cliente.codigo_master and clientes_associados:
-        codigos_clientes.extend([c.codigo for c in clientes_associados])
-    
-    # Buscar vendas recentes
+    # Métricas desnormalizadas do cliente + sub-clientes (somadas no cadastro, sem ler as vendas)
+    metricas_vendas = Cliente.objects.filter(Cliente.filtro_grupo(cliente.codigo)).aggregate(
+        faturamento_30d=Sum('faturamento_30d'),
+        faturamento_90d=Sum('faturamento_90d'),
+        faturamento_365d=Sum('faturamento_365d'),
+        faturamento_total=Sum('faturamento_total'),
+        quantidade_vendas=Sum('quantidade_vendas'),
+        ultima_compra=Max('data_ultima_compra'),
+    )
+    total_vendas_recentes = metricas_vendas['faturamento_90d'] or 0
+    
+    # Últimas vendas: só consulta a tabela de vendas se houve faturamento nos 90 dias
     vendas_recentes = []
-    total_vendas_recentes = 0
-    
-    try:
-        vendas_recentes = Vendas.objects.filter(
-            cliente__codigo__in=codigos_clientes,
-            data_venda__gte=data_inicio
-        ).order_by('-data_venda')[:10]
-        
-        total_vendas_recentes = Vendas.objects.filter(
-            cliente__codigo__in=codigos_clientes,
-            data_venda__gte=data_inicio
-        ).aggregate(total=Sum('valor_total'))['total'] or 0
-    except Exception as e:
-        logger.warning(f"Erro ao buscar dados de vendas: {e}")
+    if total_vendas_recentes:
+        try:
+            vendas_recentes = Vendas.objects.filter(
+                Cliente.filtro_grupo(cliente.codigo, prefixo='cliente__'),
+                data_venda__gte=data_inicio
+            ).select_related('produto').order_by('-data_venda', '-id')[:10]
+        except Exception as e:
+            logger.warning(f"Erro ao buscar dados de vendas: {e}")
     
     context = {
         'cliente': cliente,
@@ -321,6 +333,7 @@ def cliente_detail(request, pk):
         'clientes_associados': clientes_associados,
         'vendas_recentes': vendas_recentes,
         'total_vendas_recentes': total_vendas_recentes,
+        'metricas_vendas': metricas_vendas,
         # *** INFO DO VENDEDOR AUTOMÁTICA ***
         'vendedor_info': {
             'codigo': cliente.codigo_vendedor,
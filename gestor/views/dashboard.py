@@ -3,6 +3,7 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from core.models import Cliente, Produto, Vendas, Loja
+from core.services.resumo_vendas import total_vendas_registradas
 
 @login_required
 def home(request):
@@ -17,7 +18,7 @@ def dashboard(request):
     context = {
         'total_clientes': Cliente.objects.count(),
         'total_produtos': Produto.objects.count(),
-        'total_vendas': Vendas.objects.count(),
+        'total_vendas': total_vendas_registradas(),
         'total_lojas': Loja.objects.count(),
     }
     return render(request, 'gestor/dashboard.html', context)
\ No newline at end of file
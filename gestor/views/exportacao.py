@@ -0,0 +1,52 @@
+# gestor/views/exportacao.py
+
+import logging
+from django.shortcuts import redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.http import JsonResponse
+
+from core.models import LogSincronizacao
+from core.services.jobs_exportacao import agendar_exportacao, status_exportacao
+
+logger = logging.getLogger(__name__)
+
+
+def redirecionar_para_exportacao(request, nome, filtros):
+    """
+    Agenda a exportação em segundo plano e volta para a mesma tela, que passa
+    a acompanhar o job (?exportacao=<id>) e mostra o link de download ao terminar
+    """
+    parametros = request.GET.copy()
+    for parametro in ('exportar_segundo_plano', 'exportar_excel', 'exportacao'):
+        parametros.pop(parametro, None)
+
+    try:
+        log_sync, reaproveitado = agendar_exportacao(nome, filtros, usuario=request.user)
+    except Exception as e:
+        logger.error(f"Erro ao agendar exportação {nome}: {str(e)}")
+        messages.error(request, f'❌ Erro ao iniciar exportação: {str(e)}')
+        return redirect(f"{request.path}?{parametros.urlencode()}")
+
+    if reaproveitado:
+        messages.info(request, "♻️ Já existe uma exportação com estes filtros para os dados atuais; ela será reaproveitada.")
+    else:
+        messages.info(request, "🔄 Exportação iniciada em segundo plano. O link de download aparece aqui quando o arquivo ficar pronto.")
+
+    parametros['exportacao'] = log_sync.id
+    return redirect(f"{request.path}?{parametros.urlencode()}")
+
+
+def exportacao_em_andamento(request):
+    """Job de exportação acompanhado pela tela (?exportacao=<id>), se houver"""
+    exportacao_id = request.GET.get('exportacao')
+    if exportacao_id and exportacao_id.isdigit():
+        return LogSincronizacao.objects.filter(pk=exportacao_id, tipo='exportacao').first()
+    return None
+
+
+@login_required
+def exportacao_status(request, log_id):
+    """Endpoint JSON de polling da exportação (inclui o link pré-assinado ao concluir)"""
+    log_sync = get_object_or_404(LogSincronizacao, pk=log_id, tipo='exportacao')
+    return JsonResponse(status_exportacao(log_sync))
@@ -4,14 +4,14 @@ import logging
 from datetime import datetime, date
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Q
-from django.http import HttpResponse
+from django.db.models import Q
+from django.core.paginator import Paginator
+from django.http import FileResponse, HttpResponse
+from django.urls import reverse
 from django.utils import timezone
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-from collections import defaultdict, OrderedDict
-import json
+import numpy as np
+import orjson
+import tempfile
 
 # Importando locale para formatação de data em português
 import locale
@@ -24,38 +24,119 @@ except locale.Error:
         logging.warning("Não foi possível configurar o locale para pt_BR. Os nomes dos meses podem não estar em português.")
 
 
-from core.models import Cliente, Vendas, Loja, Vendedor, GrupoProduto, Fabricante, Produto
+from core.models import Cliente, Loja, Vendedor, GrupoProduto, Fabricante, Produto
+from core.services.cache_relatorios import obter_ou_gerar
+from core.services.exportacao_excel import gravar_relatorio_clientes
+from core.services.matriz_pivot import MatrizPivot
+from core.services.resumo_vendas import periodo_comparacao, totais_comparativos
+from gestor.views.exportacao import exportacao_em_andamento, redirecionar_para_exportacao
 
 logger = logging.getLogger(__name__)
 
 
-@login_required
-def relatorio_clientes(request):
-    """Relatório de clientes com faturamento mensal"""
-    
-    # ===== OBTER FILTROS (MÚLTIPLA ESCOLHA) =====
+# Linhas por página da grade (JSON)
+LINHAS_POR_PAGINA = 50
+MAXIMO_LINHAS_POR_PAGINA = 500
+
+# Colunas ordenáveis da grade (além dos meses 'YYYY-MM')
+COLUNAS_ORDENACAO = ['codigo', 'nome', 'cpf_cnpj', 'cidade', 'estado', 'loja_codigo',
+                     'vendedor_codigo', 'status', 'tipo', 'total']
+
+# Colunas da comparação com o período anterior (ordenadas como números)
+COLUNAS_COMPARACAO = ['total_anterior', 'variacao', 'variacao_percentual', 'meses_ativos']
+
+# Janelas de comparação disponíveis
+OPCOES_COMPARACAO = [
+    ('', 'Sem comparação'),
+    ('ano_anterior', 'Mesmo período do ano anterior'),
+    ('periodo_anterior', 'Período imediatamente anterior'),
+]
+
+# Campos considerados pela busca textual da grade
+CAMPOS_BUSCA = ['codigo', 'nome', 'cpf_cnpj', 'cidade', 'vendedor_nome']
+
+
+def _filtros_relatorio(request):
+    """Filtros do relatório (múltipla escolha) no formato de gerar_dados_relatorio"""
     data_inicio = request.GET.get('data_inicio', '')
     data_fim = request.GET.get('data_fim', '')
+    comparar = request.GET.get('comparar', '')
     
-    # Filtros múltiplos - usar getlist() para arrays
-    loja_codigos = request.GET.getlist('loja')
-    vendedor_codigos = request.GET.getlist('vendedor')
-    estados = request.GET.getlist('estado')
-    grupo_codigos = request.GET.getlist('grupo')
-    fabricante_codigos = request.GET.getlist('fabricante')
-    produto_codigos = request.GET.getlist('produto')
-    
-    incluir_coligados = request.GET.get('incluir_coligados', '') == 'on'
-    # Força 'apenas_com_vendas' a ser True, independentemente do input do usuário
-    apenas_com_vendas = True 
-    
-    # ===== DATAS PADRÃO (ÚLTIMOS 12 MESES) =====
+    # ===== DATAS PADRÃO (ANO CORRENTE) =====
     if not data_inicio or not data_fim:
         hoje = date.today()
         primeiro_dia_ano = date(hoje.year, 1, 1)
         data_inicio = primeiro_dia_ano.strftime('%Y-%m-%d')
         data_fim = hoje.strftime('%Y-%m-%d')
     
+    return {
+        'data_inicio': data_inicio,
+        'data_fim': data_fim,
+        # Filtros múltiplos - usar getlist() para arrays
+        'loja_codigos': request.GET.getlist('loja'),
+        'vendedor_codigos': request.GET.getlist('vendedor'),
+        'estados': request.GET.getlist('estado'),
+        'grupo_codigos': request.GET.getlist('grupo'),
+        'fabricante_codigos': request.GET.getlist('fabricante'),
+        'produto_codigos': request.GET.getlist('produto'),
+        'incluir_coligados': request.GET.get('incluir_coligados', '') == 'on',
+        # Sub-clientes somados na linha do cliente master
+        'consolidar_coligados': request.GET.get('consolidar_coligados', '') == 'on',
+        # Janela de comparação ('' = sem colunas comparativas)
+        'comparar': comparar if comparar in dict(OPCOES_COMPARACAO) else '',
+        # Força 'apenas_com_vendas' a ser True, independentemente do input do usuário
+        'apenas_com_vendas': True,
+    }
+
+
+def _descricao_filtros(filtros_relatorio):
+    """Filtros aplicados, por extenso, para o cabeçalho da planilha"""
+    return {
+        'data_inicio': filtros_relatorio['data_inicio'],
+        'data_fim': filtros_relatorio['data_fim'],
+        'loja': ', '.join(filtros_relatorio['loja_codigos']) or 'Todas',
+        'vendedor': ', '.join(filtros_relatorio['vendedor_codigos']) or 'Todos',
+        'estado': ', '.join(filtros_relatorio['estados']) or 'Todos',
+        'grupo': ', '.join(filtros_relatorio['grupo_codigos']) or 'Todos',
+        'fabricante': ', '.join(filtros_relatorio['fabricante_codigos']) or 'Todos',
+        'produto': ', '.join(filtros_relatorio['produto_codigos']) or 'Todos',
+        'incluir_coligados': filtros_relatorio['incluir_coligados'],
+        'consolidar_coligados': filtros_relatorio['consolidar_coligados'],
+        'comparar': dict(OPCOES_COMPARACAO)[filtros_relatorio['comparar']] if filtros_relatorio['comparar'] else '',
+        'apenas_com_vendas': filtros_relatorio['apenas_com_vendas'],
+    }
+
+
+def _obter_relatorio(filtros_relatorio):
+    """Mesmo resultado em cache para a tela, a grade JSON e a exportação Excel"""
+    return obter_ou_gerar(
+        'clientes', filtros_relatorio, lambda: gerar_dados_relatorio(**filtros_relatorio)
+    )
+
+
+@login_required
+def relatorio_clientes(request):
+    """Relatório de clientes com faturamento mensal"""
+    
+    # ===== OBTER FILTROS (MÚLTIPLA ESCOLHA) =====
+    filtros_relatorio = _filtros_relatorio(request)
+    data_inicio = filtros_relatorio['data_inicio']
+    data_fim = filtros_relatorio['data_fim']
+    loja_codigos = filtros_relatorio['loja_codigos']
+    vendedor_codigos = filtros_relatorio['vendedor_codigos']
+    estados = filtros_relatorio['estados']
+    grupo_codigos = filtros_relatorio['grupo_codigos']
+    fabricante_codigos = filtros_relatorio['fabricante_codigos']
+    produto_codigos = filtros_relatorio['produto_codigos']
+    incluir_coligados = filtros_relatorio['incluir_coligados']
+    consolidar_coligados = filtros_relatorio['consolidar_coligados']
+    comparar = filtros_relatorio['comparar']
+    apenas_com_vendas = filtros_relatorio['apenas_com_vendas']
+    
+    # ===== EXPORTAR EM SEGUNDO PLANO (ARQUIVO NO MINIO, LINK AO TERMINAR) =====
+    if request.GET.get('exportar_segundo_plano'):
+        return redirecionar_para_exportacao(request, 'relatorio_clientes', filtros_relatorio)
+    
     # ===== BUSCAR DADOS PARA OS SELECTS =====
     lojas = Loja.objects.filter(ativo=True).order_by('codigo')
     vendedores = Vendedor.objects.filter(ativo=True).order_by('codigo')
@@ -69,47 +150,38 @@ def relatorio_clientes(request):
     # ===== APLICAR FILTROS E GERAR RELATÓRIO =====
     dados_relatorio = []
     meses_periodo = []
+    matriz = None
     
     # O relatório será gerado se 'gerar_relatorio' for acionado ou se houver qualquer filtro aplicado
     # removido o "apenas_com_vendas" da condição, pois agora é sempre True
-    if request.GET.get('gerar_relatorio') or any(request.GET.getlist(key) for key in ['loja', 'vendedor', 'estado', 'grupo', 'fabricante', 'produto']) or incluir_coligados:
+    if request.GET.get('gerar_relatorio') or any(request.GET.getlist(key) for key in ['loja', 'vendedor', 'estado', 'grupo', 'fabricante', 'produto']) or incluir_coligados or consolidar_coligados or comparar:
         try:
-            dados_relatorio, meses_periodo = gerar_dados_relatorio(
-                data_inicio=data_inicio,
-                data_fim=data_fim,
-                loja_codigos=loja_codigos,
-                vendedor_codigos=vendedor_codigos,
-                estados=estados,
-                grupo_codigos=grupo_codigos,
-                fabricante_codigos=fabricante_codigos,
-                produto_codigos=produto_codigos,
-                incluir_coligados=incluir_coligados,
-                apenas_com_vendas=apenas_com_vendas # agora é sempre True
-            )
+            dados_relatorio, meses_periodo, matriz = _obter_relatorio(filtros_relatorio)
         except Exception as e:
             logger.error(f"Erro ao gerar relatório: {str(e)}")
             dados_relatorio = []
             meses_periodo = []
+            matriz = None
     
     # ===== EXPORTAR PARA EXCEL =====
     if request.GET.get('exportar_excel') and dados_relatorio:
-        return exportar_relatorio_excel(dados_relatorio, meses_periodo, {
-            'data_inicio': data_inicio,
-            'data_fim': data_fim,
-            'loja': ', '.join(loja_codigos) if loja_codigos else 'Todas',
-            'vendedor': ', '.join(vendedor_codigos) if vendedor_codigos else 'Todos',
-            'estado': ', '.join(estados) if estados else 'Todos',
-            'grupo': ', '.join(grupo_codigos) if grupo_codigos else 'Todos',
-            'fabricante': ', '.join(fabricante_codigos) if fabricante_codigos else 'Todos',
-            'produto': ', '.join(produto_codigos) if produto_codigos else 'Todos',
-            'incluir_coligados': incluir_coligados,
-            'apenas_com_vendas': apenas_com_vendas
-        })
+        return exportar_relatorio_excel(dados_relatorio, meses_periodo, matriz, _descricao_filtros(filtros_relatorio))
+    
+    # A grade busca as linhas página a página no endpoint JSON, com os mesmos filtros
+    parametros_grade = request.GET.copy()
+    for parametro in ('exportar_excel', 'exportacao', 'pagina', 'por_pagina', 'ordenar', 'direcao', 'busca'):
+        parametros_grade.pop(parametro, None)
     
     context = {
-        # Dados do relatório
-        'dados_relatorio': dados_relatorio,
+        # Dados do relatório (as linhas não são mais embutidas na página)
         'meses_periodo': meses_periodo,
+        'comparar': comparar,
+        'opcoes_comparacao': OPCOES_COMPARACAO,
+        # Colunas fora dos meses: 9 do cliente + TOTAL (+ 4 da comparação)
+        'colunas_extras': 10 + (len(COLUNAS_COMPARACAO) if comparar else 0),
+        'url_dados_relatorio': f"{reverse('gestor:relatorio_clientes_dados')}?{parametros_grade.urlencode()}",
+        'linhas_por_pagina': LINHAS_POR_PAGINA,
+        'exportacao': exportacao_em_andamento(request),
         
         # Dados para os selects
         'lojas': lojas,
@@ -130,52 +202,181 @@ def relatorio_clientes(request):
             'fabricante_list': fabricante_codigos,
             'produto_list': produto_codigos,
             'incluir_coligados': incluir_coligados,
+            'consolidar_coligados': consolidar_coligados,
+            'comparar': comparar,
             'apenas_com_vendas': apenas_com_vendas, # agora é sempre True
         },
         
         # Estatísticas
         'total_clientes': len(dados_relatorio),
-        'total_geral': sum(cliente['total'] for cliente in dados_relatorio) if dados_relatorio else 0,
-        
-        # JSON para JavaScript (serialização segura)
-        'dados_relatorio_json': json.dumps(dados_relatorio) if dados_relatorio else '[]',
-        'meses_periodo_json': json.dumps(meses_periodo) if meses_periodo else '[]',
+        'total_geral': matriz.total_geral() if dados_relatorio else 0,
     }
     
     return render(request, 'gestor/relatorio_clientes.html', context)
 
 
-def gerar_dados_relatorio(data_inicio, data_fim, loja_codigos, vendedor_codigos, estados, 
-                         grupo_codigos, fabricante_codigos, produto_codigos, incluir_coligados, apenas_com_vendas):
-    """Gera os dados do relatório de clientes com faturamento mensal - MÚLTIPLA ESCOLHA"""
-    
-    # ===== QUERY BASE DE VENDAS =====
-    vendas_query = Vendas.objects.filter(
-        data_venda__gte=data_inicio,
-        data_venda__lte=data_fim
-    ).select_related('cliente', 'loja', 'produto', 'grupo_produto', 'fabricante').exclude(
-        cliente__status='outros'
+@login_required
+def relatorio_clientes_dados(request):
+    """
+    Grade do relatório em JSON: uma página de linhas já ordenada e filtrada no
+    servidor, mais os totais por mês das linhas filtradas.
+    
+    Parâmetros (além dos filtros do relatório): pagina, por_pagina, ordenar
+    (coluna ou mês 'YYYY-MM'), direcao (asc/desc), busca (código, nome, CPF/CNPJ,
+    cidade ou vendedor), top (N clientes de maior total) e percentil (só clientes
+    com total acima do percentil 0-100).
+    """
+    try:
+        dados_relatorio, meses_periodo, matriz = _obter_relatorio(_filtros_relatorio(request))
+    except ValueError as e:
+        return HttpResponse(
+            orjson.dumps({'erro': f'Filtros inválidos: {str(e)}'}),
+            content_type='application/json', status=400
+        )
+    except Exception as e:
+        logger.error(f"Erro ao gerar dados do relatório: {str(e)}")
+        return HttpResponse(
+            orjson.dumps({'erro': 'Erro ao gerar relatório'}),
+            content_type='application/json', status=500
+        )
+    
+    try:
+        por_pagina = int(request.GET.get('por_pagina', LINHAS_POR_PAGINA))
+        top = int(request.GET['top']) if request.GET.get('top') else None
+        percentil = float(request.GET['percentil']) if request.GET.get('percentil') else None
+    except ValueError:
+        return HttpResponse(
+            orjson.dumps({'erro': 'por_pagina, top e percentil devem ser numéricos'}),
+            content_type='application/json', status=400
+        )
+    por_pagina = min(max(por_pagina, 1), MAXIMO_LINHAS_POR_PAGINA)
+    if percentil is not None:
+        percentil = min(max(percentil, 0), 100)
+    
+    resultado = paginar_relatorio(
+        dados_relatorio, meses_periodo, matriz,
+        pagina=request.GET.get('pagina', 1),
+        por_pagina=por_pagina,
+        ordenar=request.GET.get('ordenar', 'total'),
+        direcao=request.GET.get('direcao', 'desc'),
+        busca=request.GET.get('busca', ''),
+        top=top,
+        percentil=percentil,
     )
+    return HttpResponse(orjson.dumps(resultado), content_type='application/json')
+
+
+def paginar_relatorio(dados_relatorio, meses_periodo, matriz, pagina=1, por_pagina=LINHAS_POR_PAGINA,
+                      ordenar='total', direcao='desc', busca='', top=None, percentil=None):
+    """
+    Filtra, ordena e recorta as linhas do relatório; os totais cobrem todas as linhas filtradas.
+    `matriz` é a MatrizPivot alinhada a dados_relatorio (ver gerar_dados_relatorio).
+    """
+    chaves_meses = [mes['ano_mes'] for mes in meses_periodo]
+    decrescente = direcao == 'desc'
+    
+    # ===== BUSCA (ÍNDICES DAS LINHAS QUE CASAM) =====
+    termo = busca.strip().lower()
+    if termo:
+        indices = np.array([
+            indice for indice, linha in enumerate(dados_relatorio)
+            if any(termo in str(linha[campo]).lower() for campo in CAMPOS_BUSCA)
+        ], dtype=np.int64)
+    else:
+        indices = np.arange(len(dados_relatorio))
+    filtrada = matriz.selecionar(indices)
+    
+    # ===== CORTES POR TOTAL (PERCENTIL E TOP N) =====
+    if percentil is not None:
+        mascara = filtrada.acima_do_percentil(percentil)
+        indices, filtrada = indices[mascara], filtrada.selecionar(mascara)
+    if top is not None:
+        # top() já devolve por total decrescente; a ordenação abaixo reaplica a pedida
+        melhores = np.sort(filtrada.top(top))
+        indices, filtrada = indices[melhores], filtrada.selecionar(melhores)
+    
+    # ===== ORDENAÇÃO =====
+    comparando = bool(dados_relatorio) and 'total_anterior' in dados_relatorio[0]
+    if ordenar in chaves_meses:
+        ordem = filtrada.ordem_por_coluna(ordenar, decrescente)
+    elif ordenar in COLUNAS_COMPARACAO and comparando:
+        # Variação percentual sem base (anterior zerado) fica no fim nos dois sentidos
+        chave = np.array([
+            np.nan if dados_relatorio[indice][ordenar] is None else dados_relatorio[indice][ordenar]
+            for indice in indices.tolist()
+        ], dtype=np.float64)
+        ordem = np.argsort(-chave if decrescente else chave, kind='stable')
+    elif ordenar in COLUNAS_ORDENACAO and ordenar != 'total':
+        textos = [str(dados_relatorio[indice][ordenar]).lower() for indice in indices.tolist()]
+        ordem = np.array(sorted(range(len(textos)), key=textos.__getitem__, reverse=decrescente), dtype=np.int64)
+    else:
+        ordenar = 'total'
+        ordem = filtrada.ordem_por_total(decrescente)
+    indices = indices[ordem]
+    
+    # ===== PAGINAÇÃO =====
+    paginator = Paginator(indices, por_pagina)
+    pagina_atual = paginator.get_page(pagina)
+    
+    totais = {
+        'por_mes': dict(zip(chaves_meses, filtrada.totais_colunas().tolist())),
+        'geral': filtrada.total_geral(),
+    }
+    if comparando:
+        totais['anterior'] = float(sum(dados_relatorio[indice]['total_anterior'] for indice in indices.tolist()))
+    
+    return {
+        'linhas': [dados_relatorio[indice] for indice in pagina_atual.object_list.tolist()],
+        'pagina': pagina_atual.number,
+        'total_paginas': paginator.num_pages,
+        'por_pagina': por_pagina,
+        'total_registros': len(dados_relatorio),
+        'total_filtrado': paginator.count,
+        'ordenar': ordenar,
+        'direcao': 'desc' if decrescente else 'asc',
+        'meses': meses_periodo,
+        'totais': totais,
+    }
+
+
+def gerar_dados_relatorio(data_inicio, data_fim, loja_codigos, vendedor_codigos, estados, 
+                         grupo_codigos, fabricante_codigos, produto_codigos, incluir_coligados, apenas_com_vendas,
+                         consolidar_coligados=False, comparar=''):
+    """
+    Gera os dados do relatório de clientes com faturamento mensal - MÚLTIPLA ESCOLHA
+    
+    Com consolidar_coligados, cada linha é um grupo: o cliente master com as vendas
+    dos seus sub-clientes somadas, agrupadas no próprio SQL pelo codigo_grupo
+    do cliente.
+    
+    Com comparar ('ano_anterior' ou 'periodo_anterior'), as linhas ganham
+    total_anterior, variacao, variacao_percentual e meses_ativos. As duas janelas
+    saem das mesmas consultas (agregação condicional em totais_comparativos), e
+    clientes que só compraram na janela anterior também aparecem, zerados no período.
+    """
+    
+    # ===== FILTROS DAS VENDAS (MÚLTIPLA ESCOLHA) =====
+    # Caminhos válidos tanto em Vendas quanto no ResumoVendasMensal
+    filtro_vendas = ~Q(cliente__status='outros')
     
-    # ===== APLICAR FILTROS NAS VENDAS (MÚLTIPLA ESCOLHA) =====
     if loja_codigos:
-        vendas_query = vendas_query.filter(loja__codigo__in=loja_codigos)
+        filtro_vendas &= Q(loja__codigo__in=loja_codigos)
     
     if vendedor_codigos:
-        vendas_query = vendas_query.filter(vendedor_nf__in=vendedor_codigos)
+        filtro_vendas &= Q(vendedor_nf__in=vendedor_codigos)
     
     if grupo_codigos:
-        vendas_query = vendas_query.filter(grupo_produto__codigo__in=grupo_codigos)
+        filtro_vendas &= Q(grupo_produto__codigo__in=grupo_codigos)
     
     if fabricante_codigos:
-        vendas_query = vendas_query.filter(fabricante__codigo__in=fabricante_codigos)
+        filtro_vendas &= Q(fabricante__codigo__in=fabricante_codigos)
     
     if produto_codigos:
-        vendas_query = vendas_query.filter(produto__codigo__in=produto_codigos)
+        filtro_vendas &= Q(produto__codigo__in=produto_codigos)
     
     # ===== FILTRO POR ESTADOS DO CLIENTE (MÚLTIPLA ESCOLHA) =====
     if estados:
-        vendas_query = vendas_query.filter(cliente__estado__in=estados)
+        filtro_vendas &= Q(cliente__estado__in=estados)
     
     # ===== GERAR LISTA DE MESES DO PERÍODO =====
     data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
@@ -205,31 +406,80 @@ def gerar_dados_relatorio(data_inicio, data_fim, loja_codigos, vendedor_codigos,
         else:
             ano_mes_atual = ano_mes_atual.replace(month=ano_mes_atual.month + 1)
     
-    # ===== AGRUPAR VENDAS POR CLIENTE E MÊS =====
-    vendas_por_cliente_mes = defaultdict(lambda: defaultdict(float))
+    # ===== AGRUPAR VENDAS POR CLIENTE E MÊS (GROUP BY NO RESUMO MENSAL) =====
+    # Uma linha por (cliente, anomes); só as bordas parciais do período leem a tabela de vendas.
+    # Consolidando coligados, uma linha por (código do grupo, anomes)
+    if consolidar_coligados:
+        campo_linha = 'codigo_grupo'
+        anotacoes = {'codigo_grupo': Cliente.expressao_codigo_grupo('cliente__')}
+    else:
+        campo_linha = 'cliente_id'
+        anotacoes = None
+    # Comparando, a janela anterior entra na mesma consulta (total_valor_1)
+    periodos = [(data_inicio_obj, data_fim_obj)]
+    if comparar:
+        periodos.append(periodo_comparacao(data_inicio_obj, data_fim_obj, comparar))
+    totais_cliente_mes = totais_comparativos(periodos, [campo_linha, 'anomes'], filtro_vendas, anotacoes)
+    
+    # Matriz cliente × mês (colunas na ordem de meses_periodo)
+    chaves_meses = [mes['ano_mes'] for mes in meses_periodo]
+    linhas_matriz = [linha[campo_linha] for linha in totais_cliente_mes]
+    anomes_matriz = [f"{linha['anomes'][:4]}-{linha['anomes'][4:]}" for linha in totais_cliente_mes]
+    matriz_vendas = MatrizPivot.de_triplas(
+        linhas_matriz, anomes_matriz,
+        [linha['total_valor_0'] for linha in totais_cliente_mes],
+        rotulos_colunas=chaves_meses,
+    )
+    
+    # Matriz da janela anterior (meses próprios; só o total por linha é usado)
+    matriz_anterior = None
+    if comparar:
+        matriz_anterior = MatrizPivot.de_triplas(
+            linhas_matriz, anomes_matriz, [linha['total_valor_1'] for linha in totais_cliente_mes]
+        )
+    
+    # ===== DADOS DOS CLIENTES (UMA CONSULTA) =====
+    # As linhas da matriz são ids de cliente ou, consolidando, códigos dos masters
+    filtro_linhas = Q(codigo__in=matriz_vendas.linhas) if consolidar_coligados else Q(pk__in=matriz_vendas.linhas)
+    clientes_com_vendas = list(Cliente.objects.filter(filtro_linhas).only(
+        'id', 'codigo', 'nome', 'cpf_cnpj', 'cidade', 'estado', 'codigo_vendedor',
+        'codigo_loja', 'status', 'codigo_master'
+    ).order_by('codigo'))
+    
+    # Nomes dos vendedores de todos os clientes de uma vez (um get_many no cache)
+    nomes_vendedores = Vendedor.nomes_por_codigo(cliente.codigo_vendedor for cliente in clientes_com_vendas)
+    
     clientes_info = {}
+    for cliente in clientes_com_vendas:
+        clientes_info[cliente.codigo] = {
+            'chave': cliente.codigo if consolidar_coligados else cliente.pk,
+            'nome': cliente.nome,
+            'codigo': cliente.codigo,
+            'cpf_cnpj': cliente.cpf_cnpj or '-',
+            'cidade': cliente.cidade or '-',
+            'estado': cliente.estado or '-',
+            'vendedor_codigo': cliente.codigo_vendedor or '-',
+            'vendedor_nome': nomes_vendedores.get(cliente.codigo_vendedor) or '-',
+            'loja_codigo': cliente.codigo_loja or '-',
+            'status': cliente.get_status_display(),
+            'tipo': 'Coligado' if cliente.codigo_master else 'Principal',
+        }
     
-    for venda in vendas_query:
-        cliente_codigo = venda.cliente.codigo
-        ano_mes = venda.data_venda.strftime('%Y-%m')
-        
-        # Somar valor da venda
-        vendas_por_cliente_mes[cliente_codigo][ano_mes] += float(venda.valor_total or 0)
-        
-        # Armazenar informações do cliente
-        if cliente_codigo not in clientes_info:
-            clientes_info[cliente_codigo] = {
-                'cliente': venda.cliente,
-                'nome': venda.cliente.nome,
-                'codigo': venda.cliente.codigo,
-                'cpf_cnpj': venda.cliente.cpf_cnpj or '-',
-                'cidade': venda.cliente.cidade or '-',
-                'estado': venda.cliente.estado or '-',
-                'vendedor_codigo': venda.cliente.codigo_vendedor or '-',
-                'vendedor_nome': venda.cliente.nome_vendedor or '-',
-                'loja_codigo': venda.cliente.codigo_loja or '-',
-                'status': venda.cliente.get_status_display(),
-                'tipo': 'Coligado' if venda.cliente.codigo_master else 'Principal',
+    # Master informado nos sub-clientes mas sem cadastro próprio: o grupo aparece só pelo código
+    if consolidar_coligados:
+        for codigo in sorted(set(matriz_vendas.linhas) - clientes_info.keys()):
+            clientes_info[codigo] = {
+                'chave': codigo,
+                'nome': 'Master não cadastrado',
+                'codigo': codigo,
+                'cpf_cnpj': '-',
+                'cidade': '-',
+                'estado': '-',
+                'vendedor_codigo': '-',
+                'vendedor_nome': '-',
+                'loja_codigo': '-',
+                'status': '-',
+                'tipo': 'Principal',
             }
     
     # ===== INCLUIR CLIENTES SEM VENDAS (SE SOLICITADO) =====
@@ -249,43 +499,61 @@ def gerar_dados_relatorio(data_inicio, data_fim, loja_codigos, vendedor_codigos,
         if loja_codigos:
             clientes_sem_vendas = clientes_sem_vendas.filter(codigo_loja__in=loja_codigos)
         
-        # Filtro de coligados
-        if not incluir_coligados:
+        # Filtro de coligados (consolidando, os sub-clientes já estão no master)
+        if not incluir_coligados or consolidar_coligados:
             clientes_sem_vendas = clientes_sem_vendas.filter(
                 Q(codigo_master__isnull=True) | Q(codigo_master='')
             )
         
         # Adicionar clientes sem vendas
+        clientes_sem_vendas = list(clientes_sem_vendas)
+        nomes_vendedores.update(Vendedor.nomes_por_codigo(cliente.codigo_vendedor for cliente in clientes_sem_vendas))
         for cliente in clientes_sem_vendas:
             if cliente.codigo not in clientes_info:
                 clientes_info[cliente.codigo] = {
-                    'cliente': cliente,
+                    'chave': cliente.codigo if consolidar_coligados else cliente.pk,
                     'nome': cliente.nome,
                     'codigo': cliente.codigo,
                     'cpf_cnpj': cliente.cpf_cnpj or '-',
                     'cidade': cliente.cidade or '-',
                     'estado': cliente.estado or '-',
                     'vendedor_codigo': cliente.codigo_vendedor or '-',
-                    'vendedor_nome': cliente.nome_vendedor or '-',
+                    'vendedor_nome': nomes_vendedores.get(cliente.codigo_vendedor) or '-',
                     'loja_codigo': cliente.codigo_loja or '-',
                     'status': cliente.get_status_display(),
                     'tipo': 'Coligado' if cliente.codigo_master else 'Principal',
                 }
     
     # ===== APLICAR FILTRO DE COLIGADOS =====
-    if not incluir_coligados:
+    # Consolidando, as vendas dos coligados já estão na linha do master
+    if not incluir_coligados and not consolidar_coligados:
         clientes_filtrados = {}
         for codigo, info in clientes_info.items():
             if info['tipo'] == 'Principal':
                 clientes_filtrados[codigo] = info
         clientes_info = clientes_filtrados
     
-    # ===== MONTAR DADOS FINAIS =====
-    dados_relatorio = []
+    # ===== MONTAR DADOS FINAIS (TOTAIS E ORDENAÇÃO VETORIZADOS) =====
+    infos = list(clientes_info.values())
+    matriz = matriz_vendas.reindexar_linhas([info['chave'] for info in infos])
+    
+    # Ordenar por total decrescente (estável: empates continuam por código)
+    ordem = matriz.ordem_por_total()
+    valores = matriz.valores[ordem]
+    totais = valores.sum(axis=1)
     
-    for cliente_codigo, cliente_info in clientes_info.items():
-        # Dados do cliente
-        linha_cliente = {
+    if comparar:
+        totais_anteriores = matriz_anterior.reindexar_linhas(
+            [infos[indice]['chave'] for indice in ordem.tolist()]
+        ).totais_linhas()
+        variacoes = totais - totais_anteriores
+        meses_ativos = (valores > 0).sum(axis=1)
+        comparacoes = zip(totais_anteriores.tolist(), variacoes.tolist(), meses_ativos.tolist())
+    
+    dados_relatorio = []
+    for indice, valores_mes, total in zip(ordem.tolist(), valores.tolist(), totais.tolist()):
+        cliente_info = infos[indice]
+        linha_relatorio = {
             'codigo': cliente_info['codigo'],
             'nome': cliente_info['nome'],
             'cpf_cnpj': cliente_info['cpf_cnpj'],
@@ -296,258 +564,50 @@ def gerar_dados_relatorio(data_inicio, data_fim, loja_codigos, vendedor_codigos,
             'loja_codigo': cliente_info['loja_codigo'],
             'status': cliente_info['status'],
             'tipo': cliente_info['tipo'],
-            'vendas_por_mes': {},
-            'total': 0
+            'vendas_por_mes': dict(zip(chaves_meses, valores_mes)),
+            'total': total,
         }
-        
-        # Valores por mês
-        total_cliente = 0
-        for mes_info in meses_periodo:
-            ano_mes = mes_info['ano_mes']
-            valor_mes = vendas_por_cliente_mes[cliente_codigo].get(ano_mes, 0)
-            linha_cliente['vendas_por_mes'][ano_mes] = valor_mes
-            total_cliente += valor_mes
-        
-        linha_cliente['total'] = total_cliente
-        dados_relatorio.append(linha_cliente)
-    
-    # ===== ORDENAR POR TOTAL DECRESCENTE =====
-    dados_relatorio.sort(key=lambda x: x['total'], reverse=True)
-    
-    return dados_relatorio, meses_periodo
+        if comparar:
+            total_anterior, variacao, ativos = next(comparacoes)
+            linha_relatorio.update({
+                'total_anterior': total_anterior,
+                'variacao': variacao,
+                # Sem faturamento anterior não há base para o percentual
+                'variacao_percentual': variacao / total_anterior * 100 if total_anterior else None,
+                'meses_ativos': ativos,
+            })
+        dados_relatorio.append(linha_relatorio)
+    
+    # Matriz alinhada às linhas do relatório (usada pela grade JSON e pela exportação)
+    matriz = MatrizPivot([linha['codigo'] for linha in dados_relatorio], chaves_meses, valores)
+    
+    return dados_relatorio, meses_periodo, matriz
 
 
-def exportar_relatorio_excel(dados_relatorio, meses_periodo, filtros):
-    """Exporta o relatório para Excel"""
-    
-    # ===== CRIAR WORKBOOK =====
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Relatório de Clientes"
-    
-    # ===== ESTILOS =====
-    font_titulo = Font(name='Arial', size=14, bold=True)
-    font_cabecalho = Font(name='Arial', size=10, bold=True, color='FFFFFF')
-    font_dados = Font(name='Arial', size=9)
-    font_total = Font(name='Arial', size=10, bold=True)
-    
-    fill_cabecalho = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-    fill_total = PatternFill(start_color='E7E6E6', end_color='E7E6E6', fill_type='solid')
-    
-    border_thin = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    alignment_center = Alignment(horizontal='center', vertical='center')
-    alignment_right = Alignment(horizontal='right', vertical='center')
-    
-    # ===== TÍTULO =====
-    ws.merge_cells('A1:' + get_column_letter(11 + len(meses_periodo)) + '1')
-    titulo_cell = ws['A1']
-    titulo_cell.value = "RELATÓRIO DE CLIENTES - FATURAMENTO MENSAL"
-    titulo_cell.font = font_titulo
-    titulo_cell.alignment = alignment_center
-    
-    # ===== INFORMAÇÕES DOS FILTROS =====
-    linha_atual = 3
-    ws[f'A{linha_atual}'] = "Período:"
-    ws[f'B{linha_atual}'] = f"{filtros['data_inicio']} a {filtros['data_fim']}"
-    linha_atual += 1
-    
-    if filtros['loja'] and filtros['loja'] != 'Todas': # Verificando se é diferente de 'Todas'
-        ws[f'A{linha_atual}'] = "Loja:"
-        ws[f'B{linha_atual}'] = filtros['loja']
-        linha_atual += 1
-    
-    if filtros['vendedor'] and filtros['vendedor'] != 'Todos': # Verificando se é diferente de 'Todos'
-        ws[f'A{linha_atual}'] = "Vendedor:"
-        ws[f'B{linha_atual}'] = filtros['vendedor']
-        linha_atual += 1
-    
-    if filtros['estado'] and filtros['estado'] != 'Todos': # Verificando se é diferente de 'Todos'
-        ws[f'A{linha_atual}'] = "Estado:"
-        ws[f'B{linha_atual}'] = filtros['estado']
-        linha_atual += 1
-    
-    if filtros['grupo'] and filtros['grupo'] != 'Todos': # Verificando se é diferente de 'Todos'
-        ws[f'A{linha_atual}'] = "Grupo:"
-        ws[f'B{linha_atual}'] = filtros['grupo']
-        linha_atual += 1
-
-    if filtros['fabricante'] and filtros['fabricante'] != 'Todos': # Verificando se é diferente de 'Todos'
-        ws[f'A{linha_atual}'] = "Fabricante:"
-        ws[f'B{linha_atual}'] = filtros['fabricante']
-        linha_atual += 1
-
-    if filtros['produto'] and filtros['produto'] != 'Todos': # Verificando se é diferente de 'Todos'
-        ws[f'A{linha_atual}'] = "Produto:"
-        ws[f'B{linha_atual}'] = filtros['produto']
-        linha_atual += 1
-    
-    ws[f'A{linha_atual}'] = "Incluir Coligados:"
-    ws[f'B{linha_atual}'] = "Sim" if filtros['incluir_coligados'] else "Não"
-    linha_atual += 1
+def exportar_relatorio_excel(dados_relatorio, meses_periodo, matriz, filtros):
+    """Exporta o relatório para Excel (write_only em arquivo temporário, enviado em blocos)"""
+    arquivo = tempfile.TemporaryFile()
+    try:
+        gravar_relatorio_clientes(arquivo, dados_relatorio, meses_periodo, matriz, filtros)
+        arquivo.seek(0)
+    except Exception:
+        arquivo.close()
+        raise
 
-    ws[f'A{linha_atual}'] = "Apenas com Vendas:"
-    ws[f'B{linha_atual}'] = "Sim" if filtros['apenas_com_vendas'] else "Não"
-    linha_atual += 1
-    
-    linha_atual += 1
-    
-    # ===== CABEÇALHOS =====
-    cabecalhos = [
-        'Código', 'Nome do Cliente', 'CPF/CNPJ', 'Cidade', 'UF', 
-        'Loja', 'Vendedor', 'Status', 'Tipo'
-    ]
-    
-    # Adicionar meses
-    for mes_info in meses_periodo:
-        cabecalhos.append(mes_info['nome'])
-    
-    cabecalhos.append('TOTAL')
-    
-    # Escrever cabeçalhos
-    for col, cabecalho in enumerate(cabecalhos, 1):
-        cell = ws.cell(row=linha_atual, column=col)
-        cell.value = cabecalho
-        cell.font = font_cabecalho
-        cell.fill = fill_cabecalho
-        cell.alignment = alignment_center
-        cell.border = border_thin
-    
-    linha_atual += 1
-    
-    # ===== DADOS =====
-    total_geral_por_mes = {}
-    total_geral = 0
-    
-    for cliente in dados_relatorio:
-        col = 1
-        
-        # Dados básicos do cliente
-        ws.cell(row=linha_atual, column=col, value=cliente['codigo']).font = font_dados
-        col += 1
-        ws.cell(row=linha_atual, column=col, value=cliente['nome']).font = font_dados
-        col += 1
-        ws.cell(row=linha_atual, column=col, value=cliente['cpf_cnpj']).font = font_dados
-        col += 1
-        ws.cell(row=linha_atual, column=col, value=cliente['cidade']).font = font_dados
-        col += 1
-        ws.cell(row=linha_atual, column=col, value=cliente['estado']).font = font_dados
-        col += 1
-        ws.cell(row=linha_atual, column=col, value=cliente['loja_codigo']).font = font_dados
-        col += 1
-        ws.cell(row=linha_atual, column=col, value=f"{cliente['vendedor_codigo']} - {cliente['vendedor_nome']}" if cliente['vendedor_codigo'] != '-' else '-').font = font_dados
-        col += 1
-        ws.cell(row=linha_atual, column=col, value=cliente['status']).font = font_dados
-        col += 1
-        ws.cell(row=linha_atual, column=col, value=cliente['tipo']).font = font_dados
-        col += 1
-        
-        # Valores por mês
-        for mes_info in meses_periodo:
-            ano_mes = mes_info['ano_mes']
-            valor = cliente['vendas_por_mes'].get(ano_mes, 0)
-            
-            cell = ws.cell(row=linha_atual, column=col)
-            if valor > 0:
-                cell.value = valor
-                cell.number_format = '#,##0.00'
-            else:
-                cell.value = '-'
-            cell.font = font_dados
-            cell.alignment = alignment_right
-            
-            # Somar para total geral
-            if ano_mes not in total_geral_por_mes:
-                total_geral_por_mes[ano_mes] = 0
-            total_geral_por_mes[ano_mes] += valor
-            
-            col += 1
-        
-        # Total do cliente
-        cell = ws.cell(row=linha_atual, column=col)
-        if cliente['total'] > 0:
-            cell.value = cliente['total']
-            cell.number_format = '#,##0.00'
-        else:
-            cell.value = '-'
-        cell.font = font_total
-        cell.alignment = alignment_right
-        cell.fill = fill_total
-        
-        total_geral += cliente['total']
-        linha_atual += 1
-    
-    # ===== LINHA DE TOTAIS =====
-    linha_total = linha_atual
-    col = 1
-    
-    # Células vazias até "TOTAL"
-    for i in range(8):
-        ws.cell(row=linha_total, column=col).fill = fill_total
-        col += 1
-    
-    # Label "TOTAL"
-    cell = ws.cell(row=linha_total, column=col)
-    cell.value = "TOTAL GERAL"
-    cell.font = font_total
-    cell.fill = fill_total
-    cell.alignment = alignment_right
-    col += 1
-    
-    # Totais por mês
-    for mes_info in meses_periodo:
-        ano_mes = mes_info['ano_mes']
-        cell = ws.cell(row=linha_total, column=col)
-        valor_total_mes = total_geral_por_mes.get(ano_mes, 0)
-        if valor_total_mes > 0:
-            cell.value = valor_total_mes
-            cell.number_format = '#,##0.00'
-        else:
-            cell.value = '-'
-        cell.font = font_total
-        cell.fill = fill_total
-        cell.alignment = alignment_right
-        col += 1
-    
-    # Total geral
-    cell = ws.cell(row=linha_total, column=col)
-    if total_geral > 0:
-        cell.value = total_geral
-        cell.number_format = '#,##0.00'
-    else:
-        cell.value = '-'
-    cell.font = font_total
-    cell.fill = fill_total
-    cell.alignment = alignment_right
-    
-    # ===== BORDAS PARA TODA A TABELA =====
-    for row in range(linha_atual - len(dados_relatorio), linha_atual + 1):
-        for col in range(1, len(cabecalhos) + 1):
-            ws.cell(row=row, column=col).border = border_thin
-    
-    # ===== AJUSTAR LARGURAS DAS COLUNAS =====
-    larguras = [12, 30, 18, 20, 5, 8, 25, 12, 12]  # Colunas básicas
-    for mes in meses_periodo:
-        larguras.append(12)  # Colunas de meses
-    larguras.append(15)  # Coluna de total
-    
-    for i, largura in enumerate(larguras, 1):
-        ws.column_dimensions[get_column_letter(i)].width = largura
-    
-    # ===== PREPARAR RESPOSTA HTTP =====
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    
     # Nome do arquivo
     data_hoje = timezone.now().strftime('%Y%m%d_%H%M%S')
-    response['Content-Disposition'] = f'attachment; filename="relatorio_clientes_{data_hoje}.xlsx"'
-    
-    # Salvar workbook na resposta
-    wb.save(response)
-    return response
\ No newline at end of file
+
+    # O FileResponse fecha (e assim apaga) o arquivo temporário no fim do envio
+    return FileResponse(
+        arquivo,
+        as_attachment=True,
+        filename=f"relatorio_clientes_{data_hoje}.xlsx",
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+def exportar_relatorio_arquivo(filtros_relatorio, destino):
+    """Grava o Excel do relatório em `destino` (exportação em segundo plano); retorna o nº de linhas"""
+    dados_relatorio, meses_periodo, matriz = _obter_relatorio(filtros_relatorio)
+    gravar_relatorio_clientes(destino, dados_relatorio, meses_periodo, matriz, _descricao_filtros(filtros_relatorio))
+    return len(dados_relatorio)
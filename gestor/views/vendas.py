@@ -4,22 +4,35 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.db import transaction
 from django.db.models import Q
 
 from core.models import Vendas, Loja, Vendedor
 from core.forms import VendasForm
+from core.services.edicao_vendas import atualizar_derivados_vendas
+from core.services.exportacao_excel import gravar_vendas
+from gestor.views.exportacao import exportacao_em_andamento, redirecionar_para_exportacao
 
 logger = logging.getLogger(__name__)
 
-@login_required
-def vendas_list(request):
-    """Lista de vendas com filtros"""
-    # Filtros múltiplos
-    search = request.GET.get('search', '')
-    data_inicio = request.GET.get('data_inicio', '')
-    data_fim = request.GET.get('data_fim', '')
-    loja_filtro = request.GET.get('loja', '')
-    vendedor_filtro = request.GET.get('vendedor', '')
+def _filtros_vendas(request):
+    """Filtros da lista de vendas (mesmo formato usado por filtrar_vendas)"""
+    return {
+        'search': request.GET.get('search', ''),
+        'data_inicio': request.GET.get('data_inicio', ''),
+        'data_fim': request.GET.get('data_fim', ''),
+        'loja': request.GET.get('loja', ''),
+        'vendedor': request.GET.get('vendedor', ''),
+    }
+
+
+def filtrar_vendas(filtros):
+    """Vendas filtradas e ordenadas (tela e exportação Excel em segundo plano)"""
+    search = filtros.get('search', '')
+    data_inicio = filtros.get('data_inicio', '')
+    data_fim = filtros.get('data_fim', '')
+    loja_filtro = filtros.get('loja', '')
+    vendedor_filtro = filtros.get('vendedor', '')
     
     # Selecionar relações necessárias. 'vendedor' não é mais uma FK direta.
     # 'cliente__vendedor_nf' não seria correto aqui, pois o vendedor do cliente é 'codigo_vendedor'.
@@ -60,7 +73,30 @@ def vendas_list(request):
         vendas_list = vendas_list.filter(cliente__codigo_vendedor=vendedor_filtro)
     
     # Ordenação
-    vendas_list = vendas_list.order_by('-data_venda', '-id')
+    return vendas_list.order_by('-data_venda', '-id')
+
+
+def exportar_vendas_arquivo(filtros, destino):
+    """Grava o Excel das vendas filtradas em `destino` (exportação em segundo plano); retorna o nº de linhas"""
+    return gravar_vendas(destino, filtrar_vendas(filtros), filtros)
+
+
+@login_required
+def vendas_list(request):
+    """Lista de vendas com filtros"""
+    # Filtros múltiplos
+    filtros = _filtros_vendas(request)
+    search = filtros['search']
+    data_inicio = filtros['data_inicio']
+    data_fim = filtros['data_fim']
+    loja_filtro = filtros['loja']
+    vendedor_filtro = filtros['vendedor']
+    
+    # ===== EXPORTAR EM SEGUNDO PLANO =====
+    if request.GET.get('exportar_segundo_plano'):
+        return redirecionar_para_exportacao(request, 'vendas', filtros)
+    
+    vendas_list = filtrar_vendas(filtros)
     
     # Paginação
     paginator = Paginator(vendas_list, 20)
@@ -83,6 +119,7 @@ def vendas_list(request):
     
     context = {
         'vendas': vendas,
+        'exportacao': exportacao_em_andamento(request),
         'search': search,
         'data_inicio': data_inicio,
         'data_fim': data_fim,
@@ -103,7 +140,9 @@ def vendas_create(request):
         form = VendasForm(request.POST)
         if form.is_valid():
             try:
-                venda = form.save()
+                with transaction.atomic():
+                    venda = form.save()
+                    atualizar_derivados_vendas([(venda.anomes, venda.cliente_id)])
                 messages.success(request, f'Venda para {venda.cliente.nome} criada com sucesso!')
                 return redirect('gestor:vendas_list')
             except Exception as e:
@@ -125,12 +164,16 @@ def vendas_create(request):
 def vendas_edit(request, pk):
     """Editar venda"""
     venda = get_object_or_404(Vendas, pk=pk)
+    # Mês e cliente antes da edição (o form altera a instância na validação)
+    anterior = (venda.anomes, venda.cliente_id)
     
     if request.method == 'POST':
         form = VendasForm(request.POST, instance=venda)
         if form.is_valid():
             try:
-                venda = form.save()
+                with transaction.atomic():
+                    venda = form.save()
+                    atualizar_derivados_vendas([anterior, (venda.anomes, venda.cliente_id)])
                 messages.success(request, f'Venda para {venda.cliente.nome} atualizada com sucesso!')
                 return redirect('gestor:vendas_list')
             except Exception as e:
@@ -178,7 +221,9 @@ def vendas_delete(request, pk):
     if request.method == 'POST':
         cliente_nome = venda.cliente.nome
         venda_id = venda.id
-        venda.delete()
+        with transaction.atomic():
+            venda.delete()
+            atualizar_derivados_vendas([(venda.anomes, venda.cliente_id)])
         messages.success(request, f'Venda #{venda_id} de {cliente_nome} excluída com sucesso!')
         return redirect('gestor:vendas_list')
     
@@ -0,0 +1,4 @@
+# Carrega o app Celery junto com o Django (necessário para o @shared_task)
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
@@ -0,0 +1,28 @@
+# portalcomercial/celery.py
+
+import os
+
+from celery import Celery
+from celery.schedules import crontab
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portalcomercial.settings')
+
+app = Celery('portalcomercial')
+
+# Todas as configurações CELERY_* vêm do settings.py
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+# ===== TAREFAS PERIÓDICAS (celery beat) =====
+app.conf.beat_schedule = {
+    # Janelas de faturamento 30/90/365 dias dos clientes (mesmo que o comando atualizar_metricas_clientes)
+    'atualizar-metricas-clientes': {
+        'task': 'core.atualizar_metricas_clientes',
+        'schedule': crontab(hour=1, minute=0),
+    },
+    # Importações BI abandonadas (worker reiniciado) e sobras do spool
+    'encerrar-jobs-abandonados': {
+        'task': 'core.encerrar_jobs_abandonados',
+        'schedule': crontab(minute='*/15'),
+    },
+}
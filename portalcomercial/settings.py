@@ -2,6 +2,7 @@
 
 from pathlib import Path
 import os
+from urllib.parse import urlparse
 import dj_database_url
 from dotenv import load_dotenv
 import sys
@@ -54,6 +55,15 @@ AWS_S3_SIGNATURE_VERSION = 's3v4'
 AWS_S3_REGION_NAME = 'us-east-1'  # Região padrão para compatibilidade
 AWS_S3_ADDRESSING_STYLE = 'path'  # Importante: usar 'path' em vez de 'virtual'
 
+# Cliente MinIO direto (storage.services.minio_service): mesmo servidor e bucket
+_minio_url = urlparse(AWS_S3_ENDPOINT_URL or '')
+MINIO_ENDPOINT = os.getenv('MINIO_ENDPOINT', _minio_url.netloc)
+MINIO_ACCESS_KEY = os.getenv('MINIO_ACCESS_KEY', AWS_ACCESS_KEY_ID)
+MINIO_SECRET_KEY = os.getenv('MINIO_SECRET_KEY', AWS_SECRET_ACCESS_KEY)
+MINIO_SECURE = os.getenv('MINIO_SECURE', 'True' if _minio_url.scheme == 'https' else 'False') == 'True'
+MINIO_BUCKET_NAME = os.getenv('MINIO_BUCKET_NAME', AWS_STORAGE_BUCKET_NAME)
+MINIO_REGION = AWS_S3_REGION_NAME
+
 # Usa MinIO como armazenamento padrão
 DEFAULT_FILE_STORAGE = 'core.storage.MinioStorage'
 MEDIA_URL = '/media/'
@@ -156,6 +166,30 @@ LOGOUT_REDIRECT_URL = '/login/'
 # Mensagens
 MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
 
+# Celery (importações e exportações em segundo plano)
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', '')
+CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND') or None
+CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'False') == 'True'
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Diretório onde os arquivos enviados aguardam o job de importação
+# (em deploy com worker separado, deve ser um volume compartilhado)
+IMPORTACAO_SPOOL_DIR = os.getenv('IMPORTACAO_SPOOL_DIR', os.path.join(BASE_DIR, 'media', 'importacoes'))
+
+# Sem CELERY_BROKER_URL os jobs rodam em uma thread do próprio processo web (servidor único)
+JOBS_EM_THREAD = os.getenv('JOBS_EM_THREAD', 'False' if CELERY_BROKER_URL else 'True') == 'True'
+
+# Job de importação sem terminar há mais que isso é dado como abandonado (worker reiniciado
+# ou morto): é marcado com erro e o arquivo do spool é removido
+IMPORTACAO_TEMPO_MAXIMO_MINUTOS = int(os.getenv('IMPORTACAO_TEMPO_MAXIMO_MINUTOS', 180))
+
+# Exportações Excel em segundo plano: validade (segundos) do link de download pré-assinado
+EXPORTACAO_LINK_EXPIRACAO = int(os.getenv('EXPORTACAO_LINK_EXPIRACAO', 24 * 60 * 60))
+
 # OpenAI
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
 
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='arquivorastreamento',
+            name='tipo_arquivo',
+            field=models.CharField(max_length=100),
+        ),
+    ]
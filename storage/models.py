@@ -5,7 +5,7 @@ class ArquivoRastreamento(models.Model):
     nome_original = models.CharField(max_length=255)
     path_minio = models.CharField(max_length=500, unique=True)
     bucket = models.CharField(max_length=100)
-    tipo_arquivo = models.CharField(max_length=50)
+    tipo_arquivo = models.CharField(max_length=100)  # MIME do xlsx tem 65 caracteres
     tamanho = models.BigIntegerField(default=0)  # tamanho em bytes
     data_upload = models.DateTimeField(auto_now_add=True)
     md5_hash = models.CharField(max_length=32, blank=True, null=True)  # para verificação de integridade
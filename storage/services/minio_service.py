@@ -4,6 +4,7 @@ from minio.error import S3Error
 import io
 import os
 import hashlib
+from datetime import timedelta
 
 class MinioService:
     def __init__(self):
@@ -11,7 +12,8 @@ class MinioService:
             settings.MINIO_ENDPOINT,
             access_key=settings.MINIO_ACCESS_KEY,
             secret_key=settings.MINIO_SECRET_KEY,
-            secure=settings.MINIO_SECURE
+            secure=settings.MINIO_SECURE,
+            region=getattr(settings, 'MINIO_REGION', None)
         )
         
         # Garantir que o bucket existe
@@ -56,7 +58,8 @@ class MinioService:
                     content_type=content_type
                 )
             else:
-                # Para outros tipos de objetos
+                # Para outros tipos de objetos (caminho de arquivo local)
+                file_size = os.path.getsize(file_obj)
                 self.client.fput_object(
                     bucket_name=settings.MINIO_BUCKET_NAME,
                     object_name=object_name,
@@ -82,19 +85,26 @@ class MinioService:
             print(f"Erro ao fazer upload do arquivo: {err}")
             raise
     
-    def get_file_url(self, object_name, expires=7*24*60*60):
+    def get_file_url(self, object_name, expires=7*24*60*60, download_name=None):
         """
         Gera uma URL pré-assinada para o objeto
         
         :param object_name: Nome do objeto no bucket
         :param expires: Tempo de expiração em segundos (padrão: 7 dias)
+        :param download_name: Nome sugerido ao navegador no download (opcional)
         :return: URL pré-assinada
         """
+        response_headers = None
+        if download_name:
+            response_headers = {
+                'response-content-disposition': f'attachment; filename="{download_name}"'
+            }
         try:
             return self.client.presigned_get_object(
                 bucket_name=settings.MINIO_BUCKET_NAME,
                 object_name=object_name,
-                expires=expires
+                expires=timedelta(seconds=expires),
+                response_headers=response_headers
             )
         except S3Error as err:
             print(f"Erro ao gerar URL do arquivo: {err}")